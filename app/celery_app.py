@@ -30,5 +30,18 @@ celery_app.conf.beat_schedule = {
         'task': 'app.tasks.bigquery_nightly_upsert',
         'schedule': crontab(minute=0, hour=0)
     },
+    'email_outbox': {
+        'task': 'app.tasks.dispatch_email_outbox',
+        'schedule': 15.0
+    },
+    'reset_broken_streaks': {
+        'task': 'app.tasks.reset_broken_streaks',
+        # 00:05 in Asia/Jakarta (STREAK_TIMEZONE)
+        'schedule': crontab(minute=5, hour=17)
+    },
+    'rebuild_leaderboards': {
+        'task': 'app.tasks.rebuild_leaderboards',
+        'schedule': crontab(minute=30, hour=17)
+    },
 }
 
@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 
 from pydantic import EmailStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -23,6 +24,11 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
     POSTGRES_PORT: int
+    # read replicas, comma separated host[:port]; same user, password and database as the primary
+    POSTGRES_REPLICA_HOSTS: str = ""
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_LAG_CHECK_INTERVAL_SECONDS: float = 10.0
+    READ_YOUR_WRITES_SECONDS: int = 30
 
     FIRST_SUPERUSER_USERNAME: str
     FIRST_SUPERUSER_EMAIL: EmailStr
@@ -32,6 +38,8 @@ class Settings(BaseSettings):
     AWS_SECRET_ACCESS_KEY: str
     AWS_DEFAULT_REGION: str
     AWS_S3_BUCKET_NAME: str
+    S3_MAX_POOL_CONNECTIONS: int = 32
+    SES_MAX_SEND_RATE: float = 14.0
 
     GOOGLE_API_KEY: str
     OPENAI_API_KEY: str
@@ -39,6 +47,25 @@ class Settings(BaseSettings):
     FRONTEND_URL: str
     CELERY_BROKER_URL: str
     CELERY_RESULT_BACKEND: str
+    # reward evaluation waits this long so a burst of submissions is evaluated once
+    REWARDS_COALESCE_SECONDS: int = 10
+    # streak days roll over at midnight in this timezone
+    STREAK_TIMEZONE: str = "Asia/Jakarta"
+
+    REDIS_URL: Optional[str] = None  # falls back to CELERY_BROKER_URL
+    ANALYTICS_CACHE_TTL_SECONDS: int = 300
+    USER_SUMMARY_CACHE_TTL_SECONDS: int = 30
+
+    # the content worker serves Prometheus metrics on this port
+    WORKER_METRICS_PORT: int = 9100
+    # bearer token Prometheus sends to the API's /metrics; the endpoint is not served when unset
+    METRICS_TOKEN: Optional[str] = None
+    # SQL profile headers on every response; on everywhere but prod unless set
+    QUERY_PROFILER_ENABLED: Optional[bool] = None
+    # statement shapes repeated this often in one request are logged as a likely N+1
+    N_PLUS_ONE_THRESHOLD: int = 5
+    # OTLP/HTTP collector for traces, e.g. http://localhost:4318; tracing is off when unset
+    OTEL_EXPORTER_OTLP_ENDPOINT: Optional[str] = None
 # class ContainerDevSettings(Settings):
 #     model_config = SettingsConfigDict(
 #         env_file="./backend/.env.dev", env_file_encoding="utf-8", case_sensitive=True
@@ -0,0 +1,179 @@
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+from app.log import get_logger
+
+log = get_logger(__name__)
+
+# SQL statements per request / per block of code.
+#
+# One pair of engine-level cursor listeners feeds every active QueryProfile of
+# the current context: the Prometheus middleware (app/metrics.py), the debug
+# middleware below and query_budget in tests can all be active at once.
+# Statements are grouped by shape (literals and bind values stripped), so the
+# same lazy load issued once per row of a list shows up as one shape with a
+# high count, the usual sign of an N+1.
+
+_active_profiles: ContextVar[Tuple["QueryProfile", ...]] = ContextVar("active_profiles", default=())
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_BIND_PARAM = re.compile(r"%\(\w+\)s|%s|\$\d+|:\w+|\?")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*\?\s*,?)+\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    """
+    Shape of a statement: literals and bind parameters become ?, IN lists
+    collapse to IN (...) and whitespace is squeezed, so two executions that
+    only differ in their values compare equal.
+    """
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _BIND_PARAM.sub("?", shape)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _IN_LIST.sub("IN (...)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+@dataclass
+class QueryProfile:
+    count: int = 0
+    seconds: float = 0.0
+    # statement shape -> executions; only filled when record_shapes is set
+    shapes: Counter = field(default_factory=Counter)
+    record_shapes: bool = False
+
+    def repeated(self, threshold: int = 2) -> List[Tuple[str, int]]:
+        """Shapes executed at least `threshold` times, most frequent first."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+@contextmanager
+def profile_queries(record_shapes: bool = False) -> Iterator[QueryProfile]:
+    """
+    Count the statements executed in this context (thread / asyncio task) while the block runs.
+
+    Usage:
+        with profile_queries(record_shapes=True) as profile:
+            ...
+        profile.count, profile.seconds, profile.repeated()
+    """
+    profile = QueryProfile(record_shapes=record_shapes)
+    token = _active_profiles.set(_active_profiles.get() + (profile,))
+    try:
+        yield profile
+    finally:
+        _active_profiles.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_started_at")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    profiles = _active_profiles.get()
+    if not profiles:
+        return
+    shape = None
+    for profile in profiles:
+        profile.count += 1
+        profile.seconds += elapsed
+        if profile.record_shapes:
+            if shape is None:
+                shape = normalize_statement(statement)
+            profile.shapes[shape] += 1
+
+
+####################
+### Query budget ###
+####################
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(max_queries: int) -> Iterator[QueryProfile]:
+    """
+    Fail when the block executes more than `max_queries` statements.
+
+    Usage (tests):
+        with query_budget(2):
+            asyncio.run(get_a_user_badges(db=db, user=user))
+
+    Raises:
+        QueryBudgetExceeded: listing the statement shapes, most frequent first
+    """
+    with profile_queries(record_shapes=True) as profile:
+        yield profile
+    if profile.count > max_queries:
+        shapes = "\n".join(f"  {n} x {shape}" for shape, n in profile.shapes.most_common())
+        raise QueryBudgetExceeded(f"{profile.count} queries executed, budget is {max_queries}:\n{shapes}")
+
+
+########################
+### Debug middleware ###
+########################
+
+def _header_value(text: str, limit: int = 200) -> bytes:
+    text = text if len(text) <= limit else text[:limit - 3] + "..."
+    return text.encode("latin-1", "replace")
+
+
+class QueryProfilerMiddleware:
+    """
+    Development / staging middleware (see QUERY_PROFILER_ENABLED) adding the
+    request's SQL profile to the response headers:
+
+        X-DB-Query-Count: 42
+        X-DB-Query-Time-Ms: 18.3
+        X-DB-Repeated-Queries: 20x SELECT badges.badge_id ... WHERE badges.badge_id = ?
+
+    and logging a warning when one statement shape repeats N_PLUS_ONE_THRESHOLD
+    times or more. Headers are set when the response starts, so statements a
+    streaming body runs afterwards are not counted.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with profile_queries(record_shapes=True) as profile:
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    repeated = profile.repeated(settings.N_PLUS_ONE_THRESHOLD)
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-db-query-count", str(profile.count).encode()))
+                    headers.append((b"x-db-query-time-ms", f"{profile.seconds * 1000:.1f}".encode()))
+                    if repeated:
+                        shape, n = repeated[0]
+                        headers.append((b"x-db-repeated-queries", _header_value(f"{n}x {shape}")))
+                        log.warning(
+                            f"Possible N+1 in {scope['method']} {scope['path']}: "
+                            + "; ".join(f"{n}x {shape}" for shape, n in repeated)
+                        )
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,159 @@
+import itertools
+import threading
+import time
+from typing import List, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database.db import SessionLocal
+from app.log import get_logger
+
+log = get_logger(__name__)
+
+# Read-only traffic (dashboards, catalogs, listings) can go to streaming replicas.
+#
+# A replica is used only while its measured replay lag is under
+# REPLICA_MAX_LAG_SECONDS; lag is measured at most every
+# REPLICA_LAG_CHECK_INTERVAL_SECONDS per replica. When no replica qualifies,
+# or none is configured, reads fall back to the primary.
+# Users who just wrote something are pinned to the primary for
+# READ_YOUR_WRITES_SECONDS so they always see their own submission.
+
+LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+STICKY_KEY_PREFIX = "rw"
+
+
+class _Replica:
+    def __init__(self, host: str):
+        self.host = host
+        hostname, _, port = host.partition(":")
+        url = (
+            f"postgresql+psycopg://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}"
+            f"@{hostname}:{port or settings.POSTGRES_PORT}/{settings.POSTGRES_DB}"
+        )
+        self.engine: Engine = create_engine(
+            url,
+            pool_size=5,
+            max_overflow=0,
+            pool_timeout=5,
+            pool_recycle=1800,
+            pool_pre_ping=True,
+            future=True,
+        )
+        self.session_factory = sessionmaker(
+            bind=self.engine,
+            autocommit=False,
+            autoflush=False,
+            expire_on_commit=False,
+            future=True,
+        )
+        self.lag: Optional[float] = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+
+    def is_healthy(self) -> bool:
+        now = time.monotonic()
+        if now - self.checked_at >= settings.REPLICA_LAG_CHECK_INTERVAL_SECONDS and self.lock.acquire(blocking=False):
+            # one request refreshes the lag, everyone else keeps using the last value
+            try:
+                with self.engine.connect() as conn:
+                    self.lag = float(conn.execute(LAG_QUERY).scalar() or 0)
+            except Exception as e:
+                log.warning(f"Replica {self.host} unavailable: {e}")
+                self.lag = None
+            finally:
+                self.checked_at = time.monotonic()
+                self.lock.release()
+        return self.lag is not None and self.lag <= settings.REPLICA_MAX_LAG_SECONDS
+
+
+_replicas: Optional[List[_Replica]] = None
+_replicas_lock = threading.Lock()
+_round_robin = itertools.count()
+
+
+def _get_replicas() -> List[_Replica]:
+    global _replicas
+    if _replicas is None:
+        with _replicas_lock:
+            if _replicas is None:
+                hosts = [h.strip() for h in (settings.POSTGRES_REPLICA_HOSTS or "").split(",") if h.strip()]
+                _replicas = [_Replica(h) for h in hosts]
+    return _replicas
+
+
+def pick_replica() -> Optional[_Replica]:
+    """Next healthy replica in round-robin order, or None if reads should go to the primary."""
+    replicas = _get_replicas()
+    if not replicas:
+        return None
+    start = next(_round_robin)
+    for i in range(len(replicas)):
+        replica = replicas[(start + i) % len(replicas)]
+        if replica.is_healthy():
+            return replica
+    return None
+
+
+def mark_user_wrote(user_id: Optional[str]) -> None:
+    """Pin the user's reads to the primary for READ_YOUR_WRITES_SECONDS."""
+    if user_id is None or not _get_replicas():
+        return
+    from app.router.cache import get_redis
+
+    try:
+        get_redis().set(f"{STICKY_KEY_PREFIX}:{user_id}", 1, ex=settings.READ_YOUR_WRITES_SECONDS)
+    except Exception as e:
+        log.warning(f"Could not record write for {user_id}: {e}")
+
+
+def _recently_wrote(user_id: Optional[str]) -> bool:
+    if user_id is None:
+        return False
+    from app.router.cache import get_redis
+
+    try:
+        return bool(get_redis().exists(f"{STICKY_KEY_PREFIX}:{user_id}"))
+    except Exception:
+        # can't tell, so take the safe side
+        return True
+
+
+def replica_session_factory(user_id: Optional[str] = None) -> Optional[sessionmaker]:
+    """
+    Replica session factory for a read-only unit of work.
+
+    Args:
+        user_id: The user the reads are for; used for read-your-writes stickiness
+
+    Returns:
+        A healthy replica's sessionmaker, or None if the reads should go to the primary
+    """
+    if not _get_replicas() or _recently_wrote(user_id):
+        return None
+    replica = pick_replica()
+    return replica.session_factory if replica is not None else None
+
+
+def read_session_factory(user_id: Optional[str] = None) -> sessionmaker:
+    """
+    Session factory for a read-only unit of work outside a request.
+
+    Args:
+        user_id: The user the reads are for; used for read-your-writes stickiness
+
+    Returns:
+        A replica's sessionmaker, or SessionLocal (primary)
+    """
+    return replica_session_factory(user_id) or SessionLocal
@@ -23,10 +23,12 @@ def get_logger(name: Optional[str] = None, level: DebugLevelType = "DEBUG") -> l
         logging.Logger: The configured logger object.
     """
     logger = logging.getLogger(name=name)
-    handler = logging.StreamHandler(sys.stdout)
-    formatter = logging.Formatter(LOGGING_FORMATTER)
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
+    # loggers are shared per name; only the first call attaches a handler
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        formatter = logging.Formatter(LOGGING_FORMATTER)
+        handler.setFormatter(formatter)
+        logger.addHandler(handler)
 
     if not level or level not in DebugLevels:
         logger.warning(
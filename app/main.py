@@ -1,13 +1,14 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, Response
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
-from app.model import users, schools, streaks, badges, user_badges, points, quizzes, questions, attempts, temp_admins, verification_codes, topics, reference_counts, chats, analytics 
+from app.model import users, schools, streaks, badges, user_badges, points, quizzes, questions, attempts, temp_admins, verification_codes, topics, reference_counts, chats, analytics, email_outbox, quiz_user_scores, school_daily_activity 
 from app.repeated_tasks.ready import *
 from app.repeated_tasks.question_and_prompt import * 
 from app.repeated_tasks.visuals import *
 import asyncio
 import logging
-from typing import Callable, Dict
+import secrets
+from typing import Callable, Dict, Optional
 from app.router import (
     auth_router, 
     users_router, 
@@ -15,6 +16,10 @@ from app.router import (
     admin_router,
 )
 from app.config import settings
+from app.metrics import MetricsMiddleware
+from app.database.profiler import QueryProfilerMiddleware
+from app.tracing import TracingMiddleware, setup_tracing
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 # --- Commented out: Background task logic now handled by worker.py ---
 # task_locks: Dict[str, asyncio.Lock] = {
@@ -114,6 +119,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# latency and DB usage per route, exposed at /metrics
+app.add_middleware(MetricsMiddleware)
+
+# SQL query count / time / repeated statements in response headers (dev and staging)
+query_profiler_enabled = settings.QUERY_PROFILER_ENABLED
+if query_profiler_enabled is None:
+    query_profiler_enabled = settings.ENV != "prod"
+if query_profiler_enabled:
+    app.add_middleware(QueryProfilerMiddleware)
+
+# outermost, so the request span covers the other middlewares
+if setup_tracing("kira-api"):
+    app.add_middleware(TracingMiddleware)
+
 app.include_router(auth_router, prefix="/auth", tags=["Authentication"])
 app.include_router(users_router, prefix="/users", tags=["User"])
 app.include_router(super_admin_router, prefix="/super_admin", tags=["Super Admin"])
@@ -125,3 +144,11 @@ app.include_router(admin_router, prefix="/admin", tags=["Admin"])
 @app.get("/")
 def read_root():
     return {"KIRA: ": settings.PROJECT_NAME, 'Environment: ': settings.ENV, 'Version: ': settings.API_VERSION, 'Docs: ': "https://api.kiraclassroom.com/docs"}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics(authorization: Optional[str] = Header(None)):
+    # the API port is public, so only a scraper holding METRICS_TOKEN sees the metrics
+    expected = f"Bearer {settings.METRICS_TOKEN}".encode()
+    if not settings.METRICS_TOKEN or not secrets.compare_digest((authorization or "").encode(), expected):
+        raise HTTPException(status_code=404, detail="Not Found")
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,145 @@
+"""Prometheus metrics for the web app (/metrics) and the content worker (sidecar port)"""
+
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from prometheus_client import Gauge, Histogram, REGISTRY
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import func, select
+
+from app.database.profiler import profile_queries
+from app.tracing import span
+
+# Label values are kept to small fixed sets (route templates, not raw paths)
+# so the number of series stays bounded.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+EXTERNAL_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "SQL statements executed per HTTP request", ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds", "Time spent in SQL statements per HTTP request", ["route"], buckets=LATENCY_BUCKETS,
+)
+EXTERNAL_CALL_DURATION = Histogram(
+    "external_call_duration_seconds", "Latency of calls to external services", ["service", "operation", "outcome"],
+    buckets=EXTERNAL_BUCKETS,
+)
+WORKER_TASK_DURATION = Histogram(
+    "worker_task_duration_seconds", "Duration of one run of a content worker task", ["task", "outcome"],
+    buckets=EXTERNAL_BUCKETS,
+)
+PIPELINE_STAGE_DURATION = Histogram(
+    "pipeline_stage_duration_seconds", "Processing time of a topic in a content pipeline stage, from its start to its finish", ["stage"],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600),
+)
+TOPICS_BY_STATE = Gauge("topics_by_state", "Topics per pipeline state", ["state"])
+
+
+#######################
+### Connection pool ###
+#######################
+
+class _PoolCollector:
+    """Connection pool usage of the primary and replica engines, read at scrape time."""
+
+    def collect(self):
+        from app.database.db import ENGINE
+        from app.database import replicas
+
+        checked_out = GaugeMetricFamily("db_pool_checked_out", "Connections in use", labels=["engine"])
+        size = GaugeMetricFamily("db_pool_size", "Configured pool size", labels=["engine"])
+        engines = [("primary", ENGINE)] + [(r.host, r.engine) for r in (replicas._replicas or [])]
+        for name, engine in engines:
+            pool = engine.pool
+            if hasattr(pool, "checkedout"):
+                checked_out.add_metric([name], pool.checkedout())
+                size.add_metric([name], pool.size())
+        yield checked_out
+        yield size
+
+
+REGISTRY.register(_PoolCollector())
+
+
+######################
+### External calls ###
+######################
+
+@contextmanager
+def track_external(service: str, operation: str) -> Iterator[None]:
+    """
+    Time a call to an external service, labelled ok or error, in a tracing span of its own.
+
+    Usage:
+        with track_external("openai", "chat.completions"):
+            completion = client.chat.completions.create(...)
+    """
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        with span(f"{service} {operation}", **{"peer.service": service}):
+            yield
+        outcome = "ok"
+    finally:
+        EXTERNAL_CALL_DURATION.labels(service, operation, outcome).observe(time.perf_counter() - started)
+
+
+############
+### HTTP ###
+############
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and DB usage per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            with profile_queries() as stats:
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            route = scope.get("route")
+            route_name = getattr(route, "path", "unmatched")
+            HTTP_REQUEST_DURATION.labels(scope["method"], route_name, str(status_code)).observe(elapsed)
+            DB_QUERIES_PER_REQUEST.labels(route_name).observe(stats.count)
+            DB_TIME_PER_REQUEST.labels(route_name).observe(stats.seconds)
+
+
+##############
+### Worker ###
+##############
+
+async def refresh_topic_states() -> None:
+    """Update topics_by_state from one GROUP BY over topics (queue depth of every pipeline stage)."""
+    from app.database.db import get_async_db
+    from app.model.topics import Topic
+
+    async with get_async_db() as db:
+        result = await db.execute(select(Topic.state, func.count()).group_by(Topic.state))
+        counts = dict(result.all())
+    # drop states that emptied out since the last refresh
+    TOPICS_BY_STATE.clear()
+    for state, count in counts.items():
+        TOPICS_BY_STATE.labels(state).set(count)
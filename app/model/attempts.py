@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, ForeignKey, DateTime, Integer, Float
+from sqlalchemy import Column, String, Boolean, ForeignKey, DateTime, Integer, Float, Index
 from sqlalchemy.orm import relationship
 from app.database.base_class import Base
 from datetime import datetime
@@ -18,8 +18,16 @@ class Attempt(Base):
     fail_count = Column(Integer)
     start_at = Column(DateTime)
     end_at = Column(DateTime)
+    # Idempotency-Key of the submission that created the attempt
+    idempotency_key = Column(String(64))
 
     # relationship 
     user = relationship("User", back_populates="attempts")
     quiz = relationship("Quiz", back_populates="attempts")
 
+    __table_args__ = (
+        # per-user attempt history, paged by (quiz_id, attempt_number)
+        Index("attempts_user_id_quiz_id_attempt_number_idx", "user_id", "quiz_id", "attempt_number"),
+        # a retried submission finds its original attempt
+        Index("attempts_user_id_idempotency_key_key", "user_id", "idempotency_key", unique=True),
+    )
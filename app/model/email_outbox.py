@@ -0,0 +1,24 @@
+from sqlalchemy import Column, String, Integer, Text, DateTime, Index
+from app.database.base_class import Base
+from datetime import datetime
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    email_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+
+    # attributes
+    recipient = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body_html = Column(Text, nullable=False)
+    status = Column(String(20), nullable=False, default="PENDING")  # PENDING, SENT or FAILED
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.now)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.now)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # the sender only ever scans due PENDING rows
+        Index("email_outbox_status_next_attempt_at_idx", "status", "next_attempt_at"),
+    )
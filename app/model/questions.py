@@ -20,6 +20,8 @@ class Question(Base):
     image_prompt = Column(String(512), nullable=True)
     image_url = Column(String(512), nullable=True)
     cloud_front_url = Column(String(512), nullable=True)
+    thumbnail_url = Column(String(512), nullable=True)
+    mobile_url = Column(String(512), nullable=True)
 
     topic_id = Column(Integer, ForeignKey("topics.topic_id"), nullable=True)
     
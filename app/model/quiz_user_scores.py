@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, PrimaryKeyConstraint, Integer, Index
+from app.database.base_class import Base
+from datetime import datetime
+
+
+class QuizUserScore(Base):
+    """Latest attempt of every user on every quiz, maintained by app.router.rollups."""
+    __tablename__ = "quiz_user_scores"
+
+    quiz_id = Column(Integer, ForeignKey("quizzes.quiz_id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(String(12), ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    school_id = Column(String(8), ForeignKey("schools.school_id"), nullable=False)
+
+    # attributes
+    attempt_number = Column(Integer, nullable=False)
+    pass_count = Column(Integer)
+    fail_count = Column(Integer)
+    updated_at = Column(DateTime, default=datetime.now, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('quiz_id', 'user_id'),
+        Index("quiz_user_scores_school_id_quiz_id_idx", "school_id", "quiz_id"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, ForeignKey, DateTime, Integer, ARRAY
+from sqlalchemy import Column, String, Boolean, ForeignKey, DateTime, Integer, ARRAY, Index
 from sqlalchemy.orm import relationship
 from app.database.base_class import Base
 from datetime import datetime
@@ -26,4 +26,9 @@ class Quiz(Base):
     school = relationship("School", back_populates="quizzes")
     attempts = relationship("Attempt", back_populates="quiz", cascade="all, delete-orphan")
     creator = relationship("User", back_populates="quizzes")
-    
\ No newline at end of file
+    
+
+    __table_args__ = (
+        # /users/quizzes pages a school's quizzes by quiz_id
+        Index("quizzes_school_id_quiz_id_idx", "school_id", "quiz_id"),
+    )
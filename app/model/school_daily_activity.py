@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, Date, ForeignKey, PrimaryKeyConstraint, Float
+from app.database.base_class import Base
+
+
+class SchoolDailyActivity(Base):
+    """Seconds spent in quizzes and chat sessions per school per day, maintained by app.router.rollups."""
+    __tablename__ = "school_daily_activity"
+
+    school_id = Column(String(8), ForeignKey("schools.school_id"), nullable=False)
+    day = Column(Date, nullable=False)
+
+    # attributes
+    quiz_seconds = Column(Float, default=0, nullable=False)
+    chat_seconds = Column(Float, default=0, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('school_id', 'day'),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, String, Integer, Date, DateTime, ForeignKey
 from sqlalchemy.orm import relationship
 from app.database.base_class import Base
 from datetime import datetime
@@ -10,6 +10,8 @@ class Streak(Base):
     current_streak = Column(Integer, default=0, nullable=False)
     longest_streak = Column(Integer, default=0, nullable=False)
     last_activity = Column(DateTime, nullable=True)
+    # day of last_activity in settings.STREAK_TIMEZONE; what the streak counts
+    last_active_date = Column(Date, nullable=True)
     updated_at = Column(DateTime, default=datetime.now, nullable=False)
 
     user = relationship("User", back_populates="streak")
@@ -15,6 +15,8 @@ class Topic(Base):
     week_number = Column(Integer, nullable=False) 
     school_id = Column(String(8), ForeignKey("schools.school_id"), nullable=False)
     summary = Column(Text, nullable=False, default="")
+    # W3C traceparent of the upload request, continued by each worker stage (app/tracing.py)
+    trace_context = Column(String(64), nullable=True)
 
     school = relationship("School", back_populates="topics")
     questions = relationship("Question", back_populates="topic")
@@ -7,15 +7,17 @@ from app.database.session import SQLALCHEMY_DATABASE_URL
 from app.model.topics import Topic
 from app.model.questions import *
 from app.model.schools import School
-from app.router.aws_s3 import S3Service
+from app.router.aws_s3 import get_s3_service
 from app.config import settings
 import re, json
 from app.log import get_logger
+from app.metrics import track_external
+from app.router.topic_progress import TopicProgress
 
 logger = get_logger("prompt_generation", "INFO")
 #20 question takes around 5co min to generate
 OPENAI_MODEL = "gpt-4o-mini"
-s3_service = S3Service()
+s3_service = get_s3_service()
 
 async def prompt_generation():
     """Process a single topic that needs prompt generation"""
@@ -35,6 +37,7 @@ async def prompt_generation():
         topic_id = rn.topic_id
         school_id = rn.school_id
         s3_url = rn.s3_bucket_url
+        trace_context = rn.trace_context
         
         # Get school information
         school = (await db.execute(select(School)
@@ -55,6 +58,7 @@ async def prompt_generation():
         if len(questions) == max_questions:
             rn.state = "PROMPTS_GENERATED"
             await db.commit()
+            TopicProgress(school_id, topic_id, "prompts", total=max_questions).finish("PROMPTS_GENERATED", record_duration=False)
             return
         elif len(questions) > 0:
             for question in questions:
@@ -62,145 +66,159 @@ async def prompt_generation():
             await db.commit()
     # CONNECTION RELEASED HERE - no longer holding DB connection
     
-    # Step 2: Get PDF from S3 (no DB connection needed)
-    pdf_bytes = s3_service.get_file_by_url(s3_url)
-
-    # Step 3: Upload to OpenAI and generate (expensive, no DB connection)
-    pdf_buffer = io.BytesIO(pdf_bytes)
-    pdf_buffer.name = "document.pdf"
-    uploaded_file = client.files.create(
-        file=pdf_buffer,
-        purpose="assistants"
-    )
-
-    # Prepare prompts
-    if question_prompt:
-        role_prompt = question_prompt
-    else:
-        with open("app/gen_ai_prompts/open_ai_role_prompt.txt", encoding="utf-8") as f:
-            role_prompt = f.read()
-
-    with open("app/gen_ai_prompts/open_ai_role_prompt_instruction.txt", encoding="utf-8") as f:
-        instruction_content = f.read()
+    progress = TopicProgress(school_id, topic_id, "prompts", total=max_questions, trace_context=trace_context)
+    progress.start()
+    try:
+        # Step 2: Get PDF from S3 (no DB connection needed)
+        pdf_bytes = await s3_service.get_file_by_url_async(s3_url)
+
+        # Step 3: Upload to OpenAI and generate (expensive, no DB connection)
+        pdf_buffer = io.BytesIO(pdf_bytes)
+        pdf_buffer.name = "document.pdf"
+        with track_external("openai", "files.create"):
+            uploaded_file = client.files.create(
+                file=pdf_buffer,
+                purpose="assistants"
+            )
+
+        # Prepare prompts
+        if question_prompt:
+            role_prompt = question_prompt
+        else:
+            with open("app/gen_ai_prompts/open_ai_role_prompt.txt", encoding="utf-8") as f:
+                role_prompt = f.read()
+
+        with open("app/gen_ai_prompts/open_ai_role_prompt_instruction.txt", encoding="utf-8") as f:
+            instruction_content = f.read()
     
-    combined_prompt = role_prompt + "\n\n" + instruction_content
+        combined_prompt = role_prompt + "\n\n" + instruction_content
 
-    # Retry logic for question generation
-    max_retries = 5
-    all_generated_questions = []
+        # Retry logic for question generation
+        max_retries = 5
+        all_generated_questions = []
     
-    for attempt in range(max_retries):
-        remaining_questions = max_questions - len(all_generated_questions)
+        for attempt in range(max_retries):
+            remaining_questions = max_questions - len(all_generated_questions)
         
-        if remaining_questions <= 0:
-            break
+            if remaining_questions <= 0:
+                break
         
-        logger.info(f"Attempt {attempt + 1}/{max_retries}: Requesting {remaining_questions} questions")
+            logger.info(f"Attempt {attempt + 1}/{max_retries}: Requesting {remaining_questions} questions")
         
-        completion = client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": combined_prompt},
-                {
-                    "role": "user",
-                    "content": [
+            with track_external("openai", "chat.completions"):
+                completion = client.chat.completions.create(
+                    model=OPENAI_MODEL,
+                    messages=[
+                        {"role": "system", "content": combined_prompt},
                         {
-                            "type": "text", 
-                            "text": f"""CRITICAL INSTRUCTION: You MUST generate EXACTLY {remaining_questions} questions - no more, no less.
+                            "role": "user",
+                            "content": [
+                                {
+                                    "type": "text", 
+                                    "text": f"""CRITICAL INSTRUCTION: You MUST generate EXACTLY {remaining_questions} questions - no more, no less.
                             
 Count carefully before responding. The total number of questions across ALL categories must equal EXACTLY {remaining_questions}.
 
 This is attempt {attempt + 1} of {max_retries}. We need precisely {remaining_questions} questions.
 
 Generate the questions from the PDF file provided."""
-                        },
-                        {"type": "file", "file": {"file_id": uploaded_file.id}}
+                                },
+                                {"type": "file", "file": {"file_id": uploaded_file.id}}
+                            ]
+                        }
                     ]
-                }
-            ]
-        )
-
-        response = completion.choices[0].message.content
-        json_match = re.search(r"```json(.*?)```", response, re.DOTALL)
-
-        if json_match:
-            json_str = json_match.group(1).strip()
-        else:
-            json_str = response.strip()
-
-        try:
-            data = json.loads(json_str)
-            questions_in_this_attempt = []
-            for category, questions in data.items():
-                for q in questions:
-                    questions_in_this_attempt.append(q)
+                )
+
+            response = completion.choices[0].message.content
+            json_match = re.search(r"```json(.*?)```", response, re.DOTALL)
+
+            if json_match:
+                json_str = json_match.group(1).strip()
+            else:
+                json_str = response.strip()
+
+            try:
+                data = json.loads(json_str)
+                questions_in_this_attempt = []
+                for category, questions in data.items():
+                    for q in questions:
+                        questions_in_this_attempt.append(q)
             
-            logger.info(f"Attempt {attempt + 1}: Received {len(questions_in_this_attempt)} questions")
+                logger.info(f"Attempt {attempt + 1}: Received {len(questions_in_this_attempt)} questions")
             
-            for q in questions_in_this_attempt:
-                if len(all_generated_questions) >= max_questions:
-                    break
-                all_generated_questions.append(q)
+                accumulated = len(all_generated_questions)
+                for q in questions_in_this_attempt:
+                    if len(all_generated_questions) >= max_questions:
+                        break
+                    all_generated_questions.append(q)
+                progress.advance(len(all_generated_questions) - accumulated)
             
-            logger.info(f"Total accumulated: {len(all_generated_questions)}/{max_questions}")
+                logger.info(f"Total accumulated: {len(all_generated_questions)}/{max_questions}")
             
-            if len(all_generated_questions) == max_questions:
-                logger.info(f"✓ Success! Generated exactly {max_questions} questions")
-                break
+                if len(all_generated_questions) == max_questions:
+                    logger.info(f"✓ Success! Generated exactly {max_questions} questions")
+                    break
                 
-        except json.JSONDecodeError as e:
-            logger.warning(f"Attempt {attempt + 1}: JSON decode error - {str(e)}")
-            continue
-
-    # Generate summary
-    summary_response = client.chat.completions.create(
-        model=OPENAI_MODEL, 
-        messages=[
-            {"role": "system", "content": ""}, 
-            {
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": f"Return a summary no more than 5000 words on the pdf that was given to you"},
-                    {"type": "file", "file": {"file_id": uploaded_file.id}}
+            except json.JSONDecodeError as e:
+                logger.warning(f"Attempt {attempt + 1}: JSON decode error - {str(e)}")
+                continue
+
+        # Generate summary
+        with track_external("openai", "chat.completions"):
+            summary_response = client.chat.completions.create(
+                model=OPENAI_MODEL, 
+                messages=[
+                    {"role": "system", "content": ""}, 
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "text", "text": f"Return a summary no more than 5000 words on the pdf that was given to you"},
+                            {"type": "file", "file": {"file_id": uploaded_file.id}}
+                        ]
+                    }
                 ]
-            }
-        ]
-    )
+            )
     
-    summary_text = summary_response.choices[0].message.content or ""
-
-    # Cleanup OpenAI file
-    client.files.delete(uploaded_file.id)
+        summary_text = summary_response.choices[0].message.content or ""
 
-    # Verify question count
-    if len(all_generated_questions) != max_questions:
-        raise Exception(
-            f"Failed to generate exactly {max_questions} questions after {max_retries} attempts. "
-            f"Got {len(all_generated_questions)} questions instead."
-        )
+        # Cleanup OpenAI file
+        with track_external("openai", "files.delete"):
+            client.files.delete(uploaded_file.id)
 
-    # Step 4: Write results back to DB with NEW connection
-    async with get_async_db() as db:
-        # Add all questions
-        for q in all_generated_questions[:max_questions]:
-            new_question = Question(
-                school_id=school_id,
-                topic_id=topic_id,
-                content=q["question"],
-                options=q.get("options", []),
-                question_type=q["type"],
-                points=1,
-                answer=q["correct_answer"],
-                image_prompt=q['visual_prompt'],
-                image_url=None 
+        # Verify question count
+        if len(all_generated_questions) != max_questions:
+            raise Exception(
+                f"Failed to generate exactly {max_questions} questions after {max_retries} attempts. "
+                f"Got {len(all_generated_questions)} questions instead."
             )
-            db.add(new_question)
+
+        # Step 4: Write results back to DB with NEW connection
+        async with get_async_db() as db:
+            # Add all questions
+            for q in all_generated_questions[:max_questions]:
+                new_question = Question(
+                    school_id=school_id,
+                    topic_id=topic_id,
+                    content=q["question"],
+                    options=q.get("options", []),
+                    question_type=q["type"],
+                    points=1,
+                    answer=q["correct_answer"],
+                    image_prompt=q['visual_prompt'],
+                    image_url=None 
+                )
+                db.add(new_question)
         
-        # Update topic state and summary
-        topic = await db.get(Topic, topic_id)
-        topic.state = "PROMPTS_GENERATED"
-        topic.summary = summary_text
-        await db.commit()
-    # CONNECTION RELEASED HERE
+            # Update topic state and summary
+            topic = await db.get(Topic, topic_id)
+            topic.state = "PROMPTS_GENERATED"
+            topic.summary = summary_text
+            await db.commit()
+        # CONNECTION RELEASED HERE
     
+    except Exception as e:
+        progress.fail(e)
+        raise
+    progress.finish("PROMPTS_GENERATED")
+
     logger.info(f"✓ Successfully saved {max_questions} questions to database")
@@ -5,6 +5,8 @@ from app.router.aws_ses import send_ready_notification
 from app.model.topics import Topic
 from app.model.users import User
 from app.log import get_logger
+from app.router.topic_progress import TopicProgress
+from app.tracing import span
 
 logger = get_logger("ready_for_review", "INFO")
 
@@ -27,21 +29,24 @@ async def ready_for_review():
                 # nothing to process
                 return
 
-            # Step 2: change the state
-            entry.state = "READY_FOR_REVIEW"
+            with span("pipeline review", traceparent=entry.trace_context, topic_id=entry.topic_id, school_id=entry.school_id):
+                # Step 2: change the state
+                entry.state = "READY_FOR_REVIEW"
 
-            # Step 3: send admin notifications
-            result = await db.execute(
-                select(User.email)
-                .filter(User.is_admin == True, User.school_id == entry.school_id)
-            )
-            admin_emails = [row[0] for row in result.all()]
-            for email in admin_emails:
-                logger.info(f"Notification sent to {email}")
-                send_ready_notification(email)
+                # Step 3: send admin notifications
+                result = await db.execute(
+                    select(User.email)
+                    .filter(User.is_admin == True, User.school_id == entry.school_id)
+                )
+                admin_emails = [row[0] for row in result.all()]
+                for email in admin_emails:
+                    logger.info(f"Notification queued for {email}")
+                    send_ready_notification(email, db=db)
 
-            # Step 4: commit changes
-            await db.commit()
+                # Step 4: commit changes
+                await db.commit()
+                # review is a state change, not processing: nothing to time
+                TopicProgress(entry.school_id, entry.topic_id, "review").finish("READY_FOR_REVIEW", record_duration=False)
             return  # Task completed successfully
 
         except Exception as e:
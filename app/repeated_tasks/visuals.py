@@ -1,10 +1,9 @@
 import asyncio
-import io
-from PIL import Image
 from sqlalchemy import select
 from sqlalchemy.orm import joinedload
 from app.database.db import get_async_db
-from app.router.aws_s3 import S3Service
+from app.router.aws_s3 import get_s3_service
+from app.router.image_variants import build_variants_async, variant_filename, to_cloud_front_url
 from app.model.topics import Topic
 from app.model.questions import Question
 from app.model.users import User
@@ -13,24 +12,24 @@ from google import genai
 from google.genai import types
 from app.config import settings
 from app.log import get_logger
+from app.metrics import track_external
+from app.router.topic_progress import TopicProgress
 
 logger = get_logger("visual_generation", "INFO")
 
 
-CLOUD_FRONT_DOMAIN = "https://d2xd0f87o85q75.cloudfront.net"
-S3_PREFIX = "https://kira-school-content.s3.amazonaws.com"
-
 async def visual_generation():
     """
     Process one Topic in PROMPTS_GENERATED state:
       - find Questions with image_prompt set and image_url empty
       - generate 1 image per question via Gemini
-      - upload PNG bytes to S3
+      - resize/re-encode into full PNG + WebP variants, upload them to S3 in parallel
       - write image_url back, flip Topic to VISUALS_GENERATED if any were created
     """
-    s3_service = S3Service()
+    s3_service = get_s3_service()
     client = genai.Client(api_key=settings.GOOGLE_API_KEY)
     model_name = "gemini-2.5-flash-image"
+    progress = None
 
     try:
         # Step 1: Get topic and questions data, release connection quickly
@@ -50,6 +49,7 @@ async def visual_generation():
             topic_name = topic.topic_name
             school_id = topic.school_id
             week_number = topic.week_number
+            trace_context = topic.trace_context
             
             logger.info(f"Processing topic {topic_id}: '{topic_name}' (School: {school_id})")
             
@@ -80,6 +80,7 @@ async def visual_generation():
                 topic_obj = await db.get(Topic, topic_id)
                 topic_obj.state = "VISUALS_GENERATED"
                 await db.commit()
+                TopicProgress(school_id, topic_id, "visuals", total=0).finish("VISUALS_GENERATED", record_duration=False)
                 return
             
             # Store question data
@@ -106,6 +107,8 @@ async def visual_generation():
         
         # Step 2: Generate images (expensive operation, no DB connection)
         generated_images = []
+        progress = TopicProgress(school_id, topic_id, "visuals", total=len(questions_data), trace_context=trace_context)
+        progress.start()
         
         for i, q_data in enumerate(questions_data, 1):
             max_retries = 3
@@ -125,21 +128,22 @@ async def visual_generation():
                     logger.info(f"Generating image {i}/{len(questions_data)} for question {q_data['question_id']} (attempt {retry_count}/{max_retries})")
                     
                     # Generate image with Gemini
-                    response = client.models.generate_content(
-                        model=model_name,
-                        contents=full_prompt,
-                        config=types.GenerateContentConfig(response_modalities=['TEXT', 'IMAGE'])
-                    )
+                    with track_external("gemini", "generate_content"):
+                        response = client.models.generate_content(
+                            model=model_name,
+                            contents=full_prompt,
+                            config=types.GenerateContentConfig(response_modalities=['TEXT', 'IMAGE'])
+                        )
                     
                     # Extract image
-                    image_obj = None
+                    image_bytes = None
                     if response.candidates and len(response.candidates) > 0 and response.candidates[0].content:
                         for part in response.candidates[0].content.parts:
                             if part.inline_data is not None and part.inline_data.data:
-                                image_obj = Image.open(io.BytesIO(part.inline_data.data))
+                                image_bytes = part.inline_data.data
                                 break
                     
-                    if not image_obj:
+                    if not image_bytes:
                         logger.warning(f"No image generated for question {q_data['question_id']} (attempt {retry_count}/{max_retries})")
                         if retry_count < max_retries:
                             await asyncio.sleep(2)
@@ -147,14 +151,11 @@ async def visual_generation():
                         else:
                             break
                     
-                    # Convert to PNG bytes
-                    buf = io.BytesIO()
-                    image_obj.save(buf, format="PNG")
-                    buf.seek(0)
-                    png_bytes = buf.getvalue()
+                    # Resize and re-encode in the process pool (full PNG + WebP variants)
+                    variants = await build_variants_async(image_bytes)
                     
                     # Validate image bytes
-                    if not png_bytes or len(png_bytes) == 0:
+                    if not variants["full"][0]:
                         logger.warning(f"Generated image is empty for question {q_data['question_id']} (attempt {retry_count}/{max_retries})")
                         if retry_count < max_retries:
                             await asyncio.sleep(2)
@@ -162,18 +163,23 @@ async def visual_generation():
                         else:
                             break
                     
-                    # Upload to S3
-                    filename = f"t{topic_id}/q{q_data['question_id']}.png"
-                    s3_url = s3_service.upload_file_to_s3(
-                        file_content=png_bytes,
-                        school_id=str(school_id),
-                        filename=filename,
-                        week_number=week_number,
-                        content_type='image/png',
-                        folder_prefix='visuals'
-                    )
+                    # Upload all variants to S3 in parallel
+                    base_filename = f"t{topic_id}/q{q_data['question_id']}"
+                    variant_names = list(variants.keys())
+                    upload_results = await asyncio.gather(*[
+                        s3_service.upload_file_to_s3_async(
+                            file_content=variants[name][0],
+                            school_id=str(school_id),
+                            filename=variant_filename(base_filename, name, variants[name][2]),
+                            week_number=week_number,
+                            content_type=variants[name][1],
+                            folder_prefix='visuals'
+                        )
+                        for name in variant_names
+                    ])
+                    variant_urls = dict(zip(variant_names, upload_results))
                     
-                    if not s3_url:
+                    if not all(variant_urls.values()):
                         logger.error(f"S3 upload failed for question {q_data['question_id']} (attempt {retry_count}/{max_retries})")
                         if retry_count < max_retries:
                             await asyncio.sleep(2)
@@ -184,8 +190,10 @@ async def visual_generation():
                     # Success!
                     generated_images.append({
                         "question_id": q_data["question_id"],
-                        "image_url": s3_url,  
-                        "cloud_front_url": s3_url.replace(S3_PREFIX, CLOUD_FRONT_DOMAIN)
+                        "image_url": variant_urls["full"],  
+                        "cloud_front_url": to_cloud_front_url(variant_urls["full"]),
+                        "thumbnail_url": variant_urls.get("thumbnail"),
+                        "mobile_url": variant_urls.get("mobile")
                     })
                     image_generated = True
                     logger.info(f"Successfully processed question {q_data['question_id']} on attempt {retry_count}")
@@ -196,6 +204,8 @@ async def visual_generation():
                         await asyncio.sleep(2)
                     else:
                         break
+
+            progress.advance(failed=not image_generated)
         
         # Step 3: Write results back to DB with NEW connection
         if generated_images:
@@ -206,6 +216,8 @@ async def visual_generation():
                     if question:
                         question.image_url = img_data["image_url"]
                         question.cloud_front_url = img_data["cloud_front_url"]
+                        question.thumbnail_url = img_data["thumbnail_url"]
+                        question.mobile_url = img_data["mobile_url"]
                         db.add(question)
                 
                 # Update topic state
@@ -217,9 +229,13 @@ async def visual_generation():
             # CONNECTION RELEASED HERE
             
             logger.info(f"Topic {topic_id} completed - marked as VISUALS_GENERATED with {len(generated_images)} images")
+            progress.finish("VISUALS_GENERATED")
         else:
             logger.warning(f"No images were successfully generated for topic {topic_id}")
+            progress.fail("No images were generated, the stage will be retried")
             
     except Exception as e:
         logger.error(f"Error in visual_generation task: {e}")
+        if progress is not None:
+            progress.fail(e)
         raise
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, File, UploadFile, Form
+from fastapi import APIRouter, Depends, HTTPException, status, Query, File, UploadFile, Form, Request
 from sqlalchemy.orm import Session
 from sqlalchemy.orm import aliased
 from sqlalchemy.sql import label, literal_column
@@ -14,12 +14,19 @@ from app.model.quizzes import Quiz
 from app.model.chats import ChatSession
 from app.model.attempts import Attempt
 from app.model.users import User
+from app.model.quiz_user_scores import QuizUserScore
+from app.model.school_daily_activity import SchoolDailyActivity
 from app.model.reference_counts import *
 from app.router.dependencies import *
 from typing import List, Annotated
 from datetime import datetime
 from app.model.points import Points
-from sqlalchemy import func, cast, Date, union_all, select, Float, null, text
+from app.router import leaderboard
+from sqlalchemy import func, cast, Date, union_all, select, Float, null, text, insert
+from sqlalchemy.exc import IntegrityError
+from pydantic import ValidationError
+import csv
+import io
 import hashlib
 import boto3
 from typing import Optional
@@ -29,16 +36,25 @@ from app.router.aws_ses import *
 import fitz 
 from app.schema.user_schema import Question as QuestionSchema, ReviewQuestions
 from app.router.s3_signer import presign_get
+from app.router.image_variants import build_variants_async
+from app.router.cache import cached_response
+from app.router.exports import EXPORT_DATASETS, EXPORT_FORMATS, stream_csv, stream_parquet, parquet_available
+from app.celery_app import celery_app
+from fastapi.responses import StreamingResponse
+from app.router.events import event_stream, school_channel
+from app.router.topic_progress import current_progress
+from app.tracing import current_traceparent
 from datetime import datetime, timedelta
 import random
 from app.router.aws_s3 import *
 import os
 import tempfile
 import shutil
+import asyncio
 #test
 
 router = APIRouter()
-s3_service = S3Service()
+s3_service = get_s3_service()
 
 @router.get("/student/{username}", response_model=dict, status_code=status.HTTP_200_OK)
 async def get_detail_student_info(
@@ -187,9 +203,131 @@ async def create_student(student: StudentCreate,
     db.add(new_points)
     db.commit()
     db.refresh(new_student)
+    leaderboard.set_member(new_student.user_id, new_student.school_id, new_student.grade, 0)
     
     return {"message": "Student created successfully", "user_id": new_student.user_id}
 
+MAX_BULK_STUDENTS = 1000
+STUDENT_CSV_COLUMNS = ["username", "password", "first_name", "last_name", "grade"]
+
+async def _bulk_create_students(db: Session, admin: User, rows: List[tuple]) -> dict:
+    """
+    Create many students in one transaction.
+
+    Args:
+        rows: (row number, StudentCreate or error message) for every input row
+
+    Returns:
+        dict with created / failed counts and one result per input row
+    """
+    results = {}
+    valid = []
+    seen = set()
+    for row_number, student in rows:
+        if isinstance(student, str):
+            results[row_number] = {"row": row_number, "status": "error", "detail": student}
+        elif student.username in seen:
+            results[row_number] = {"row": row_number, "username": student.username, "status": "error", "detail": "Duplicate username in upload"}
+        else:
+            seen.add(student.username)
+            valid.append((row_number, student))
+
+    # bcrypt takes seconds for a few hundred rows: end the read get_current_admin
+    # left open and hash before any query, so no pooled connection idles in a transaction
+    db.commit()
+    hashes = dict(zip(
+        (row_number for row_number, _ in valid),
+        await hash_passwords([st.password for _, st in valid]),
+    ))
+
+    # one query for every username that is already taken
+    if valid:
+        taken = {
+            r[0] for r in db.query(User.username).filter(User.username.in_([st.username for _, st in valid])).all()
+        }
+        for row_number, student in valid:
+            if student.username in taken:
+                results[row_number] = {"row": row_number, "username": student.username, "status": "error", "detail": "Username already exists"}
+        valid = [(n, st) for n, st in valid if st.username not in taken]
+
+    if valid:
+        user_ids = generate_unique_user_ids(db, len(valid))
+        now = datetime.now()
+
+        db.execute(insert(User), [
+            {
+                "user_id": user_id,
+                "username": st.username,
+                "hashed_password": hashes[row_number],
+                "first_name": st.first_name,
+                "last_name": st.last_name,
+                "school_id": admin.school_id,
+                "grade": st.grade,
+                "created_at": now,
+            }
+            for (row_number, st), user_id in zip(valid, user_ids)
+        ])
+        db.execute(insert(Points), [{"user_id": user_id, "points": 0} for user_id in user_ids])
+        try:
+            db.commit()
+        except IntegrityError:
+            # a username was taken by a concurrent request after our check
+            db.rollback()
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Usernames changed during upload, please retry")
+
+        for (row_number, st), user_id in zip(valid, user_ids):
+            results[row_number] = {"row": row_number, "username": st.username, "status": "created", "user_id": user_id}
+        leaderboard.set_members([(user_id, admin.school_id, st.grade, 0) for (_, st), user_id in zip(valid, user_ids)])
+
+    ordered = [results[row_number] for row_number, _ in rows]
+    created = sum(1 for r in ordered if r["status"] == "created")
+    return {"created": created, "failed": len(ordered) - created, "results": ordered}
+
+@router.post("/students/bulk", response_model=dict, status_code=status.HTTP_201_CREATED)
+async def bulk_create_students(request: StudentBulkCreate,
+                               db: Session = Depends(get_db),
+                               admin: User = Depends(get_current_admin)):
+    """Create up to MAX_BULK_STUDENTS students at once; rows that fail are reported and skipped."""
+    if len(request.students) > MAX_BULK_STUDENTS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"At most {MAX_BULK_STUDENTS} students per request")
+
+    rows = [(i + 1, student) for i, student in enumerate(request.students)]
+    return await _bulk_create_students(db, admin, rows)
+
+@router.post("/students/bulk-csv", response_model=dict, status_code=status.HTTP_201_CREATED)
+async def bulk_create_students_csv(file: UploadFile = File(...),
+                                   db: Session = Depends(get_db),
+                                   admin: User = Depends(get_current_admin)):
+    """
+    Same as /students/bulk from a CSV upload with the header
+    username,password,first_name,last_name,grade. Row numbers in the result count data rows from 1.
+    """
+    try:
+        text_content = (await file.read()).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="CSV must be UTF-8 encoded")
+
+    reader = csv.DictReader(io.StringIO(text_content))
+    missing = [c for c in STUDENT_CSV_COLUMNS if c not in (reader.fieldnames or [])]
+    if missing:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Missing CSV columns: {', '.join(missing)}")
+
+    rows = []
+    for i, record in enumerate(reader):
+        if i >= MAX_BULK_STUDENTS:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"At most {MAX_BULK_STUDENTS} students per request")
+        values = {c: (record.get(c) or "").strip() for c in STUDENT_CSV_COLUMNS}
+        empty = [c for c, v in values.items() if not v]
+        if empty:
+            rows.append((i + 1, f"Missing value for {', '.join(empty)}"))
+            continue
+        try:
+            rows.append((i + 1, StudentCreate(**values)))
+        except ValidationError as e:
+            rows.append((i + 1, str(e)))
+
+    return await _bulk_create_students(db, admin, rows)
+
 @router.get("/students", response_model=dict, status_code=status.HTTP_200_OK)
 async def get_students(db: Session = Depends(get_db), admin: User = Depends(get_current_admin)): 
     """_summary_: 
@@ -290,10 +428,14 @@ async def update_student_info(
         student.username = student_update.new_username
     if student_update.school is not None:
         student.school = student_update.school
+    old_grade = student.grade
     if student_update.grade is not None:
         student.grade = student_update.grade
     
     db.commit()
+    if student.grade != old_grade and not student.deactivated:
+        points = student.points.points if student.points else 0
+        leaderboard.move_grade(student.user_id, student.school_id, old_grade, student.grade, points)
     return {"message": "Student information updated successfully"}
 
 @router.patch("/deactivate_student", response_model=dict, status_code=status.HTTP_200_OK)
@@ -336,6 +478,7 @@ async def deactivate_student(
     
     student.deactivated = True
     db.commit()
+    leaderboard.remove_member(student.user_id, student.school_id, student.grade)
     return {"message": "Student deactivated successfully"}
 
 @router.patch("/reactivate-student", response_model=dict, status_code=status.HTTP_200_OK)
@@ -378,6 +521,7 @@ async def reactivate_student(
     
     student.deactivated = False
     db.commit()
+    leaderboard.set_member(student.user_id, student.school_id, student.grade, student.points.points if student.points else 0)
     return {"message": "Student reactivated successfully"}
 
 @router.get("/contents", response_model=TopicsOut, status_code=status.HTTP_200_OK)
@@ -409,6 +553,25 @@ async def get_all_content(
    for t in topics ]
    return TopicsOut(topics=res)
 
+@router.get("/contents/events", status_code=status.HTTP_200_OK)
+async def get_content_events(request: Request, admin: User = Depends(get_current_admin)):
+    """
+    Server-sent events with the content pipeline's progress for the admin's school,
+    replacing polling of /contents.
+
+    Starts with the latest "topic_progress" event of every topic still in the
+    pipeline, then streams new ones: {topic_id, stage (prompts | visuals | review),
+    status (started | progress | done | error), done, total, errors, elapsed_seconds,
+    eta_seconds, state (on done), error (on error)}. eta_seconds covers the rest of
+    the pipeline and is derived from the measured duration of recent runs.
+    """
+    initial = [("topic_progress", p) for p in current_progress(admin.school_id)]
+    return StreamingResponse(
+        event_stream(request, school_channel(admin.school_id), initial),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.get("/hash-values", response_model=List, status_code=status.HTTP_200_OK)
 async def get_all_hash(
     db: Session = Depends(get_db), 
@@ -458,13 +621,14 @@ async def increase_count(
         state = "READY_FOR_GENERATION", 
         hash_value = hash_value, 
         week_number = week_number, 
-        school_id = admin.school_id
+        school_id = admin.school_id,
+        trace_context = current_traceparent()
     )
 
     db.add(new_topic)
+    send_upload_notification(admin.email, "", db=db)
     db.commit()
     db.refresh(new_topic)
-    send_upload_notification(admin.email, "")
     return {
         "message": f"File has been successfully uploaded."
     }
@@ -508,16 +672,15 @@ async def content_upload_chunk(
                 chunk_file = os.path.join(upload_dir, f"chunk_{i}")
                 with open(chunk_file, "rb") as cf:
                     assembled.write(cf.read())
-        with open(assembled_path, "rb") as f:
-            file_content = f.read()
         try:
-            s3_url = s3_service.upload_file_to_s3(
-                file_content=file_content,
-                school_id=admin.school_id,
-                filename=filename,
-                week_number=week_number,
-                folder_prefix='content'
-            )
+            with open(assembled_path, "rb") as f:
+                s3_url = await s3_service.upload_fileobj_to_s3_async(
+                    fileobj=f,
+                    school_id=admin.school_id,
+                    filename=filename,
+                    week_number=week_number,
+                    folder_prefix='content'
+                )
             if not s3_url:
                 shutil.rmtree(upload_dir, ignore_errors=True)
                 return {
@@ -540,7 +703,8 @@ async def content_upload_chunk(
             hash_value=hash_value,
             week_number=week_number,
             school_id=admin.school_id,
-            summary=""
+            summary="",
+            trace_context=current_traceparent()
         )
         new_reference_count = ReferenceCount(
             hash_value=hash_value,
@@ -549,11 +713,11 @@ async def content_upload_chunk(
         )
         db.add(new_reference_count)
         db.add(new_topic)
+        send_upload_notification(admin.email, filename, db=db)
         db.commit()
         db.refresh(new_topic)
         db.refresh(new_reference_count)
 
-        send_upload_notification(admin.email, filename)
         shutil.rmtree(upload_dir, ignore_errors=True)
         return {
             "message": f"File {filename} has been successfully uploaded."
@@ -570,7 +734,8 @@ async def decrease_count(
     db: Session = Depends(get_db), 
     admin: User = Depends(get_current_admin)
 ):
-    """Decrease reference count for a topic and optionally delete S3 file if no longer referenced
+    """Decrease reference count for a topic and optionally delete S3 file if no longer referenced.
+    The topic's generated question images are always removed.
 
     Args:
         topic_id (int): The ID of the topic to delete
@@ -583,19 +748,35 @@ async def decrease_count(
     Raises:
         HTTPException: If topic not found or deletion fails
     """
-    selected_topic = db.query(Topic).filter(Topic.topic_id == topic_id).first()
+    selected_topic = db.query(Topic).filter(
+        Topic.topic_id == topic_id,
+        Topic.school_id == admin.school_id
+    ).first()
+    if not selected_topic:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Topic not found")
 
     s3_url = selected_topic.s3_bucket_url
     referred_entry = db.query(ReferenceCount).filter(ReferenceCount.referred_s3_url == s3_url).first()
-    referred_entry.count -= 1
 
-    s3_service = S3Service()
-    if referred_entry.count == 0: # delete the entry and delete it in S3
-        s3_service.delete_file_by_url(referred_entry.referred_s3_url) 
-        db.delete(referred_entry)
+    keys_to_delete = []
+    if referred_entry:
+        referred_entry.count -= 1
+        if referred_entry.count <= 0: # delete the entry and delete it in S3
+            keys_to_delete.append(s3_service._extract_key_from_url(referred_entry.referred_s3_url))
+            db.delete(referred_entry)
+
+    visuals_prefix = s3_service.topic_visuals_prefix(
+        selected_topic.school_id, selected_topic.week_number, selected_topic.topic_id
+    )
+
     # delete the topic 
     db.delete(selected_topic)
     db.commit()
+
+    # only once the rows are gone: an orphaned object is harmless, a row pointing at a
+    # deleted one is not. The PDF (if unreferenced) and every image under the topic's
+    # visuals prefix go in one batch
+    await s3_service.delete_files_async(keys_to_delete, prefix=visuals_prefix)
     return {"message": "The content has been deleted."}
     
     
@@ -622,12 +803,11 @@ async def content_upload(
         _type_: _description_
     """
     school_id = admin.school_id
-    contents = await file.read() 
-    # stage 2: upload the file to S3
+    # stage 2: stream the spooled upload to S3
     s3_url = None
     try:
-        s3_url = s3_service.upload_file_to_s3(
-            file_content=contents,
+        s3_url = await s3_service.upload_fileobj_to_s3_async(
+            fileobj=file.file,
             school_id=school_id,
             filename=file.filename,
             week_number=week_number,
@@ -655,7 +835,8 @@ async def content_upload(
         hash_value = hash_value, 
         week_number = week_number, 
         school_id = school_id, 
-        summary = ""
+        summary = "",
+        trace_context = current_traceparent()
     )
     
     new_reference_count = ReferenceCount(
@@ -665,13 +846,11 @@ async def content_upload(
     )
     db.add(new_reference_count)
     db.add(new_topic)
+    send_upload_notification(admin.email, file.filename, db=db)
     db.commit()
     db.refresh(new_topic)
     db.refresh(new_reference_count)
 
-    admin_email = admin.email
-    send_upload_notification(admin_email, file.filename)
-
     return {
         "message": f"File {file.filename} has been successfully uploaded."
     }
@@ -742,15 +921,35 @@ async def approve_topic(
             _type_: _description_
 
     '''
-    query_result= db.query(QuestionModel).where(QuestionModel.topic_id == topic_id).with_for_update()
-    questions_list = query_result.all()
+    # Lock the topic first so two admins can't publish it at the same time.
+    topic = (
+        db.query(Topic)
+        .filter(Topic.topic_id == topic_id, Topic.school_id == user.school_id)
+        .with_for_update()
+        .first()
+    )
+    if topic is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, 
+            detail="topic id not found"
+            )
+    if topic.state == "DONE":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="topic has already been approved"
+        )
 
-    if  len(questions_list) == 0: 
+    questions_by_id = {
+        q.question_id: q
+        for q in db.query(QuestionModel).where(QuestionModel.topic_id == topic_id).with_for_update().all()
+    }
+
+    if  len(questions_by_id) == 0: 
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
             detail="topic id not found"
             )
-    if len(questions_list) != len(approved_questions.questions):
+    if len(questions_by_id) != len(approved_questions.questions):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="approved questions do not match topic ID"
@@ -760,46 +959,45 @@ async def approve_topic(
     
     # Only update changed and changeable fields
     for approved_question in approved_questions.questions:
-        for question in questions_list:
-            if question.question_id == approved_question.question_id:
-                question_id_list.append(question.question_id)
-                if question.answer != approved_question.answer:
-                    question.answer = approved_question.answer
-                if question.content != approved_question.content:
-                    question.content = approved_question.content
-                if question.options != approved_question.options:
-                    question.options = approved_question.options
-    # Commit changed 
-    db.commit()
-
-    # Create 3 random ordered questions for 3 quizes.
+        question = questions_by_id.get(approved_question.question_id)
+        if question is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"question {approved_question.question_id} does not belong to topic {topic_id}"
+            )
+        question_id_list.append(question.question_id)
+        if question.answer != approved_question.answer:
+            question.answer = approved_question.answer
+        if question.content != approved_question.content:
+            question.content = approved_question.content
+        if question.options != approved_question.options:
+            question.options = approved_question.options
+
+    # Create 3 random ordered questions for 3 quizes, in one multi-row INSERT.
+    now = datetime.now()
+    quiz_rows = []
     for i in range(3) :
         randomized_questions = question_id_list[:]
         random.shuffle(randomized_questions)
-        new_quiz = Quiz(
-            name = f"Quiz {i + 1} - {approved_questions.quiz_name}",
-            description = approved_questions.quiz_description, 
-            school_id = user.school_id,
-            creator_id = user.user_id, 
-            questions = randomized_questions,
-            topic_id = topic_id, 
-            expired_at = datetime.now() + timedelta(days=7), 
-            created_at = datetime.now(),
-            is_locked = False, 
-        )
+        quiz_rows.append({
+            "name": f"Quiz {i + 1} - {approved_questions.quiz_name}",
+            "description": approved_questions.quiz_description, 
+            "school_id": user.school_id,
+            "creator_id": user.user_id, 
+            "questions": randomized_questions,
+            "topic_id": topic_id, 
+            "expired_at": now + timedelta(days=7), 
+            "created_at": now,
+            "is_locked": False, 
+        })
+    quiz_ids = db.execute(insert(Quiz).returning(Quiz.quiz_id), quiz_rows).scalars().all()
 
-        # Add the new quiz, commit and insert automated fields.
-        db.add(new_quiz)
-        db.commit()
-        db.refresh(new_quiz)
-    
-    # After completion, change the status of the topic to DONE. 
-    topic_query = db.query(Topic).where(Topic.topic_id == topic_id).limit(1).with_for_update().all()
-    topic_query[0].state = "DONE"
+    # Question edits, quizzes, topic state and the notification are committed together.
+    topic.state = "DONE"
+    send_quiz_published(user.email, db=db)
     db.commit()
-    send_quiz_published(user.email)
 
-    return {"message" : f"Topic id {topic_id} has been approved"}
+    return {"message" : f"Topic id {topic_id} has been approved", "quiz_ids": quiz_ids}
 
 @router.post("/replace-img/{question_id}", status_code=status.HTTP_200_OK)
 async def replace_question_image(
@@ -841,16 +1039,39 @@ async def replace_question_image(
                 detail="Invalid S3 URL format in database"
             )
             
-        # Upload new file with same key (this will replace the existing file)
-        s3_service.s3_client.put_object(
-            Bucket=s3_service.bucket_name,
-            Key=s3_key,
-            Body=file_content,
-            ContentType=file.content_type
-        )
+        # Decode and re-encode the resized variants before touching S3, so a file that
+        # isn't an image never replaces the live one
+        try:
+            variants = await build_variants_async(file_content)
+        except (OSError, ValueError):
+            # PIL raises these for unknown or truncated image data
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The uploaded file is not a valid image"
+            )
+
+        # Upload the new file with the same key (replacing the existing one) and refresh the
+        # variants so students don't keep seeing the old image
+        variant_urls = {"thumbnail": question.thumbnail_url, "mobile": question.mobile_url}
+        uploads = [(question.image_url, file_content, file.content_type)] + [
+            (variant_url, variants[name][0], variants[name][1])
+            for name, variant_url in variant_urls.items()
+            if variant_url
+        ]
+        results = await asyncio.gather(*[
+            s3_service.replace_file_by_url_async(url, content, content_type)
+            for url, content, content_type in uploads
+        ])
+        if not all(results):
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Failed to upload the new image to S3"
+            )
         
         return {"message": "Image successfully replaced"}
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -879,65 +1100,31 @@ async def replace_question_image(
 
 @router.get("/quizzes", status_code=status.HTTP_200_OK)
 async def get_total_time(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     admin: User = Depends(get_current_admin)):
     """Get time spent in quizzes/chat sessions for the admin's school."""
 
-    attempts_subq = (
-    select(
-        cast(Attempt.start_at, Date).label("just_date"),
-        (func.extract("epoch", Attempt.end_at - Attempt.start_at)).label("duration_seconds")
-    )
-    .join(Quiz, Quiz.quiz_id == Attempt.quiz_id)
-    .where(
-        Quiz.school_id == admin.school_id,  
-        Attempt.start_at.isnot(None),
-        Attempt.end_at.isnot(None)
-    ))
-
-    chats_subq = (
+    query = (
         select(
-            cast(ChatSession.created_at, Date).label("just_date"),
-            (func.extract("epoch", ChatSession.ended_at - ChatSession.created_at)).label("duration_seconds")
-        ).join(User, User.user_id == ChatSession.user_id)
-        .where(User.school_id == admin.school_id, ChatSession.created_at.isnot(None), ChatSession.ended_at.isnot(None))
+            func.sum(SchoolDailyActivity.quiz_seconds + SchoolDailyActivity.chat_seconds).label("total_seconds")
+        )
+        .where(SchoolDailyActivity.school_id == admin.school_id)
     )
 
-    combined = union_all(attempts_subq, chats_subq)
-
-    query = select(
-        func.sum(combined.selected_columns.duration_seconds).label("total_avg_seconds")
-    )
+    def compute():
+        results = db.execute(query).scalar()
+        return {"total_time_seconds": results or 0}
 
-    results = db.execute(query).scalar()
-    return {"total_time_seconds": results or 0}
+    return cached_response("quizzes", admin.school_id, compute)
 
 @router.get("/mean-scores", status_code=status.HTTP_200_OK)
 async def get_mean_scores(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     admin: User = Depends(get_current_admin)
 ):
     """Compute average quiz score (latest attempt only) per user in admin's school."""
 
-    latest_subq = (
-        select(
-            Attempt.attempt_id,
-            Attempt.quiz_id,
-            Attempt.user_id,
-            Attempt.pass_count,
-            Attempt.fail_count,
-            func.row_number()
-                .over(
-                    partition_by=[Attempt.quiz_id, Attempt.user_id],
-                    order_by=desc(Attempt.attempt_number)
-                )
-                .label("rn")
-        )
-        .join(Quiz, Quiz.quiz_id == Attempt.quiz_id)
-        .where(Quiz.school_id == admin.school_id)
-        .subquery()
-    )
-
+    # quiz_user_scores only holds the latest attempt per (quiz, user)
     query = (
         select(
             User.user_id,
@@ -945,66 +1132,50 @@ async def get_mean_scores(
             User.username,
             func.avg(
                 cast(
-                    (latest_subq.c.pass_count) / 
-                    func.nullif(latest_subq.c.pass_count + latest_subq.c.fail_count, 0),
+                    (QuizUserScore.pass_count) / 
+                    func.nullif(QuizUserScore.pass_count + QuizUserScore.fail_count, 0),
                     Float
                 )
             ).label("mean_score")
         )
-        .join(User, User.user_id == latest_subq.c.user_id)
-        .where(latest_subq.c.rn == 1)
+        .join(User, User.user_id == QuizUserScore.user_id)
+        .where(QuizUserScore.school_id == admin.school_id)
         .group_by(User.user_id, User.first_name, User.username)
         .order_by(desc("mean_score"))
     )
 
-    results = db.execute(query).fetchall()
+    def compute():
+        results = db.execute(query).fetchall()
+        return [
+            {
+                "user_id": row.user_id,
+                "first_name": row.first_name,
+                "username": row.username,
+                "mean_score": float(row.mean_score) if row.mean_score is not None else 0.0
+            }
+            for row in results
+        ]
 
-    return [
-        {
-            "user_id": row.user_id,
-            "first_name": row.first_name,
-            "username": row.username,
-            "mean_score": float(row.mean_score) if row.mean_score is not None else 0.0
-        }
-        for row in results
-    ]
+    return cached_response("mean-scores", admin.school_id, compute)
 
 @router.get("/quiz-stats", status_code=status.HTTP_200_OK)
 async def get_quiz_statistics(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     admin: User = Depends(get_current_admin)
 ):
-    latest_subq = (
-        select(
-            Attempt.quiz_id,
-            Attempt.user_id,
-            Attempt.pass_count,
-            Attempt.fail_count,
-            func.row_number()
-                .over(
-                    partition_by=[Attempt.quiz_id, Attempt.user_id],
-                    order_by=desc(Attempt.attempt_number)
-                )
-                .label("rn")
-        )
-        .join(Quiz, Quiz.quiz_id == Attempt.quiz_id)
-        .where(Quiz.school_id == admin.school_id)
-        .subquery()
-    )
-
     score_expr = cast(
-        latest_subq.c.pass_count /
-        func.nullif(latest_subq.c.pass_count + latest_subq.c.fail_count, 0),
+        QuizUserScore.pass_count /
+        func.nullif(QuizUserScore.pass_count + QuizUserScore.fail_count, 0),
         Float
     )
 
-    completion_expr = func.count(latest_subq.c.user_id).label("completion_count")  # added
-    median_expr = func.percentile_cont(0.5).within_group(score_expr).label("median_score")  # added
+    completion_expr = func.count(QuizUserScore.user_id).label("completion_count")
+    median_expr = func.percentile_cont(0.5).within_group(score_expr).label("median_score")
 
 
     query = (
         select(
-            latest_subq.c.quiz_id,
+            QuizUserScore.quiz_id,
             Quiz.name.label("quiz_name"),
             func.avg(score_expr).label("mean_score"),
             func.min(score_expr).label("min_score"),
@@ -1014,33 +1185,35 @@ async def get_quiz_statistics(
             completion_expr,
             func.array_agg(score_expr).label("scores")
         )
-        .join(Quiz, Quiz.quiz_id == latest_subq.c.quiz_id)
-        .where(latest_subq.c.rn == 1)
-        .group_by(latest_subq.c.quiz_id, Quiz.name, Quiz.created_at)
+        .join(Quiz, Quiz.quiz_id == QuizUserScore.quiz_id)
+        .where(QuizUserScore.school_id == admin.school_id)
+        .group_by(QuizUserScore.quiz_id, Quiz.name, Quiz.created_at)
         .order_by(Quiz.created_at.asc())
     )
 
-    results = db.execute(query).fetchall()
+    def compute():
+        results = db.execute(query).fetchall()
+        return [
+            {
+                "quiz_id": row.quiz_id,
+                "quiz_name": row.quiz_name,
+                "mean_score": float(row.mean_score) if row.mean_score is not None else 0.0,
+                "min_score": float(row.min_score) if row.min_score is not None else 0.0,
+                "max_score": float(row.max_score) if row.max_score is not None else 0.0,
+                "median_score": float(row.median_score) if row.median_score is not None else 0.0, 
+                "completion": int(row.completion_count) if hasattr(row, "completion_count") else 0,
+                "stddev_score": float(row.stddev_score) if row.stddev_score is not None else 0.0,
+                "scores": [float(s) for s in (row.scores or [])],
 
-    return [
-        {
-            "quiz_id": row.quiz_id,
-            "quiz_name": row.quiz_name,
-            "mean_score": float(row.mean_score) if row.mean_score is not None else 0.0,
-            "min_score": float(row.min_score) if row.min_score is not None else 0.0,
-            "max_score": float(row.max_score) if row.max_score is not None else 0.0,
-            "median_score": float(row.median_score) if row.median_score is not None else 0.0, 
-            "completion": int(row.completion_count) if hasattr(row, "completion_count") else 0,
-            "stddev_score": float(row.stddev_score) if row.stddev_score is not None else 0.0,
-            "scores": [float(s) for s in (row.scores or [])],
+            }
+            for row in results
+        ]
 
-        }
-        for row in results
-    ]
+    return cached_response("quiz-stats", admin.school_id, compute)
 
 @router.get("/time-stats", status_code=status.HTTP_200_OK)
 async def get_time_stats(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     admin: User = Depends(get_current_admin)
 ):
     """
@@ -1049,29 +1222,89 @@ async def get_time_stats(
     - avg_minutes_per_student: average engagement time per student
     """
 
-    result = (
-        db.query(
-            func.sum(Analytics.engagement_time_ms).label("total_ms"),
-            func.count(Analytics.user_id).label("student_count"),
+    def compute():
+        result = (
+            db.query(
+                func.sum(Analytics.engagement_time_ms).label("total_ms"),
+                func.count(Analytics.user_id).label("student_count"),
+            )
+            .join(User, User.user_id == Analytics.user_id)
+            .filter(User.school_id == admin.school_id)
+            .one()
         )
-        .join(User, User.user_id == Analytics.user_id)
-        .filter(User.school_id == admin.school_id)
-        .one()
-    )
 
-    total_ms, student_count = result
+        total_ms, student_count = result
+
+        if not total_ms or not student_count:
+            return {
+                "total_minutes": 0.0,
+                "avg_minutes_per_student": 0.0,
+            }
+
+        total_minutes = total_ms / 1000 / 60
+        avg_minutes_per_student = total_minutes / student_count
 
-    if not total_ms or not student_count:
         return {
-            "total_minutes": 0.0,
-            "avg_minutes_per_student": 0.0,
+            "total_minutes": round(total_minutes, 2),
+            "avg_minutes_per_student": round(avg_minutes_per_student, 2),
         }
 
-    total_minutes = total_ms / 1000 / 60
-    avg_minutes_per_student = total_minutes / student_count
+    return cached_response("time-stats", admin.school_id, compute)
 
-    return {
-        "total_minutes": round(total_minutes, 2),
-        "avg_minutes_per_student": round(avg_minutes_per_student, 2),
-    }
+@router.get("/export", status_code=status.HTTP_200_OK)
+async def export_school_data(
+    dataset: str = Query("attempts", pattern="^(attempts|students)$"),
+    format: str = Query("csv", pattern="^(csv|parquet)$"),
+    admin: User = Depends(get_current_admin)
+):
+    """
+    Stream a full export of the admin's school.
+
+    Args:
+        dataset: "attempts" (one row per quiz attempt) or "students" (one row per student
+            with points, streak, mean score, chat usage and engagement time)
+        format: "csv" or "parquet"
+    """
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Parquet export is not available on this server")
+
+    media_type, extension = EXPORT_FORMATS[format]
+    body = stream_parquet(dataset, admin.school_id) if format == "parquet" else stream_csv(dataset, admin.school_id)
+    filename = f"{admin.school_id}_{dataset}_{datetime.now().strftime('%Y%m%d')}.{extension}"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.post("/export-jobs", response_model=dict, status_code=status.HTTP_202_ACCEPTED)
+async def create_export_job(
+    dataset: str = Query("attempts", pattern="^(attempts|students)$"),
+    format: str = Query("csv", pattern="^(csv|parquet)$"),
+    admin: User = Depends(get_current_admin)
+):
+    """Build the export in the background and deliver it through S3; poll /export-jobs/{job_id} for the link."""
+    job = celery_app.send_task("app.tasks.export_school_data", args=[dataset, format, admin.school_id])
+    return {"job_id": job.id}
+
+@router.get("/export-jobs/{job_id}", response_model=dict, status_code=status.HTTP_200_OK)
+async def get_export_job(job_id: str, admin: User = Depends(get_current_admin)):
+    job = celery_app.AsyncResult(job_id)
+
+    if job.state == "SUCCESS":
+        result = job.result or {}
+        if result.get("school_id") != admin.school_id:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Export job not found")
+        return {
+            "job_id": job_id,
+            "status": job.state,
+            "filename": result.get("filename"),
+            "size": result.get("size"),
+            "download_url": presign_get(result.get("s3_url"), expires_in=3600),
+        }
+
+    if job.state == "FAILURE":
+        return {"job_id": job_id, "status": job.state, "detail": "Export failed"}
 
+    return {"job_id": job_id, "status": job.state}
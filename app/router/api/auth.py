@@ -328,11 +328,10 @@ async def request_reset_password(request_body: ResetPasswordRequest,
             )
             db.add(reset_code_entry)
         
+        # queue the reset password email to the admin in the same transaction as the code
+        send_admin_verification_email(user.email, "forgot-password/reset", code, user.first_name, db=db)
         db.commit()
         
-        # send the reset password email to the admin
-        send_admin_verification_email(user.email, "forgot-password/reset", code, user.first_name)
-        
         return {"message": f"Reset password email sent to {user.email}"}
     
     else: # Student is trying to reset password
@@ -346,7 +345,8 @@ async def request_reset_password(request_body: ResetPasswordRequest,
         for email in admin_emails: 
             print(email)
             send_reset_request_to_admin("login", email,
-                                    student.username, student.school_id, student.first_name)
+                                    student.username, student.school_id, student.first_name, db=db)
+        db.commit()
         
         return {"message": f"Reset password email sent"}
         
@@ -439,8 +439,8 @@ async def resend_verification_code(request: ResendVerificationEmail,
             )
             db.add(verification_code)
         
+        send_admin_verification_email(request.email, "register-admin", code, temp_admin.first_name, db=db)
         db.commit()
-        send_admin_verification_email(request.email, "register-admin", code, temp_admin.first_name)
         return {"message": f"Registration verification code resent to {request.email}"}
     
     # Second check: Is this for password reset? (existing admin user)
@@ -466,8 +466,8 @@ async def resend_verification_code(request: ResendVerificationEmail,
             )
             db.add(verification_code)
         
+        send_admin_verification_email(request.email, "forgot-password/reset", code, user.first_name, db=db)
         db.commit()
-        send_admin_verification_email(request.email, "forgot-password/reset", code, user.first_name)
         return {"message": f"Password reset verification code resent to {request.email}"}
     
     # Email not found in either scenario
@@ -19,6 +19,7 @@ from app.schema.super_admin_schema import NewSchool, UpdateSchool
 from app.model.schools import SchoolStatus
 import random
 from app.model.chats import ChatSession, ChatMessage
+from app.router.cache import get_cache_stats
 
 router = APIRouter()
 
@@ -77,14 +78,13 @@ async def invite(
         created_at = datetime.now() 
     )
     db.add(temp_admin)
-    db.commit()
-    db.refresh(temp_admin)
-    
     send_admin_invite_email(temp_admin.email, "signup", code, 
                             temp_admin.user_id,
                             temp_admin.school_id,
                             temp_admin.first_name, 
-                            temp_admin.last_name)
+                            temp_admin.last_name, 
+                            db=db)
+    db.commit()
     return {"message": f"Invitation has been sent to {request.email}"}
 
 @router.post("/deactivate_admin", response_model=dict)
@@ -155,7 +155,7 @@ async def reactivate_admin(request: AdminActivation,
 
 @router.get("/")
 def get_all_users(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     super_admin: User = Depends(get_current_super_admin)
 ):
     users = db.query(User).filter(User.deactivated.is_(False)).all()
@@ -208,7 +208,7 @@ def get_all_users(
 
 @router.get("/schools_with_admins", response_model=SchoolsResponse, status_code=status.HTTP_200_OK)
 async def get_schools_with_admins(
-    db: Session = Depends(get_db), 
+    db: Session = Depends(get_read_db), 
     super_admin: User = Depends(get_current_super_admin)
 ):
     """enchanced fetch schools with admins
@@ -328,7 +328,7 @@ async def delete_school(school_id: str, db:Session = Depends(get_db), user: User
     }
 
 @router.get('/inactiveschools')
-async def get_inactive_schools(db: Session = Depends(get_db), user: User = Depends(get_current_super_admin)):
+async def get_inactive_schools(db: Session = Depends(get_read_db), user: User = Depends(get_current_super_admin)):
     schools = db.query(School).filter(
         (School.status == SchoolStatus.inactive) | (School.status == SchoolStatus.suspended)
     ).all()
@@ -528,7 +528,7 @@ def get_default_prompts(super_admin: User = Depends(get_current_super_admin)):
 )
 async def get_chat_session_history(
     session_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     super_admin: User = Depends(get_current_super_admin),
 ):
     """
@@ -574,3 +574,9 @@ async def get_chat_session_history(
             for m in messages
         ],
     }
+
+
+@router.get("/cache-stats", response_model=dict, status_code=status.HTTP_200_OK)
+async def cache_stats(user: User = Depends(get_current_super_admin)):
+    """Hit/miss counters of the shared response cache, per endpoint."""
+    return {"stats": get_cache_stats()}
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, status, Request, Header
 from sqlalchemy.orm import Session, joinedload
 from app.database import get_db
 from app.model.users import User
@@ -17,19 +17,31 @@ from app.model.attempts import *
 from app.model.user_achievements import *
 from app.model.achievements import *
 from app.model.schools import School
-from sqlalchemy import func, asc, desc, null
+from sqlalchemy import func, asc, desc, null, or_, select, tuple_
+from typing import List, Optional, Tuple
 from fastapi import BackgroundTasks
 from app.database.db import get_local_session
 from app.database.session import SQLALCHEMY_DATABASE_URL
-from app.router.background.badges_task import check_and_award_badges
-from app.router.background.achievement_task import check_achievement_and_award
+from app.router.background.rewards import schedule_rewards
 from app.router.s3_signer import presign_get
+from app.router.image_variants import to_cloud_front_url
+from app.router.rollups import record_chat_session
+from app.router.quiz_submission import submit_attempt
+from app.router.cache import invalidate_school, invalidate_user, cached_user_response
+from app.router.dependencies import get_cursor_params, get_fields_param, encode_cursor, decode_cursor
+from app.router.http_cache import conditional_json_response
+from app.database.replicas import mark_user_wrote
+from app.router import leaderboard
+from app.router.events import user_event_stream
+from app.metrics import track_external
+from fastapi.responses import StreamingResponse
+import redis
 from datetime import datetime, timedelta
 
 #chatbot
 from app.model.chats import ChatSession, ChatMessage
 from app.model.topics import Topic
-from app.router.aws_s3 import S3Service
+from app.router.aws_s3 import get_s3_service
 from openai import OpenAI
 import io
 from app.config import settings
@@ -40,7 +52,7 @@ import re
 
 router = APIRouter()
 
-s3_service = S3Service()
+s3_service = get_s3_service()
 client = OpenAI(api_key=settings.OPENAI_API_KEY)
 
 # Add request schema for chat start
@@ -54,7 +66,7 @@ class ChatSendRequest(BaseModel):
 
 
 @router.get("/badges/all", response_model=dict, status_code=status.HTTP_200_OK)
-async def get_all_badges(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+async def get_all_badges(db: Session = Depends(get_read_db), user: User = Depends(get_current_user)):
     """Get all the badges information in the database."""
     badges = db.query(Badge).all()
     badge_list = [
@@ -73,7 +85,7 @@ async def get_all_badges(db: Session = Depends(get_db), user: User = Depends(get
     return {"badges": badge_list}
 
 @router.get("/badges", response_model=UserBadgesOut, status_code=status.HTTP_200_OK)
-async def get_a_user_badges(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+async def get_a_user_badges(db: Session = Depends(get_read_db), user: User = Depends(get_current_user)):
     """Get all the badges that a user has earned
 
     Args:
@@ -92,14 +104,24 @@ async def get_a_user_badges(db: Session = Depends(get_db), user: User = Depends(
             description=b.badge.description,
             icon_url=b.badge.icon_url
         ) for b in badges]
-    for b in badges: 
-        b.view_count += 1
+    return UserBadgesOut(badges=earned_badges)
 
+@router.post("/badges/seen", response_model=dict, status_code=status.HTTP_200_OK)
+async def mark_badges_seen(request: MarkBadgesSeen = MarkBadgesSeen(),
+                           db: Session = Depends(get_db), 
+                           user: User = Depends(get_current_user)):
+    """Record that the user has seen their badges (all of them, or only badge_ids) so they stop showing as notifications."""
+    query = db.query(UserBadge).filter(UserBadge.user_id == user.user_id)
+    if request.badge_ids is not None:
+        query = query.filter(UserBadge.badge_id.in_(request.badge_ids))
+    updated = query.update({UserBadge.view_count: UserBadge.view_count + 1}, synchronize_session=False)
     db.commit()
-    return UserBadgesOut(badges=earned_badges)
+    invalidate_user(user.user_id)
+    mark_user_wrote(user.user_id)
+    return {"updated": updated}
 
 @router.get("/badges/notification", response_model=UserBadgesOut, status_code=status.HTTP_200_OK)
-async def get_not_viewed_badges(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+async def get_not_viewed_badges(db: Session = Depends(get_read_db), user: User = Depends(get_current_user)):
     """Get all the badges that a user has not viewed. ONLY used for notification."""
     badges = db.query(UserBadge).join(Badge).filter(UserBadge.user_id == user.user_id, UserBadge.view_count == 0).all()
     earned_badges = [UserBadgeOut(
@@ -112,7 +134,7 @@ async def get_not_viewed_badges(db: Session = Depends(get_db), user: User = Depe
     return UserBadgesOut(badges=earned_badges)
 
 @router.get("/achievements/all", response_model=AchievementsOut, status_code=status.HTTP_200_OK)
-async def get_all_achievements(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+async def get_all_achievements(db: Session = Depends(get_read_db), user: User = Depends(get_current_user)):
     """Get all the achievements information in the database.
 
     Args:
@@ -137,7 +159,7 @@ async def get_all_achievements(db: Session = Depends(get_db), user: User = Depen
     return AchievementsOut(achievements=achievement_list)
 
 @router.get("/achievements", response_model=UserAchievementsOut, status_code=status.HTTP_200_OK)
-async def get_a_user_achievements(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+async def get_a_user_achievements(db: Session = Depends(get_read_db), user: User = Depends(get_current_user)):
     """Get all the achievements that a user has unlocked
 
     Args:
@@ -158,13 +180,24 @@ async def get_a_user_achievements(db: Session = Depends(get_db), user: User = De
         completed_at = a.completed_at, 
         view_count = a.view_count
     ) for a in user_achievement]
-    for a in user_achievement: 
-        a.view_count += 1
-    db.commit()
     return UserAchievementsOut(user_achievements=completed_ach)
 
+@router.post("/achievements/seen", response_model=dict, status_code=status.HTTP_200_OK)
+async def mark_achievements_seen(request: MarkAchievementsSeen = MarkAchievementsSeen(),
+                                 db: Session = Depends(get_db), 
+                                 user: User = Depends(get_current_user)):
+    """Record that the user has seen their achievements (all of them, or only achievement_ids)."""
+    query = db.query(UserAchievement).filter(UserAchievement.user_id == user.user_id)
+    if request.achievement_ids is not None:
+        query = query.filter(UserAchievement.achievement_id.in_(request.achievement_ids))
+    updated = query.update({UserAchievement.view_count: UserAchievement.view_count + 1}, synchronize_session=False)
+    db.commit()
+    invalidate_user(user.user_id)
+    mark_user_wrote(user.user_id)
+    return {"updated": updated}
+
 @router.get("/achievements/notification", response_model=UserAchievementsOut, status_code=status.HTTP_200_OK)
-async def get_not_viewed_achievements(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+async def get_not_viewed_achievements(db: Session = Depends(get_read_db), user: User = Depends(get_current_user)):
     """Get all the achievement that a user has not viewed. ONLY used for notification."""
     ach = db.query(UserAchievement).join(Achievement).filter(UserAchievement.user_id == user.user_id, UserAchievement.view_count == 0).all()
     earned_ach = [SingleUserAchievement(
@@ -224,49 +257,91 @@ async def get_streak(db: Session = Depends(get_db), user: User = Depends(get_cur
     )
     return res
 
+QUIZ_FIELDS = list(Quiz.model_fields)
+
 @router.get("/quizzes", 
             response_model=QuizzesOut, 
             status_code=status.HTTP_200_OK)
-async def get_quizzes(db: Session = Depends(get_db), 
+async def get_quizzes(request: Request,
+                      active: bool = Query(False, description="only quizzes that are unlocked and not expired"),
+                      page: Tuple[Optional[str], Optional[int]] = Depends(get_cursor_params),
+                      fields: Optional[List[str]] = Depends(get_fields_param),
+                      db: Session = Depends(get_read_db), 
                       user: User = Depends(get_current_user)):
-    """return all the quizzes that belongs to the current user's school
+    """return the quizzes that belong to the current user's school, oldest first
 
     Args:
+        active (bool, optional): only unlocked quizzes whose expired_at is in the future. Defaults to False.
+        page (tuple, optional): cursor / limit; without a limit every quiz is returned.
+        fields (list, optional): only return these quiz fields, e.g. ?fields=quiz_id,name
         db (Session, optional): _description_. Defaults to Depends(get_db).
         user (User, optional): _description_. Defaults to Depends(get_current_user).
 
     Returns:
-        _type_: _description_
+        QuizzesOut, or 304 when the client's ETag / Last-Modified is still current
     """
-    temp = db.query(quizzes.Quiz).filter(quizzes.Quiz.school_id == user.school_id).all()
-    res = QuizzesOut(
-        quizzes=[
-            Quiz(
-                quiz_id=q.quiz_id,
-                school_id=q.school_id,
-                creator_id=q.creator_id,
-                name=q.name,
-                questions=q.questions, 
-                description=q.description,
-                created_at=q.created_at,
-                expired_at=q.expired_at,
-                is_locked=q.is_locked
-            )
-            for q in temp
-        ]
+    cursor, limit = page
+    after = decode_cursor(cursor, 1)
+    selected = fields or QUIZ_FIELDS
+    unknown = [f for f in selected if f not in QUIZ_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown fields: {', '.join(unknown)}")
+
+    # only load the columns that are returned (plus the keys needed for paging and Last-Modified)
+    columns = list(dict.fromkeys(["quiz_id", "created_at", *selected]))
+    query = (
+        db.query(*[getattr(quizzes.Quiz, c) for c in columns])
+        .filter(quizzes.Quiz.school_id == user.school_id)
+    )
+    if active:
+        now = datetime.now()
+        query = query.filter(
+            quizzes.Quiz.is_locked.isnot(True),
+            or_(quizzes.Quiz.expired_at.is_(None), quizzes.Quiz.expired_at > now),
+        )
+    if after is not None:
+        query = query.filter(quizzes.Quiz.quiz_id > after[0])
+    query = query.order_by(quizzes.Quiz.quiz_id.asc())
+    if limit is not None:
+        query = query.limit(limit + 1)
+    rows = query.all()
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].quiz_id)
+
+    if fields:
+        items = [{f: getattr(r, f) for f in selected} for r in rows]
+    else:
+        items = [Quiz(**{f: getattr(r, f) for f in QUIZ_FIELDS}) for r in rows]
+
+    # quizzes are never edited after creation, so the newest created_at dates the full list.
+    # A page can change without a newer row in it (next_cursor appears once a quiz is added
+    # after a full page) and the active view changes as quizzes expire, so those only get an ETag
+    last_modified = None
+    if not active and limit is None and rows:
+        last_modified = max((r.created_at for r in rows if r.created_at), default=None)
+
+    return conditional_json_response(
+        request,
+        {"quizzes": items, "next_cursor": next_cursor},
+        last_modified=last_modified,
     )
-    return res
 
 @router.get("/questions/{quiz_id}", 
             response_model=QuestionsOut, # TODO: change to designated schema
             status_code=status.HTTP_200_OK)
 async def get_questions(quiz_id: str, 
+                        size: str = Query("full", pattern="^(full|mobile|thumbnail)$"),
                         db: Session = Depends(get_db), 
                         user: User = Depends(get_current_user)):
     """return all the questions that belongs to the quiz
 
     Args:
         quiz_id (str): _description_
+        size (str, optional): image size to return: full, mobile or thumbnail. 
+            Falls back to the full image for questions without variants. Defaults to "full".
         db (Session, optional): _description_. Defaults to Depends(get_db).
         user (User, optional): _description_. Defaults to Depends(get_current_user).
 
@@ -290,7 +365,13 @@ async def get_questions(quiz_id: str,
     for qid in question_ids:
         question = question_map.get(qid)
         if question:
-            signed_url = presign_get(question.image_url, expires_in=600)
+            image_url = question.image_url
+            cloud_front_url = question.cloud_front_url
+            variant_url = {"mobile": question.mobile_url, "thumbnail": question.thumbnail_url}.get(size)
+            if variant_url:
+                image_url = variant_url
+                cloud_front_url = to_cloud_front_url(variant_url)
+            signed_url = presign_get(image_url, expires_in=600)
             res.append(Question(
                 question_id=question.question_id,
                 content=question.content,
@@ -299,13 +380,46 @@ async def get_questions(quiz_id: str,
                 points=question.points,
                 answer=question.answer,
                 image_url=signed_url,
-                cloud_front_url=question.cloud_front_url
+                cloud_front_url=cloud_front_url
             ))
     return QuestionsOut(questions=res)
 
+ATTEMPT_FIELDS = list(BestAttemptOut.model_fields)
+
+def _select_attempt_fields(attempts_out: List[BestAttemptOut], fields: Optional[List[str]]) -> list:
+    if not fields:
+        return attempts_out
+    unknown = [f for f in fields if f not in ATTEMPT_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown fields: {', '.join(unknown)}")
+    return [a.model_dump(include=set(fields)) for a in attempts_out]
+
 @router.get("/attempts", status_code=status.HTTP_200_OK, response_model=BestAttemptsOut)
-async def get_attempts(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    attempts = db.query(Attempt).options(joinedload(Attempt.quiz)).filter(Attempt.user_id == user.user_id).all()
+async def get_attempts(request: Request,
+                       page: Tuple[Optional[str], Optional[int]] = Depends(get_cursor_params),
+                       fields: Optional[List[str]] = Depends(get_fields_param),
+                       db: Session = Depends(get_read_db), 
+                       user: User = Depends(get_current_user)):
+    """Best attempt per quiz, ordered by quiz_id; a page holds `limit` quizzes."""
+    cursor, limit = page
+    after = decode_cursor(cursor, 1)
+
+    attempts_query = db.query(Attempt).options(joinedload(Attempt.quiz)).filter(Attempt.user_id == user.user_id)
+    next_cursor = None
+    if limit is not None:
+        # pick the page's quizzes first, then load only their attempts
+        ids_query = db.query(Attempt.quiz_id).filter(Attempt.user_id == user.user_id).distinct()
+        if after is not None:
+            ids_query = ids_query.filter(Attempt.quiz_id > after[0])
+        page_ids = [r[0] for r in ids_query.order_by(Attempt.quiz_id.asc()).limit(limit + 1).all()]
+        if len(page_ids) > limit:
+            page_ids = page_ids[:limit]
+            next_cursor = encode_cursor(page_ids[-1])
+        attempts_query = attempts_query.filter(Attempt.quiz_id.in_(page_ids))
+    elif after is not None:
+        attempts_query = attempts_query.filter(Attempt.quiz_id > after[0])
+    attempts = attempts_query.order_by(Attempt.quiz_id.asc(), Attempt.attempt_number.asc()).all()
+
     quiz_attempts = {} # ket= quiz_id, value= list of attempt object
 
     for attempt in attempts:
@@ -329,79 +443,48 @@ async def get_attempts(db: Session = Depends(get_db), user: User = Depends(get_c
             completed_at=best_attempt.end_at
         ))
 
-    return BestAttemptsOut(attempts=best_attempts)
+    return conditional_json_response(
+        request,
+        {"attempts": _select_attempt_fields(best_attempts, fields), "next_cursor": next_cursor},
+    )
 
 @router.post("/submit-quiz", status_code=status.HTTP_201_CREATED)
 async def submit_quiz(
     submission: QuizSubmission,
     background_tasks: BackgroundTasks,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=64),
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user)
 ):
-    # 1. Get all previous attempts for this user and quiz
-    attempts = (
-        db.query(Attempt)
-        .filter(
-            Attempt.user_id == user.user_id,
-            Attempt.quiz_id == submission.quiz_id
-        )
-        .order_by(Attempt.attempt_number.asc())
-        .all()
-    )
-    if len(attempts) >= 2:
-        raise HTTPException(status_code=400, detail="Maximum number of attempts reached for this quiz.")
+    """
+    Store a quiz attempt and award points for improving on the best previous attempt.
 
-    # Calculate previous best pass_count from attempts
-    previous_best_pass = 0
-    for a in attempts:
-        pass_count = int(a.pass_count) if a.pass_count else 0
-        previous_best_pass = max(previous_best_pass, pass_count)
-    
-    new_pass_count = submission.pass_count
-    new_fail_count = submission.fail_count
-    
-    # Calculate points gained based on improvement in pass_count
-    points_gained = max(0, new_pass_count - previous_best_pass)
+    Clients should send an Idempotency-Key header; retrying with the same key
+    returns the original result instead of storing a second attempt.
+    """
+    result = submit_attempt(db, user.user_id, submission, idempotency_key)
+    if result.attempt_id is None:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Maximum number of attempts reached for this quiz.")
+    db.commit()
 
-    # 2. Ensure user's Points record exists and update points if needed
-    points_record = db.query(Points).filter(Points.user_id == user.user_id).first()
-    if points_gained > 0:
-        points_record.points += points_gained
+    response = {
+        "message": "Quiz result submitted.",
+        "attempt_number": result.attempt_number,
+        "points": result.points,
+    }
+    if result.replayed:
+        return response
 
-    # 3. Store Attempt
-    new_attempt = Attempt(
-        user_id=user.user_id,
-        quiz_id=submission.quiz_id,
-        attempt_number=len(attempts) + 1,
-        pass_count=new_pass_count,
-        fail_count=new_fail_count,
-        start_at=submission.start_at,
-        end_at=submission.end_at
-    )
-    db.add(new_attempt)
-    db.commit()
-    db.refresh(new_attempt)
-    db.refresh(points_record)
+    invalidate_school(user.school_id)
+    invalidate_user(user.user_id)
+    mark_user_wrote(user.user_id)
+    leaderboard.add_points(user.user_id, user.school_id, user.grade, result.points_gained)
 
-    #######################
-    ### Background Task ###
-    #######################
-    
-    saved_uid = user.user_id
-    async def process_rewards(uid):
-        try:
-            await check_achievement_and_award(uid)
-            await check_and_award_badges(uid)
-        except Exception as e:
-            print(f"Error processing rewards for user {uid}: {e}")
-    
-    background_tasks.add_task(process_rewards, saved_uid)
-    # background_tasks.add_task(update_streak, user.user_id)
+    # achievements, badges and streak are evaluated by the worker
+    schedule_rewards(user.user_id, background_tasks)
 
-    # 5. Prepare response using Pydantic model for serialization
-    return {
-        "message": "Quiz result submitted."
-    }
+    return response
 
 @router.post("/chat/start")
 async def start_chat(
@@ -528,10 +611,11 @@ async def send_message(
     messages.append({"role": "user", "content": request.message + lang_rule})
 
 
-    completion = client.chat.completions.create(
-        model="gpt-3.5-turbo",  
-        messages=messages
-    )
+    with track_external("openai", "chat.completions"):
+        completion = client.chat.completions.create(
+            model="gpt-3.5-turbo",  
+            messages=messages
+        )
 
     reply = completion.choices[0].message.content
 
@@ -569,8 +653,11 @@ async def end_chat(
 
     # 3. Mark as ended
     session.ended_at = datetime.now()
+    record_chat_session(db, session, user.school_id)
     db.commit()
     db.refresh(session)
+    invalidate_school(user.school_id)
+    mark_user_wrote(user.user_id)
 
     # 4. Return session info
     return {
@@ -634,31 +721,137 @@ async def chat_eligibility(
         } 
 
 @router.get("/attempts/all", status_code=status.HTTP_200_OK, response_model=BestAttemptsOut) 
-async def get_attempts(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    attempts = db.query(Attempt).options(joinedload(Attempt.quiz)).filter(Attempt.user_id == user.user_id).all()
-    quiz_attempts = {} # ket= quiz_id, value= list of attempt object
-
-    for attempt in attempts:
-        qid = int(attempt.quiz_id)
-        if qid not in quiz_attempts:
-            quiz_attempts[qid] = []
-        quiz_attempts[qid].append(attempt)
+async def get_all_attempts(request: Request,
+                           page: Tuple[Optional[str], Optional[int]] = Depends(get_cursor_params),
+                           fields: Optional[List[str]] = Depends(get_fields_param),
+                           db: Session = Depends(get_read_db), 
+                           user: User = Depends(get_current_user)):
+    """Every attempt, ordered by (quiz_id, attempt_number)."""
+    cursor, limit = page
+    after = decode_cursor(cursor, 2)
+
+    # attempt_count covers all of the quiz's attempts, not just the ones on this page
+    counts = (
+        select(
+            Attempt.attempt_id,
+            func.count().over(partition_by=Attempt.quiz_id).label("attempt_count"),
+        )
+        .where(Attempt.user_id == user.user_id)
+        .subquery()
+    )
+    query = (
+        db.query(Attempt, counts.c.attempt_count)
+        .join(counts, counts.c.attempt_id == Attempt.attempt_id)
+        .options(joinedload(Attempt.quiz))
+    )
+    if after is not None:
+        query = query.filter(tuple_(Attempt.quiz_id, Attempt.attempt_number) > tuple_(after[0], after[1]))
+    query = query.order_by(Attempt.quiz_id.asc(), Attempt.attempt_number.asc())
+    if limit is not None:
+        query = query.limit(limit + 1)
+    rows = query.all()
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1][0]
+        next_cursor = encode_cursor(last.quiz_id, last.attempt_number)
 
     all_attempts = []
-    for qid, attempt_list in quiz_attempts.items():
-        for attempt in attempt_list:
-            quiz_name = attempt.quiz.name if attempt.quiz else ""
-            duration_in_sec = int((attempt.end_at - attempt.start_at).total_seconds())
-            all_attempts.append(BestAttemptOut(
-                quiz_id=qid,
-                pass_count=attempt.pass_count or 0,
-                fail_count=attempt.fail_count or 0,
-                attempt_count=len(attempt_list),
-                quiz_name=quiz_name,
-                duration_in_sec=duration_in_sec,
-                completed_at=attempt.end_at
-            ))
-    return BestAttemptsOut(attempts=all_attempts)
+    for attempt, attempt_count in rows:
+        quiz_name = attempt.quiz.name if attempt.quiz else ""
+        duration_in_sec = int((attempt.end_at - attempt.start_at).total_seconds())
+        all_attempts.append(BestAttemptOut(
+            quiz_id=int(attempt.quiz_id),
+            pass_count=attempt.pass_count or 0,
+            fail_count=attempt.fail_count or 0,
+            attempt_count=attempt_count,
+            quiz_name=quiz_name,
+            duration_in_sec=duration_in_sec,
+            completed_at=attempt.end_at
+        ))
+
+    return conditional_json_response(
+        request,
+        {"attempts": _select_attempt_fields(all_attempts, fields), "next_cursor": next_cursor},
+    )
+
+@router.get("/summary", status_code=status.HTTP_200_OK, response_model=UserSummaryOut)
+async def get_user_summary(db: Session = Depends(get_read_db), user: User = Depends(get_current_user)):
+    """Everything the home screen needs in one call: details, points, streak and unseen badges / achievements.
+
+    Replaces /details, /points, /streaks, /badges/notification and /achievements/notification
+    on the home screen. Cached for USER_SUMMARY_CACHE_TTL_SECONDS and invalidated when the
+    user submits a quiz or earns a badge / achievement.
+    """
+    def compute():
+        # user, school, points and streak in one query
+        row = (
+            db.query(
+                School.name.label("school_name"),
+                Points.points,
+                Streak.current_streak,
+                Streak.longest_streak,
+                Streak.last_activity,
+            )
+            .select_from(User)
+            .outerjoin(School, School.school_id == User.school_id)
+            .outerjoin(Points, Points.user_id == User.user_id)
+            .outerjoin(Streak, Streak.user_id == User.user_id)
+            .filter(User.user_id == user.user_id)
+            .one()
+        )
+        badges = (
+            db.query(UserBadge).options(joinedload(UserBadge.badge))
+            .filter(UserBadge.user_id == user.user_id, UserBadge.view_count == 0)
+            .all()
+        )
+        achievements = (
+            db.query(UserAchievement).options(joinedload(UserAchievement.achievement))
+            .filter(UserAchievement.user_id == user.user_id, UserAchievement.view_count == 0)
+            .all()
+        )
+
+        streak = None
+        if row.current_streak is not None and row.last_activity is not None:
+            streak = StreakOut(
+                current_streak=row.current_streak,
+                longest_streak=row.longest_streak,
+                last_activity=row.last_activity
+            )
+
+        return UserSummaryOut(
+            user=UserOut(
+                id=user.user_id,
+                email=user.email,
+                first_name=user.first_name,
+                last_name=user.last_name,
+                school_id=user.school_id,
+                school_name=row.school_name,
+                grade=user.grade,
+                username=user.username
+            ),
+            points=row.points or 0,
+            streak=streak,
+            new_badges=[UserBadgeOut(
+                badge_id=b.badge_id,
+                earned_at=b.earned_at,
+                name=b.badge.name,
+                description=b.badge.description,
+                icon_url=b.badge.icon_url
+            ) for b in badges],
+            new_achievements=[SingleUserAchievement(
+                achievement_id=a.achievement_id,
+                name_en=a.achievement.name_en,
+                name_ind=a.achievement.name_ind,
+                description_en=a.achievement.description_en,
+                description_ind=a.achievement.description_ind,
+                points=a.achievement.points,
+                completed_at=a.completed_at
+            ) for a in achievements],
+        ).model_dump(mode="json")
+
+    return cached_user_response("summary", user.user_id, compute, settings.USER_SUMMARY_CACHE_TTL_SECONDS)
 
 @router.get("/details", status_code=status.HTTP_200_OK, response_model=UserOut)
 async def get_user_details(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
@@ -679,3 +872,78 @@ async def get_user_details(db: Session = Depends(get_db), user: User = Depends(g
         grade=this_user.grade,
         username=this_user.username
     )
+
+def _leaderboard_key(user: User, scope: str) -> str:
+    if scope == "grade":
+        if not user.grade:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No grade leaderboard for this user")
+        return leaderboard.grade_key(user.school_id, user.grade)
+    return leaderboard.school_key(user.school_id)
+
+def _leaderboard_entries(db: Session, entries) -> List[LeaderboardEntryOut]:
+    names = {
+        row.user_id: row
+        for row in db.query(User.user_id, User.first_name, User.last_name, User.username)
+        .filter(User.user_id.in_([user_id for user_id, _, _ in entries]))
+    }
+    return [
+        LeaderboardEntryOut(
+            rank=rank,
+            user_id=user_id,
+            first_name=names[user_id].first_name if user_id in names else None,
+            last_name=names[user_id].last_name if user_id in names else None,
+            username=names[user_id].username if user_id in names else None,
+            points=points,
+        )
+        for user_id, points, rank in entries
+    ]
+
+@router.get("/leaderboard", response_model=LeaderboardOut, status_code=status.HTTP_200_OK)
+async def get_leaderboard(
+    scope: str = Query("school", pattern="^(school|grade)$"),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+    user: User = Depends(get_current_user)
+):
+    """Top students of the user's school or grade, plus the user's own rank."""
+    key = _leaderboard_key(user, scope)
+    try:
+        entries = leaderboard.top(key, limit)
+        my_rank = leaderboard.rank(key, user.user_id)
+    except redis.RedisError:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Leaderboard unavailable")
+    return LeaderboardOut(scope=scope, my_rank=my_rank, entries=_leaderboard_entries(db, entries))
+
+@router.get("/leaderboard/around-me", response_model=LeaderboardOut, status_code=status.HTTP_200_OK)
+async def get_leaderboard_around_me(
+    scope: str = Query("school", pattern="^(school|grade)$"),
+    radius: int = Query(3, ge=0, le=25),
+    db: Session = Depends(get_read_db),
+    user: User = Depends(get_current_user)
+):
+    """The user's rank with the `radius` students ranked directly above and below them."""
+    key = _leaderboard_key(user, scope)
+    try:
+        my_rank, entries = leaderboard.around(key, user.user_id, radius)
+    except redis.RedisError:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Leaderboard unavailable")
+    return LeaderboardOut(scope=scope, my_rank=my_rank, entries=_leaderboard_entries(db, entries))
+
+@router.get("/events", status_code=status.HTTP_200_OK)
+async def get_user_events(request: Request, token: TokenPayload = Depends(get_token)):
+    """
+    Server-sent events for the current user, replacing polling of /badges/notification
+    and /achievements/notification.
+
+    Events:
+        badges: {"badge_ids": [...]} when badges are awarded
+        achievements: {"achievement_ids": [...]} when achievements are unlocked
+
+    The stream holds no database connection. On (re)connect, fetch /users/summary
+    once to pick up anything missed while disconnected.
+    """
+    return StreamingResponse(
+        user_event_stream(request, token.sub),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,5 +1,8 @@
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, List, Union
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import os
 
 from jose import jwt
 
@@ -14,6 +17,9 @@ from fastapi import Depends
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt releases the GIL, so bulk hashing scales with threads
+_hash_pool = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1), thread_name_prefix="pw-hash")
+
 
 def create_access_token(
     subject: Union[str, Any], email: str, first_name: str, role: str, school_id: str, expires_delta: timedelta = None
@@ -78,4 +84,42 @@ def generate_unique_user_id(db: Session = Depends(get_db)) -> str:
     while True:
         candidate = str(random.randint(10**11, 10**12 - 1))  # Generates a 12-digit number
         if not db.query(User).filter_by(user_id=candidate).first():
-            return candidate
\ No newline at end of file
+            return candidate
+
+
+async def hash_passwords(passwords: List[str]) -> List[str]:
+    """
+    Hash many passwords on the hashing thread pool without blocking the event loop.
+
+    Parameters:
+        passwords (List[str]): Plain passwords.
+
+    Returns:
+        List[str]: Hashes in the same order.
+    """
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(*(loop.run_in_executor(_hash_pool, get_password_hash, p) for p in passwords))
+
+
+def generate_unique_user_ids(db: Session, count: int) -> List[str]:
+    """
+    Generate count distinct 12-digit user ids that are not taken yet.
+
+    Candidates are checked with a single IN query per round; collisions are
+    so rare that one round is almost always enough.
+
+    Parameters:
+        db (Session): The database session.
+        count (int): Number of ids needed.
+
+    Returns:
+        List[str]: The new user ids.
+    """
+    ids = set()
+    while len(ids) < count:
+        candidates = {str(random.randint(10**11, 10**12 - 1)) for _ in range(count - len(ids))} - ids
+        taken = {
+            row[0] for row in db.query(User.user_id).filter(User.user_id.in_(candidates)).all()
+        }
+        ids.update(candidates - taken)
+    return list(ids)
@@ -1,21 +1,89 @@
+import asyncio
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError, NoCredentialsError
 import os
-from typing import Optional
+import threading
+import time
+from typing import BinaryIO, Dict, Iterator, List, Optional
 from app.config import settings
+from app.metrics import EXTERNAL_CALL_DURATION
+from app.tracing import record_span
 import re
 import logging as logger
 
+CACHE_CONTROL = 'public, max-age=1209600, immutable' # 14 days caching with CloudFront
+DELETE_BATCH_SIZE = 1000 # DeleteObjects limit per request
+
+# Multipart settings for the streaming upload/download APIs
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=8,
+    use_threads=True,
+)
+
 
 class S3Service:
+    """
+    Thin wrapper around a single pooled boto3 S3 client.
+
+    boto3 clients are thread-safe, so one instance (see get_s3_service) is shared by
+    the web app and the worker. The *_async methods run the blocking calls in a
+    worker thread so they don't stall the event loop.
+    """
     def __init__(self):
         self.s3_client = boto3.client(
             's3',
             aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
             aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_DEFAULT_REGION 
+            region_name=settings.AWS_DEFAULT_REGION,
+            config=Config(
+                max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+                retries={"max_attempts": 5, "mode": "adaptive"},
+                tcp_keepalive=True,
+            )
         )
         self.bucket_name = settings.AWS_S3_BUCKET_NAME
+        self._metrics_lock = threading.Lock()
+        self._metrics: Dict[str, Dict[str, float]] = {}
+
+    ###############
+    ### Metrics ###
+    ###############
+
+    def _record(self, operation: str, started_at: float, nbytes: int = 0, ok: bool = True) -> None:
+        """Accumulate per-operation transfer counters (calls, errors, bytes, seconds) the Prometheus latency and a tracing span."""
+        elapsed = time.perf_counter() - started_at
+        with self._metrics_lock:
+            entry = self._metrics.setdefault(
+                operation, {"calls": 0, "errors": 0, "bytes": 0, "seconds": 0.0}
+            )
+            entry["calls"] += 1
+            entry["bytes"] += nbytes
+            entry["seconds"] += elapsed
+            if not ok:
+                entry["errors"] += 1
+        EXTERNAL_CALL_DURATION.labels("s3", operation, "ok" if ok else "error").observe(elapsed)
+        record_span(f"s3 {operation}", started_at, ok, **{"peer.service": "s3", "s3.bytes": nbytes})
+
+    def get_metrics(self) -> Dict[str, Dict[str, float]]:
+        """
+        Return a snapshot of the transfer metrics recorded since startup
+
+        Returns:
+            dict of operation -> {"calls", "errors", "bytes", "seconds"}
+        """
+        with self._metrics_lock:
+            return {op: dict(values) for op, values in self._metrics.items()}
+
+    def _build_key(self, school_id: str, filename: str, week_number: int, folder_prefix: str) -> str:
+        # Format: {folder_prefix}/{school_id}/{week_number}/{filename}
+        return f"{folder_prefix}/{school_id}/{week_number}/{filename}"
+
+    def _build_url(self, s3_key: str) -> str:
+        return f"https://{self.bucket_name}.s3.amazonaws.com/{s3_key}"
     
     def upload_file_to_s3(
         self, 
@@ -38,10 +106,9 @@ class S3Service:
         Returns:
             S3 URL if successful, None if failed
         """
+        started_at = time.perf_counter()
         try:
-            # Create the S3 key (path) with folder structure
-            # Format: content/{school_id}/week_{week_number}/{filename}
-            s3_key = f"{folder_prefix}/{school_id}/{week_number}/{filename}"
+            s3_key = self._build_key(school_id, filename, week_number, folder_prefix)
             
             # Upload the file
             self.s3_client.put_object(
@@ -49,22 +116,101 @@ class S3Service:
                 Key=s3_key,
                 Body=file_content,
                 ContentType=content_type, 
-                CacheControl='public, max-age=1209600, immutable' # 14 days caching with CloudFront
+                CacheControl=CACHE_CONTROL
             )
+            self._record("upload", started_at, len(file_content))
             
             # Return the S3 URL
-            s3_url = f"https://{self.bucket_name}.s3.amazonaws.com/{s3_key}"
-            return s3_url
+            return self._build_url(s3_key)
             
         except NoCredentialsError:
+            self._record("upload", started_at, ok=False)
             print("AWS credentials not found")
             return None
         except ClientError as e:
+            self._record("upload", started_at, ok=False)
+            print(f"Error uploading to S3: {e}")
+            return None
+        except Exception as e:
+            self._record("upload", started_at, ok=False)
+            print(f"Unexpected error: {e}")
+            return None
+
+    def upload_fileobj_to_s3(
+        self,
+        fileobj: BinaryIO,
+        school_id: str,
+        filename: str,
+        week_number: int,
+        content_type: str = 'application/pdf',
+        folder_prefix: str = 'content'
+    ) -> Optional[str]:
+        """
+        Stream a file-like object to S3 without loading it into memory.
+        Large files are sent as a parallel multipart upload.
+        
+        Args:
+            fileobj: Readable binary file-like object (e.g. UploadFile.file)
+            school_id: School identifier for folder organization
+            filename: Original filename
+            week_number: Week number for additional organization
+            
+        Returns:
+            S3 URL if successful, None if failed
+        """
+        started_at = time.perf_counter()
+        try:
+            s3_key = self._build_key(school_id, filename, week_number, folder_prefix)
+            start_pos = fileobj.tell() if fileobj.seekable() else 0
+            self.s3_client.upload_fileobj(
+                fileobj,
+                self.bucket_name,
+                s3_key,
+                ExtraArgs={"ContentType": content_type, "CacheControl": CACHE_CONTROL},
+                Config=TRANSFER_CONFIG,
+            )
+            nbytes = fileobj.tell() - start_pos if fileobj.seekable() else 0
+            self._record("upload", started_at, nbytes)
+            return self._build_url(s3_key)
+        except (NoCredentialsError, ClientError) as e:
+            self._record("upload", started_at, ok=False)
             print(f"Error uploading to S3: {e}")
             return None
         except Exception as e:
+            self._record("upload", started_at, ok=False)
             print(f"Unexpected error: {e}")
             return None
+
+    def replace_file_by_url(self, s3_url: str, file_content: bytes, content_type: str) -> bool:
+        """
+        Overwrite the object behind an existing S3 URL
+        
+        Args:
+            s3_url: Full S3 URL from database
+            file_content: New file content in bytes
+            content_type: MIME type of the new content
+            
+        Returns:
+            True if the upload succeeded, False otherwise
+        """
+        started_at = time.perf_counter()
+        s3_key = self._extract_key_from_url(s3_url)
+        if not s3_key:
+            logger.error(f"Invalid S3 URL format: {s3_url}")
+            return False
+        try:
+            self.s3_client.put_object(
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                Body=file_content,
+                ContentType=content_type
+            )
+            self._record("upload", started_at, len(file_content))
+            return True
+        except ClientError as e:
+            self._record("upload", started_at, ok=False)
+            logger.error(f"AWS ClientError replacing {s3_url}: {e}")
+            return False
         
     def _extract_key_from_url(self, s3_url: str) -> Optional[str]:
         """
@@ -110,35 +256,35 @@ class S3Service:
         
     def delete_file_by_url(self, s3_url: str) -> bool:
         """
-        Delete a file from S3 using the full S3 URL (from database)
+        Delete a file from S3 using the full S3 URL (from database).
+        Idempotent: S3 reports success for keys that are already gone, so there is
+        no existence check (HEAD) before the delete.
         
         Args:
             s3_url: Full S3 URL from database
             
         Returns:
-            True if deletion successful, False otherwise
+            True if the file is gone after the call, False otherwise
         """
+        started_at = time.perf_counter()
         try:
             s3_key = self._extract_key_from_url(s3_url)
             if not s3_key:
                 logger.error(f"Invalid S3 URL format: {s3_url}")
                 return False
             
-            # Check if file exists before attempting deletion
-            if not self.check_file_exists_by_url(s3_url):
-                logger.warning(f"File {s3_key} does not exist in S3")
-                return False
-            
             # Delete the file
             self.s3_client.delete_object(
                 Bucket=self.bucket_name,
                 Key=s3_key
             )
+            self._record("delete", started_at)
             
             logger.info(f"Successfully deleted file from S3: {s3_url}")
             return True
             
         except ClientError as e:
+            self._record("delete", started_at, ok=False)
             error_code = e.response['Error']['Code']
             if error_code == 'NoSuchBucket':
                 logger.error(f"Bucket {self.bucket_name} does not exist")
@@ -153,6 +299,59 @@ class S3Service:
             logger.error(f"Unexpected error deleting from S3: {e}")
             return False
     
+    def delete_files(self, s3_keys: Optional[List[str]] = None, prefix: Optional[str] = None) -> int:
+        """
+        Batch delete objects with DeleteObjects (up to 1000 keys per request).
+        Explicit keys and every object under the prefix are removed in a single pass.
+        
+        Args:
+            s3_keys: Object keys to delete
+            prefix: Optional key prefix, e.g. "visuals/{school_id}/{week}/t{topic_id}/"
+            
+        Returns:
+            Number of objects deleted
+        """
+        started_at = time.perf_counter()
+        pending = [k for k in (s3_keys or []) if k]
+        deleted = 0
+        errors = 0
+
+        def flush(keys: List[str]) -> None:
+            nonlocal deleted, errors
+            response = self.s3_client.delete_objects(
+                Bucket=self.bucket_name,
+                Delete={"Objects": [{"Key": k} for k in keys], "Quiet": True},
+            )
+            # Quiet mode only reports failures
+            failed = response.get("Errors", [])
+            for err in failed:
+                logger.error(f"Failed to delete {err.get('Key')} from S3: {err.get('Message')}")
+            errors += len(failed)
+            deleted += len(keys) - len(failed)
+
+        try:
+            if prefix:
+                paginator = self.s3_client.get_paginator("list_objects_v2")
+                for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+                    pending.extend(obj["Key"] for obj in page.get("Contents", []))
+                    while len(pending) >= DELETE_BATCH_SIZE:
+                        flush(pending[:DELETE_BATCH_SIZE])
+                        pending = pending[DELETE_BATCH_SIZE:]
+            # the remaining keys (and the prefix's last partial page) go out together
+            for i in range(0, len(pending), DELETE_BATCH_SIZE):
+                flush(pending[i:i + DELETE_BATCH_SIZE])
+        except ClientError as e:
+            errors += 1
+            logger.error(f"AWS ClientError batch deleting from S3: {e}")
+
+        self._record("delete", started_at, ok=errors == 0)
+        logger.info(f"Deleted {deleted} objects from S3 (prefix={prefix})")
+        return deleted
+
+    def topic_visuals_prefix(self, school_id: str, week_number: int, topic_id: int) -> str:
+        """Key prefix holding every generated image (and variant) of a topic"""
+        return self._build_key(school_id, f"t{topic_id}/", week_number, 'visuals')
+
     def get_file_by_url(self, s3_url: str):
         """
         Get file content from S3 into memory using the full S3 URL (no local file created)
@@ -163,6 +362,7 @@ class S3Service:
         Returns:
             File content as bytes if successful, None if failed
         """
+        started_at = time.perf_counter()
         try:
             s3_key = self._extract_key_from_url(s3_url)
             if not s3_key:
@@ -177,11 +377,13 @@ class S3Service:
             
             # Read the file content
             file = response['Body'].read()
+            self._record("download", started_at, len(file))
             logger.info(f"Successfully retrieved file content from S3: {s3_url}")
             
             return file
             
         except ClientError as e:
+            self._record("download", started_at, ok=False)
             error_code = e.response['Error']['Code']
             if error_code == 'NoSuchBucket':
                 logger.error(f"Bucket {self.bucket_name} does not exist")
@@ -195,3 +397,68 @@ class S3Service:
         except Exception as e:
             logger.error(f"Unexpected error getting file content from S3: {e}")
             return None
+
+    def iter_file_by_url(self, s3_url: str, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+        """
+        Stream file content from S3 in chunks instead of reading it all into memory
+        
+        Args:
+            s3_url: Full S3 URL from database
+            chunk_size: Size of each yielded chunk in bytes
+            
+        Yields:
+            Chunks of the file content
+        """
+        s3_key = self._extract_key_from_url(s3_url)
+        if not s3_key:
+            logger.error(f"Invalid S3 URL format: {s3_url}")
+            return
+        started_at = time.perf_counter()
+        nbytes = 0
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key)
+            for chunk in response['Body'].iter_chunks(chunk_size=chunk_size):
+                nbytes += len(chunk)
+                yield chunk
+            self._record("download", started_at, nbytes)
+        except ClientError as e:
+            self._record("download", started_at, nbytes, ok=False)
+            logger.error(f"AWS ClientError streaming from S3: {e}")
+
+    #################
+    ### Async API ###
+    #################
+
+    async def upload_file_to_s3_async(self, **kwargs) -> Optional[str]:
+        return await asyncio.to_thread(self.upload_file_to_s3, **kwargs)
+
+    async def upload_fileobj_to_s3_async(self, **kwargs) -> Optional[str]:
+        return await asyncio.to_thread(self.upload_fileobj_to_s3, **kwargs)
+
+    async def replace_file_by_url_async(self, s3_url: str, file_content: bytes, content_type: str) -> bool:
+        return await asyncio.to_thread(self.replace_file_by_url, s3_url, file_content, content_type)
+
+    async def get_file_by_url_async(self, s3_url: str):
+        return await asyncio.to_thread(self.get_file_by_url, s3_url)
+
+    async def delete_file_by_url_async(self, s3_url: str) -> bool:
+        return await asyncio.to_thread(self.delete_file_by_url, s3_url)
+
+    async def delete_files_async(self, s3_keys: Optional[List[str]] = None, prefix: Optional[str] = None) -> int:
+        return await asyncio.to_thread(self.delete_files, s3_keys, prefix)
+
+
+_s3_service: Optional[S3Service] = None
+_s3_service_lock = threading.Lock()
+
+
+def get_s3_service() -> S3Service:
+    """
+    Return the process-wide S3Service so every caller shares one connection pool.
+    """
+    global _s3_service
+    if _s3_service is None:
+        with _s3_service_lock:
+            if _s3_service is None:
+                _s3_service = S3Service()
+    return _s3_service
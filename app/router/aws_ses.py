@@ -1,9 +1,14 @@
 import boto3
-from botocore.exceptions import ClientError
-from datetime import datetime
+from botocore.exceptions import BotoCoreError, ClientError
+from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 import logging
+import time
+from sqlalchemy import select
 from app.config import settings
+from app.database.db import SessionLocal
+from app.metrics import track_external
+from app.model.email_outbox import EmailOutbox
 
 # Constants
 SENDER = "KIRA Bercerita <dev-team@kiraclassroom.com>"
@@ -11,6 +16,14 @@ CONFIGURATION_SET = "ConfigSet"
 AWS_REGION = "us-east-2"
 CHARSET = "UTF-8"
 
+# Outbox dispatch
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_BASE_BACKOFF_SECONDS = 30
+OUTBOX_MAX_BACKOFF_SECONDS = 3600
+# a claimed batch is not due again for this long, unless it is sent or fails first
+OUTBOX_CLAIM_SECONDS = 300
+
 # Email templates
 EMAIL_CSS_STYLES = """
     body {
@@ -49,31 +62,70 @@ EMAIL_CSS_STYLES = """
 """
 
 
+_ses_client = None
+
+
 def _get_ses_client():
-    """Create and return an AWS SES client."""
-    return boto3.client(
-        'ses', 
-        region_name=AWS_REGION,
-        aws_access_key_id=settings.AWS_ACCESS_KEY_ID, 
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
-    )
+    """Return the AWS SES client, created once and reused for every send."""
+    global _ses_client
+    if _ses_client is None:
+        _ses_client = boto3.client(
+            'ses', 
+            region_name=AWS_REGION,
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID, 
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
+        )
+    return _ses_client
 
 
-def _send_email(email: str, subject: str, body_html: str) -> bool:
+def _send_email(email: str, subject: str, body_html: str, db=None) -> bool:
     """
-    Send an email using AWS SES.
+    Queue an email in the outbox; dispatch_outbox delivers it in the background.
+    
+    When a session is given the row is only added to it, so the email is committed
+    (or rolled back) together with the caller's transaction. Works with both the
+    sync and the async session since only .add() is used.
     
     Args:
         email: Recipient email address
         subject: Email subject
         body_html: HTML body content
+        db: Optional session to enqueue in; a short-lived session is used otherwise
         
     Returns:
-        bool: True if email sent successfully, False otherwise
+        bool: True if email queued successfully, False otherwise
     """
+    entry = EmailOutbox(
+        recipient=email,
+        subject=subject,
+        body_html=body_html,
+        status="PENDING",
+        attempts=0,
+        next_attempt_at=datetime.now(),
+    )
+    if db is not None:
+        db.add(entry)
+        return True
+
+    session = SessionLocal()
     try:
-        client = _get_ses_client()
-        response = client.send_email(
+        session.add(entry)
+        session.commit()
+        return True
+    except Exception as e:
+        session.rollback()
+        logging.error(f"Failed to queue email to {email}: {e}")
+        return False
+    finally:
+        session.close()
+
+
+def _deliver_email(client, email: str, subject: str, body_html: str) -> None:
+    """
+    Send one email through SES. Raises ClientError or BotoCoreError on failure.
+    """
+    with track_external("ses", "send_email"):
+        client.send_email(
             Destination={'ToAddresses': [email]},
             Message={
                 'Body': {
@@ -89,12 +141,72 @@ def _send_email(email: str, subject: str, body_html: str) -> bool:
             },
             Source=SENDER,
         )
-        logging.info(f"Email sent successfully to {email}")
-        return True
-    except ClientError as e:
-        error_msg = e.response['Error']['Message']
-        logging.error(f"Failed to send email to {email}: {error_msg}")
-        return False
+
+
+def dispatch_outbox(db, batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+    """
+    Deliver one batch of due outbox emails.
+    
+    Rows are claimed with FOR UPDATE SKIP LOCKED and pushed OUTBOX_CLAIM_SECONDS
+    into the future, then the claim is committed so no row lock is held while
+    talking to SES; several senders never pick the same email. Each email's
+    outcome is committed right after its send. Sends are paced to
+    settings.SES_MAX_SEND_RATE and failures are retried with exponential
+    backoff until OUTBOX_MAX_ATTEMPTS.
+    
+    Args:
+        db: Sync database session
+        batch_size: Maximum number of emails to send in this batch
+        
+    Returns:
+        int: Number of emails claimed in this batch (0 when the outbox is drained)
+    """
+    now = datetime.now()
+    entries = db.execute(
+        select(EmailOutbox)
+        .filter(EmailOutbox.status == "PENDING", EmailOutbox.next_attempt_at <= now)
+        .order_by(EmailOutbox.next_attempt_at.asc())
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+
+    if not entries:
+        return 0
+
+    for entry in entries:
+        entry.next_attempt_at = now + timedelta(seconds=OUTBOX_CLAIM_SECONDS)
+    db.commit()
+
+    client = _get_ses_client()
+    min_interval = 1.0 / settings.SES_MAX_SEND_RATE
+    last_sent_at = 0.0
+
+    for entry in entries:
+        # pace sends so the account's max send rate is never exceeded
+        wait = min_interval - (time.monotonic() - last_sent_at)
+        if wait > 0:
+            time.sleep(wait)
+        last_sent_at = time.monotonic()
+
+        entry.attempts += 1
+        try:
+            _deliver_email(client, entry.recipient, entry.subject, entry.body_html)
+            entry.status = "SENT"
+            entry.sent_at = datetime.now()
+            entry.last_error = None
+            logging.info(f"Email sent successfully to {entry.recipient}")
+        except (ClientError, BotoCoreError) as e:
+            error_msg = e.response['Error']['Message'] if isinstance(e, ClientError) else str(e)
+            entry.last_error = error_msg
+            if entry.attempts >= OUTBOX_MAX_ATTEMPTS:
+                entry.status = "FAILED"
+            else:
+                backoff = min(OUTBOX_BASE_BACKOFF_SECONDS * (2 ** (entry.attempts - 1)), OUTBOX_MAX_BACKOFF_SECONDS)
+                entry.next_attempt_at = datetime.now() + timedelta(seconds=backoff)
+            logging.error(f"Failed to send email to {entry.recipient} (attempt {entry.attempts}): {error_msg}")
+        db.commit()
+
+    return len(entries)
 
 
 def _create_email_template(
@@ -204,7 +316,8 @@ def send_admin_verification_email(
     email: str, 
     frontend_route: str, 
     code: str, 
-    first_name: str
+    first_name: str, 
+    db=None
 ) -> bool:
     """
     Send verification email to admin for password reset.
@@ -216,7 +329,7 @@ def send_admin_verification_email(
         first_name: Admin's first name
         
     Returns:
-        bool: True if email sent successfully, False otherwise
+        bool: True if email queued successfully, False otherwise
     """
     verification_link = f"{settings.FRONTEND_URL}/{frontend_route}/?code={code}&first_name={first_name}"
     
@@ -231,7 +344,8 @@ def send_admin_verification_email(
     return _send_email(
         email=email,
         subject="Bercerita KIRA - Password Reset",
-        body_html=body_html
+        body_html=body_html,
+        db=db
     )
 
 
@@ -242,7 +356,8 @@ def send_admin_invite_email(
     user_id: str, 
     school_id: str, 
     first_name: str, 
-    last_name: str
+    last_name: str, 
+    db=None
 ) -> bool:
     """
     Send invitation email to new admin.
@@ -257,7 +372,7 @@ def send_admin_invite_email(
         last_name: Admin's last name
         
     Returns:
-        bool: True if email sent successfully, False otherwise
+        bool: True if email queued successfully, False otherwise
     """
     verification_link = f"{settings.FRONTEND_URL}/{frontend_route}/?code={code}"
     
@@ -278,7 +393,8 @@ def send_admin_invite_email(
     return _send_email(
         email=email,
         subject="Bercerita KIRA - School Admin Registration",
-        body_html=body_html
+        body_html=body_html,
+        db=db
     )
 
 
@@ -287,7 +403,8 @@ def send_reset_request_to_admin(
     email: str, 
     username: str, 
     school_id: str, 
-    first_name: str
+    first_name: str, 
+    db=None
 ) -> bool:
     """
     Send notification to admin about student password reset request.
@@ -300,7 +417,7 @@ def send_reset_request_to_admin(
         first_name: Student's first name
         
     Returns:
-        bool: True if email sent successfully, False otherwise
+        bool: True if email queued successfully, False otherwise
     """
     verification_link = f"{settings.FRONTEND_URL}/{frontend_route}?email={email}&username={username}"
     
@@ -321,12 +438,14 @@ def send_reset_request_to_admin(
     return _send_email(
         email=email,
         subject="Bercerita KIRA - Student Password Reset",
-        body_html=body_html
+        body_html=body_html,
+        db=db
     )
 
 def send_upload_notification(
     email: str, 
-    file_name: str
+    file_name: str, 
+    db=None
 ) -> bool:
     """
     Send notification email to new admin.
@@ -336,7 +455,7 @@ def send_upload_notification(
         file_name: file_name
         
     Returns:
-        bool: True if email sent successfully, False otherwise
+        bool: True if email queued successfully, False otherwise
     """
     verification_link = f"{settings.FRONTEND_URL}/login"
     
@@ -354,17 +473,18 @@ def send_upload_notification(
     return _send_email(
         email=email,
         subject="Bercerita KIRA - Content Uploaded",
-        body_html=body_html
+        body_html=body_html,
+        db=db
     )
 
-def send_ready_notification(email: str): 
+def send_ready_notification(email: str, db=None): 
     """
     Send ready notification email to new admin.
     
     Args:
         email: 
     Returns:
-        bool: True if email sent successfully, False otherwise
+        bool: True if email queued successfully, False otherwise
     """
     verification_link = f"{settings.FRONTEND_URL}/login"
     
@@ -380,17 +500,18 @@ def send_ready_notification(email: str):
     return _send_email(
         email=email,
         subject="Bercerita KIRA - Quiz Ready",
-        body_html=body_html
+        body_html=body_html,
+        db=db
     )
 
-def send_quiz_published(email: str): 
+def send_quiz_published(email: str, db=None): 
     """
     Send quiz publisheds notification email to new admin.
     
     Args:
         email: 
     Returns:
-        bool: True if email sent successfully, False otherwise
+        bool: True if email queued successfully, False otherwise
     """
     verification_link = f"{settings.FRONTEND_URL}/login"
     
@@ -406,5 +527,6 @@ def send_quiz_published(email: str):
     return _send_email(
         email=email,
         subject="Bercerita KIRA - Quiz Publish",
-        body_html=body_html
+        body_html=body_html,
+        db=db
     )
\ No newline at end of file
@@ -5,8 +5,9 @@ from app.model.achievements import *
 from app.model.user_achievements import *
 from app.model.attempts import *
 from app.database.db import get_async_db
+from app.router.events import publish_user_event
 from app.database.session import SQLALCHEMY_DATABASE_URL
-from sqlalchemy import func, select
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import Session, joinedload
 from datetime import datetime
 
@@ -14,7 +15,16 @@ from datetime import datetime
 ### Achievement ###
 ###################
 
-async def check_achievement_and_award(user_id: str): 
+async def _add_points(db, user_id: str, amount: int) -> None:
+    """Add to the user's points in one UPDATE; a read-modify-write would overwrite a concurrent submission's points."""
+    await db.execute(
+        update(Points).where(Points.user_id == user_id).values(points=Points.points + amount)
+    )
+
+async def check_achievement_and_award(user_id: str) -> int: 
+    """Award every achievement the user has unlocked; returns the points they were given."""
+    awarded = 0
+    unlocked = []
     async with get_async_db() as db:
         try:
         # fetch achievement info
@@ -47,10 +57,6 @@ async def check_achievement_and_award(user_id: str):
                 )
                 temp = attempts_result.scalars().all()
                 
-                points_result = await db.execute(
-                    select(Points).filter(Points.user_id == user_id)
-                )
-                points = points_result.scalar_one_or_none()
                 if len(temp) > 0:  
                     new_achievement = UserAchievement(
                         user_id=user_id,
@@ -58,9 +64,11 @@ async def check_achievement_and_award(user_id: str):
                         completed_at=datetime.now(), 
                         view_count=0
                     )
-                    points.points += 10
+                    await _add_points(db, user_id, 10)
+                    awarded += 10
                     db.add(new_achievement)
                     await db.commit() 
+                    unlocked.append(new_achievement.achievement_id)
                     db.refresh(new_achievement)
                     
             ############## DONE!
@@ -73,10 +81,6 @@ async def check_achievement_and_award(user_id: str):
                 )
                 temp = attempts_result.scalars().all()
                 
-                points_result = await db.execute(
-                    select(Points).filter(Points.user_id == user_id)
-                )
-                points = points_result.scalar_one_or_none()
                 if len(temp) >= 10: 
                     new_achievement = UserAchievement(
                         user_id = user_id,
@@ -84,9 +88,11 @@ async def check_achievement_and_award(user_id: str):
                         completed_at = datetime.now(), 
                         view_count = 0
                     )
-                    points.points += 50
+                    await _add_points(db, user_id, 50)
+                    awarded += 50
                     db.add(new_achievement)
                     await db.commit() 
+                    unlocked.append(new_achievement.achievement_id)
                     db.refresh(new_achievement)
 
             ##############
@@ -99,11 +105,6 @@ async def check_achievement_and_award(user_id: str):
                 )
                 temp = attempts_result.scalars().all()
                 
-                points_result = await db.execute(
-                    select(Points).filter(Points.user_id == user_id)
-                )
-                points = points_result.scalar_one_or_none()
-                
                 for atm in temp: 
                     if(atm.fail_count == 0): 
                         new_achievement = UserAchievement(
@@ -112,9 +113,11 @@ async def check_achievement_and_award(user_id: str):
                             completed_at = datetime.now(), 
                             view_count = 0
                         )
-                        points.points += 15
+                        await _add_points(db, user_id, 15)
+                        awarded += 15
                         db.add(new_achievement)
                         await db.commit() 
+                        unlocked.append(new_achievement.achievement_id)
                         db.refresh(new_achievement)
                         break
 
@@ -149,9 +152,11 @@ async def check_achievement_and_award(user_id: str):
                             completed_at = datetime.now(), 
                             view_count = 0
                         )
-                    points.points += 50
+                    await _add_points(db, user_id, 50)
+                    awarded += 50
                     db.add(new_achievement)
                     await db.commit() 
+                    unlocked.append(new_achievement.achievement_id)
                     db.refresh(new_achievement)
 
 
@@ -180,9 +185,11 @@ async def check_achievement_and_award(user_id: str):
                             completed_at = datetime.now(), 
                             view_count = 0
                         )
-                    points.points += 50
+                    await _add_points(db, user_id, 50)
+                    awarded += 50
                     db.add(new_achievement)
                     await db.commit() 
+                    unlocked.append(new_achievement.achievement_id)
                     db.refresh(new_achievement)
 
             ##############
@@ -194,11 +201,6 @@ async def check_achievement_and_award(user_id: str):
                     select(Attempt).filter(Attempt.user_id == user_id)
                 )
                 temp = attempts_result.scalars().all()
-                
-                points_result = await db.execute(
-                    select(Points).filter(Points.user_id == user_id)
-                )
-                points = points_result.scalar_one_or_none()
 
                 perfect_count = 0 
 
@@ -210,9 +212,11 @@ async def check_achievement_and_award(user_id: str):
                             completed_at = datetime.now(), 
                             view_count = 0
                         )
-                        points.points += 20
+                        await _add_points(db, user_id, 20)
+                        awarded += 20
                         db.add(new_achievement)
                         await db.commit() 
+                        unlocked.append(new_achievement.achievement_id)
                         db.refresh(new_achievement)
                         break
                     if atm.fail_count == 0: 
@@ -228,10 +232,6 @@ async def check_achievement_and_award(user_id: str):
                 )
                 temp = attempts_result.scalars().all()
                 
-                points_result = await db.execute(
-                    select(Points).filter(Points.user_id == user_id)
-                )
-                points = points_result.scalar_one_or_none()
                 for atm in temp: 
                     if(atm.attempt_number == 2): 
                         new_achievement = UserAchievement(
@@ -240,12 +240,17 @@ async def check_achievement_and_award(user_id: str):
                                 completed_at = datetime.now(), 
                                 view_count = 0
                             )
-                        points.points += 5
+                        await _add_points(db, user_id, 5)
+                        awarded += 5
                         db.add(new_achievement)
                         await db.commit() 
+                        unlocked.append(new_achievement.achievement_id)
                         db.refresh(new_achievement)
                         break
 
         except Exception as e:
             # Log the error but don't re-raise to prevent breaking the background task
-            print(f"Error checking achievements for user {user_id}: {e}")
\ No newline at end of file
+            print(f"Error checking achievements for user {user_id}: {e}")
+    if unlocked:
+        publish_user_event(user_id, "achievements", {"achievement_ids": unlocked})
+    return awarded
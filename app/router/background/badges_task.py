@@ -6,6 +6,7 @@ from app.model.achievements import *
 from app.model.user_achievements import *
 from app.model.attempts import *
 from app.database.db import get_async_db
+from app.router.events import publish_user_event
 from app.database.session import SQLALCHEMY_DATABASE_URL
 from sqlalchemy import func, select
 from sqlalchemy.orm import Session, joinedload
@@ -43,6 +44,7 @@ async def check_and_award_badges(user_id: str):
 
             print(badge_info_dict)
             # Determine which badges to award
+            new_badge_ids = []
             for badge_id, points_required in badge_info_dict.items():
                 if user_points >= points_required and badge_id not in user_badge_ids:
                     db.add(UserBadge(
@@ -51,8 +53,11 @@ async def check_and_award_badges(user_id: str):
                             earned_at=func.now(),
                             view_count=0
                         ))
+                    new_badge_ids.append(badge_id)
                     
             await db.commit()
+            if new_badge_ids:
+                publish_user_event(user_id, "badges", {"badge_ids": new_badge_ids})
         except Exception as e:
             # Log the error but don't re-raise to prevent breaking the background task
             print(f"Error checking badges for user {user_id}: {e}")
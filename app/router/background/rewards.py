@@ -0,0 +1,89 @@
+import redis
+from fastapi import BackgroundTasks
+from sqlalchemy import select
+
+from app.celery_app import celery_app
+from app.config import settings
+from app.database.db import get_async_db
+from app.database.replicas import mark_user_wrote
+from app.log import get_logger
+from app.model.users import User
+from app.router import leaderboard
+from app.router.background.achievement_task import check_achievement_and_award
+from app.router.background.badges_task import check_and_award_badges
+from app.router.cache import get_redis, invalidate_user
+
+log = get_logger(__name__)
+
+##############
+### reward ###
+##############
+
+# Rewards are evaluated by the Celery worker (app.tasks.process_user_rewards).
+# A Redis marker per user coalesces submissions: only the first one in
+# REWARDS_COALESCE_SECONDS enqueues a task, delayed by that window. The task
+# clears the marker before reading anything, so a submission committed after
+# the clear enqueues a new task and one committed before it is seen.
+
+PENDING_KEY_PREFIX = "rewards:pending"
+# a lost task must not block the user's rewards forever
+PENDING_TTL_SECONDS = 600
+
+
+def pending_key(user_id: str) -> str:
+    return f"{PENDING_KEY_PREFIX}:{user_id}"
+
+
+async def evaluate_rewards(user_id: str):
+    """Award every achievement and badge the user has earned; safe to run repeatedly."""
+    try:
+        awarded = await check_achievement_and_award(user_id)
+        if awarded:
+            async with get_async_db() as db:
+                student = (await db.execute(
+                    select(User.school_id, User.grade).where(User.user_id == user_id)
+                )).first()
+            if student is not None:
+                leaderboard.add_points(user_id, student.school_id, student.grade, awarded)
+        await check_and_award_badges(user_id)
+    finally:
+        # new badges / achievements show up in /users/summary
+        invalidate_user(user_id)
+        mark_user_wrote(user_id)
+
+
+def schedule_rewards(user_id: str, background_tasks: BackgroundTasks) -> None:
+    """
+    Queue reward evaluation for a user after a submission was committed.
+
+    Falls back to evaluating in this process (after the response) if the
+    broker is unreachable, so rewards are late rather than lost.
+
+    Args:
+        user_id: The user who submitted
+        background_tasks: The request's BackgroundTasks, used only for the fallback
+    """
+    try:
+        if not get_redis().set(pending_key(user_id), 1, nx=True, ex=PENDING_TTL_SECONDS):
+            return  # a task is already waiting and will see this submission
+    except redis.RedisError as e:
+        log.warning(f"Reward coalescing unavailable for {user_id}: {e}")
+
+    try:
+        # no retries and no result subscription: a dead broker must fail fast, not stall the request
+        with celery_app.connection_for_write(transport_options={"max_retries": 0}) as conn:
+            celery_app.send_task(
+                "app.tasks.process_user_rewards",
+                args=[user_id],
+                countdown=settings.REWARDS_COALESCE_SECONDS,
+                connection=conn,
+                retry=False,
+                ignore_result=True,
+            )
+    except Exception as e:
+        log.error(f"Could not queue rewards for {user_id}, evaluating in process: {e}")
+        try:
+            get_redis().delete(pending_key(user_id))
+        except redis.RedisError:
+            pass
+        background_tasks.add_task(evaluate_rewards, user_id)
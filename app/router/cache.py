@@ -0,0 +1,144 @@
+import json
+import threading
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import redis
+
+from app.config import settings
+from app.log import get_logger
+
+log = get_logger(__name__)
+
+# Response cache shared by all web replicas.
+#
+# Entries are keyed by (endpoint, school_id or user_id) plus the current version
+# of the school's / user's tag and of the global tag. Invalidating bumps a tag
+# version, which orphans every entry built on the old version; orphans expire
+# through their TTL.
+# Any Redis error falls back to computing the response, the cache never fails a request.
+
+KEY_PREFIX = "cache"
+GLOBAL_TAG = "global"
+STATS_KEY = f"{KEY_PREFIX}:stats"
+
+_client: Optional[redis.Redis] = None
+_client_lock = threading.Lock()
+
+
+def get_redis() -> redis.Redis:
+    """Return the process-wide Redis client (REDIS_URL, or the Celery broker if unset)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = redis.Redis.from_url(
+                    settings.REDIS_URL or settings.CELERY_BROKER_URL,
+                    decode_responses=True,
+                    socket_timeout=0.5,
+                    socket_connect_timeout=0.5,
+                    health_check_interval=30,
+                )
+    return _client
+
+
+def school_tag(school_id: str) -> str:
+    return f"school:{school_id}"
+
+
+def user_tag(user_id: str) -> str:
+    return f"user:{user_id}"
+
+
+def _tag_key(tag: str) -> str:
+    return f"{KEY_PREFIX}:tag:{tag}"
+
+
+def _count(endpoint: str, outcome: str) -> None:
+    try:
+        get_redis().hincrby(STATS_KEY, f"{endpoint}:{outcome}", 1)
+    except redis.RedisError:
+        pass
+
+
+def _cached(endpoint: str, scope: str, tags: Sequence[str], compute: Callable[[], Any], ttl: int) -> Any:
+    client = get_redis()
+
+    key = None
+    try:
+        versions = client.mget(*[_tag_key(tag) for tag in tags])
+        key = f"{KEY_PREFIX}:{endpoint}:{scope}:" + ".".join(str(v or 0) for v in versions)
+        cached = client.get(key)
+        if cached is not None:
+            _count(endpoint, "hit")
+            return json.loads(cached)
+    except redis.RedisError as e:
+        log.warning(f"Cache read failed for {endpoint}: {e}")
+
+    _count(endpoint, "miss")
+    value = compute()
+
+    if key is not None:
+        try:
+            client.set(key, json.dumps(value, default=str), ex=ttl)
+        except redis.RedisError as e:
+            log.warning(f"Cache write failed for {endpoint}: {e}")
+    return value
+
+
+def cached_response(endpoint: str, school_id: str, compute: Callable[[], Any], ttl: Optional[int] = None) -> Any:
+    """
+    Return the cached response for (endpoint, school_id), computing and storing it on a miss.
+
+    Args:
+        endpoint: Name of the endpoint, part of the cache key
+        school_id: School the response belongs to
+        compute: Builds the response; must return something JSON serializable
+        ttl: Seconds to keep the entry, settings.ANALYTICS_CACHE_TTL_SECONDS by default
+
+    Returns:
+        The cached or freshly computed response
+    """
+    return _cached(
+        endpoint, school_id, [GLOBAL_TAG, school_tag(school_id)], compute,
+        ttl or settings.ANALYTICS_CACHE_TTL_SECONDS,
+    )
+
+
+def cached_user_response(endpoint: str, user_id: str, compute: Callable[[], Any], ttl: int) -> Any:
+    """Same as cached_response, for data that belongs to one user (invalidated with invalidate_user)."""
+    return _cached(endpoint, user_id, [GLOBAL_TAG, user_tag(user_id)], compute, ttl)
+
+
+def invalidate(*tags: str) -> None:
+    """
+    Invalidate every entry built on one of the given tags.
+
+    Args:
+        tags: school_tag(school_id) / user_tag(user_id) for one school or user, GLOBAL_TAG for everything
+    """
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for tag in tags:
+            pipe.incr(_tag_key(tag))
+        pipe.execute()
+    except redis.RedisError as e:
+        log.warning(f"Cache invalidation failed for {tags}: {e}")
+
+
+def invalidate_school(school_id: Optional[str]) -> None:
+    if school_id is not None:
+        invalidate(school_tag(school_id))
+
+
+def invalidate_user(user_id: Optional[str]) -> None:
+    if user_id is not None:
+        invalidate(user_tag(user_id))
+
+
+def get_cache_stats() -> Dict[str, int]:
+    """Hit/miss counters per endpoint, e.g. {"quiz-stats:hit": 12, "quiz-stats:miss": 3}."""
+    try:
+        return {k: int(v) for k, v in get_redis().hgetall(STATS_KEY).items()}
+    except redis.RedisError as e:
+        log.warning(f"Cache stats unavailable: {e}")
+        return {}
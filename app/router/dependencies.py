@@ -1,4 +1,6 @@
-from typing import Tuple, Union
+import base64
+import json
+from typing import Any, Generator, List, Optional, Tuple, Union
 
 from fastapi import Depends, Query, status, HTTPException, Security
 from fastapi.security import OAuth2PasswordBearer
@@ -8,6 +10,7 @@ from sqlalchemy.orm import Session
 
 from app.config import settings
 from app.database import get_db
+from app.database.replicas import replica_session_factory
 from app.model.users import User
 from app.schema.auth_schema import TokenPayload
 
@@ -21,6 +24,40 @@ def get_pagination_params(
     return skip, limit
 
 
+def encode_cursor(*values: Any) -> str:
+    """Opaque cursor for keyset pagination: the sort key of the last row returned."""
+    raw = json.dumps(list(values), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], length: int) -> Optional[List[Any]]:
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != length:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return values
+
+
+def get_cursor_params(
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: Optional[int] = Query(None, gt=0, le=500, description="page size; everything when omitted"),
+) -> Tuple[Optional[str], Optional[int]]:
+    return cursor, limit
+
+
+def get_fields_param(
+    fields: Optional[str] = Query(None, description="comma separated list of fields to return"),
+) -> Optional[List[str]]:
+    if not fields:
+        return None
+    return [f.strip() for f in fields.split(",") if f.strip()]
+
+
 def get_token_from_any_scheme(
     token_ada: Union[str, None] = Security(oauth2_scheme_ada),
     token_stu: Union[str, None] = Security(oauth2_scheme_stu),
@@ -45,6 +82,27 @@ def get_token(token: str = Depends(get_token_from_any_scheme)) -> TokenPayload:
     return token_data
 
 
+def get_read_db(
+    db: Session = Depends(get_db), token: TokenPayload = Depends(get_token)
+) -> Generator[Session, None, None]:
+    """
+    Read-only session for heavy GET endpoints; may be served by a replica.
+
+    Users who wrote recently stay on the primary so they see their own changes.
+    On the primary this is the request's get_db session, so a request never
+    holds two connections from the primary pool.
+    """
+    factory = replica_session_factory(token.sub)
+    if factory is None:
+        yield db
+        return
+    replica_db = factory()
+    try:
+        yield replica_db
+    finally:
+        replica_db.close()
+
+
 def get_current_user(
     db: Session = Depends(get_db), token: TokenPayload = Depends(get_token)
 ) -> User:
@@ -0,0 +1,140 @@
+import asyncio
+import json
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Set
+
+import redis
+import redis.asyncio as aioredis
+from fastapi import Request
+
+from app.config import settings
+from app.log import get_logger
+from app.router.cache import get_redis
+
+log = get_logger(__name__)
+
+# Server-sent events: per user (badge / achievement unlocks) and per school
+# (topic pipeline progress, see app/router/topic_progress.py).
+#
+# Publishers (reward tasks, the content worker, any process) PUBLISH to
+# events:user:{user_id} / events:school:{school_id}. Every web process holds one
+# pattern subscription to events:* and hands each message to the SSE streams of
+# that channel connected to it, so the number of Redis connections doesn't grow
+# with the number of connected clients.
+# Delivery is best effort: events published while a client is disconnected are
+# lost, clients catch up through a regular GET when they reconnect.
+
+CHANNEL_PREFIX = "events"
+HEARTBEAT_SECONDS = 15
+# events a slow client may fall behind before new ones are dropped for it
+QUEUE_SIZE = 100
+
+
+def user_channel(user_id: str) -> str:
+    return f"{CHANNEL_PREFIX}:user:{user_id}"
+
+
+def school_channel(school_id: str) -> str:
+    return f"{CHANNEL_PREFIX}:school:{school_id}"
+
+
+def _publish(channel: str, event: str, data: Any) -> None:
+    try:
+        get_redis().publish(channel, json.dumps({"event": event, "data": data}, default=str))
+    except redis.RedisError as e:
+        log.warning(f"Could not publish {event} event on {channel}: {e}")
+
+
+def publish_user_event(user_id: str, event: str, data: Any) -> None:
+    """
+    Send an event to every open /users/events stream of the user.
+
+    Args:
+        user_id: Recipient
+        event: SSE event name, e.g. "badges"
+        data: JSON serializable payload
+    """
+    _publish(user_channel(user_id), event, data)
+
+
+def publish_school_event(school_id: str, event: str, data: Any) -> None:
+    """Send an event to every open stream of the school's admins (same arguments as publish_user_event)."""
+    _publish(school_channel(school_id), event, data)
+
+
+class _EventHub:
+    def __init__(self):
+        self.queues: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self.listener: Optional[asyncio.Task] = None
+
+    async def _listen(self):
+        client = aioredis.Redis.from_url(settings.REDIS_URL or settings.CELERY_BROKER_URL, decode_responses=True)
+        while True:
+            pubsub = client.pubsub()
+            try:
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}:*")
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    for queue in list(self.queues.get(message["channel"], ())):
+                        try:
+                            queue.put_nowait(message["data"])
+                        except asyncio.QueueFull:
+                            pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning(f"Event subscription lost, reconnecting: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    def subscribe(self, channel: str) -> asyncio.Queue:
+        if self.listener is None or self.listener.done():
+            self.listener = asyncio.get_running_loop().create_task(self._listen())
+        queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.queues[channel].add(queue)
+        return queue
+
+    def unsubscribe(self, channel: str, queue: asyncio.Queue) -> None:
+        queues = self.queues.get(channel)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.queues[channel]
+
+
+_hub = _EventHub()
+
+
+def _format(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def event_stream(request: Request, channel: str, initial: Iterable[tuple] = ()) -> AsyncIterator[str]:
+    """
+    SSE body for one channel: the (event, data) pairs in `initial`, then events
+    as they are published, and a comment line every HEARTBEAT_SECONDS so
+    proxies keep the connection open.
+    """
+    queue = _hub.subscribe(channel)
+    try:
+        yield "retry: 5000\n\n"
+        for event, data in initial:
+            yield _format(event, data)
+        while True:
+            try:
+                raw = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keep-alive\n\n"
+                continue
+            message = json.loads(raw)
+            yield _format(message["event"], message["data"])
+    finally:
+        _hub.unsubscribe(channel, queue)
+
+
+def user_event_stream(request: Request, user_id: str) -> AsyncIterator[str]:
+    return event_stream(request, user_channel(user_id))
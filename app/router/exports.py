@@ -0,0 +1,221 @@
+import csv
+import io
+import tempfile
+from typing import Any, BinaryIO, Iterator, List, Sequence
+
+from sqlalchemy import select, func, cast, Boolean, DateTime, Float, Integer
+from sqlalchemy.sql import Select
+
+from app.database.replicas import read_session_factory
+from app.model.analytics import Analytics
+from app.model.attempts import Attempt
+from app.model.chats import ChatSession
+from app.model.points import Points
+from app.model.quiz_user_scores import QuizUserScore
+from app.model.quizzes import Quiz
+from app.model.streaks import Streak
+from app.model.users import User
+
+# School data exports. Rows are read through a server-side cursor in chunks of
+# EXPORT_CHUNK_SIZE, so memory stays flat no matter how large the school is.
+
+EXPORT_CHUNK_SIZE = 2000
+STREAM_CHUNK_BYTES = 1024 * 1024
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def _attempts_query(school_id: str) -> Select:
+    """One row per quiz attempt of the school's students."""
+    return (
+        select(
+            User.user_id,
+            User.username,
+            User.first_name,
+            User.last_name,
+            User.grade,
+            Attempt.quiz_id,
+            Quiz.name.label("quiz_name"),
+            Attempt.attempt_number,
+            Attempt.pass_count,
+            Attempt.fail_count,
+            Attempt.start_at,
+            Attempt.end_at,
+        )
+        .join(Quiz, Quiz.quiz_id == Attempt.quiz_id)
+        .join(User, User.user_id == Attempt.user_id)
+        .where(Quiz.school_id == school_id)
+        .order_by(Attempt.attempt_id)
+    )
+
+
+def _students_query(school_id: str) -> Select:
+    """One row per student with points, streak, latest-attempt score, chat usage and engagement time."""
+    scores = (
+        select(
+            QuizUserScore.user_id,
+            func.count().label("quizzes_taken"),
+            cast(
+                func.avg(
+                    cast(QuizUserScore.pass_count, Float)
+                    / func.nullif(QuizUserScore.pass_count + QuizUserScore.fail_count, 0)
+                ),
+                Float,
+            ).label("mean_score"),
+        )
+        .where(QuizUserScore.school_id == school_id)
+        .group_by(QuizUserScore.user_id)
+        .subquery()
+    )
+    chats = (
+        select(
+            ChatSession.user_id,
+            func.count().label("chat_sessions"),
+            cast(
+                func.sum(func.extract("epoch", ChatSession.ended_at - ChatSession.created_at)), Float
+            ).label("chat_seconds"),
+        )
+        .join(User, User.user_id == ChatSession.user_id)
+        .where(User.school_id == school_id, ChatSession.ended_at.isnot(None))
+        .group_by(ChatSession.user_id)
+        .subquery()
+    )
+    return (
+        select(
+            User.user_id,
+            User.username,
+            User.first_name,
+            User.last_name,
+            User.grade,
+            User.created_at,
+            User.last_login_time,
+            User.deactivated,
+            func.coalesce(Points.points, 0).label("points"),
+            func.coalesce(Streak.current_streak, 0).label("current_streak"),
+            func.coalesce(scores.c.quizzes_taken, 0).label("quizzes_taken"),
+            scores.c.mean_score,
+            func.coalesce(chats.c.chat_sessions, 0).label("chat_sessions"),
+            func.coalesce(chats.c.chat_seconds, 0.0).label("chat_seconds"),
+            func.coalesce(Analytics.engagement_time_ms, 0).label("engagement_time_ms"),
+        )
+        .outerjoin(Points, Points.user_id == User.user_id)
+        .outerjoin(Streak, Streak.user_id == User.user_id)
+        .outerjoin(scores, scores.c.user_id == User.user_id)
+        .outerjoin(chats, chats.c.user_id == User.user_id)
+        .outerjoin(Analytics, Analytics.user_id == User.user_id)
+        .where(User.school_id == school_id, User.is_admin == False)
+        .order_by(User.user_id)
+    )
+
+
+EXPORT_DATASETS = {
+    "attempts": _attempts_query,
+    "students": _students_query,
+}
+
+
+def iter_export_rows(dataset: str, school_id: str, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[Sequence[Any]]:
+    """
+    Yield the column names, then chunks of rows, for a dataset of one school.
+
+    Opens its own session: a StreamingResponse body runs after the request's
+    get_db session is already closed. Reads go to a replica when one is healthy.
+
+    Yields:
+        First the list of column names, then lists of row tuples of at most chunk_size rows
+    """
+    stmt = EXPORT_DATASETS[dataset](school_id)
+    db = read_session_factory()()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=chunk_size))
+        yield list(result.keys())
+        for partition in result.partitions():
+            yield [tuple(row) for row in partition]
+    finally:
+        db.close()
+
+
+def stream_csv(dataset: str, school_id: str) -> Iterator[bytes]:
+    """Encode the dataset as CSV, one chunk of bytes per cursor partition."""
+    rows = iter_export_rows(dataset, school_id)
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(next(rows))
+    for chunk in rows:
+        writer.writerows(chunk)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def _arrow_schema(dataset: str):
+    """Build the Parquet schema from the SQL column types, so all row groups agree even when a chunk is all NULL."""
+    import pyarrow as pa
+
+    fields = []
+    for column in EXPORT_DATASETS[dataset]("").selected_columns:
+        if isinstance(column.type, Boolean):
+            arrow_type = pa.bool_()
+        elif isinstance(column.type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(column.type, Float):
+            arrow_type = pa.float64()
+        elif isinstance(column.type, DateTime):
+            arrow_type = pa.timestamp("us")
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column.key, arrow_type))
+    return pa.schema(fields)
+
+
+def write_parquet(dataset: str, school_id: str, fileobj: BinaryIO) -> None:
+    """
+    Write the dataset as Parquet, one row group per cursor partition.
+
+    Raises:
+        ImportError: pyarrow is not installed
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(dataset)
+    rows = iter_export_rows(dataset, school_id)
+    columns: List[str] = next(rows)
+    with pq.ParquetWriter(fileobj, schema) as writer:
+        for chunk in rows:
+            writer.write_table(pa.Table.from_pylist([dict(zip(columns, row)) for row in chunk], schema=schema))
+
+
+def stream_parquet(dataset: str, school_id: str) -> Iterator[bytes]:
+    """
+    Stream the dataset as Parquet.
+
+    Parquet's footer is only known at the end, so the file is written to a
+    spooled temp file (spills to disk past 8MB) and then sent in chunks.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as f:
+        write_parquet(dataset, school_id, f)
+        f.seek(0)
+        while chunk := f.read(STREAM_CHUNK_BYTES):
+            yield chunk
+
+
+def write_export(dataset: str, fmt: str, school_id: str, fileobj: BinaryIO) -> None:
+    """Write a full export to a binary file object (used by the background export job)."""
+    if fmt == "parquet":
+        write_parquet(dataset, school_id, fileobj)
+        return
+    for chunk in stream_csv(dataset, school_id):
+        fileobj.write(chunk)
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+        return True
+    except ImportError:
+        return False
@@ -0,0 +1,68 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+# Conditional GET for polling clients.
+#
+# The ETag is a hash of the response body, so it is always correct but still
+# needs the query; what it saves is serialization on the client and the bytes
+# on the wire. Last-Modified is only honored when the caller knows the listing
+# can't change without that timestamp moving (insert-only data).
+
+
+def _etag_value(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def _to_utc(value: datetime) -> datetime:
+    # timestamps in the DB are naive server time, which is UTC in every deployment
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def conditional_json_response(
+    request: Request,
+    payload: Any,
+    last_modified: Optional[datetime] = None,
+) -> Response:
+    """
+    Serialize payload to JSON with ETag / Last-Modified headers, or answer 304 if the client's copy is current.
+
+    If-None-Match takes precedence over If-Modified-Since, as in RFC 9110.
+
+    Args:
+        request: Incoming request, for the conditional headers
+        payload: Anything jsonable_encoder accepts (pydantic models, dicts, lists)
+        last_modified: Newest change time of the listed data, if it is meaningful
+
+    Returns:
+        200 JSON response, or an empty 304 with the same validators
+    """
+    body = json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode("utf-8")
+    etag = f'W/"{hashlib.sha1(body).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if last_modified is not None:
+        last_modified = _to_utc(last_modified)
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [_etag_value(t) for t in if_none_match.split(",")]
+        if "*" in tags or _etag_value(etag) in tags:
+            return Response(status_code=304, headers=headers)
+    elif last_modified is not None and request.headers.get("if-modified-since"):
+        try:
+            since = parsedate_to_datetime(request.headers["if-modified-since"])
+        except (TypeError, ValueError):
+            since = None
+        if since is not None and last_modified <= _to_utc(since):
+            return Response(status_code=304, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,106 @@
+import asyncio
+import io
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from PIL import Image
+
+# name -> (max width in px, PIL format, quality)
+# thumbnails are used in lists, mobile is what students download in the quiz screen
+VARIANTS = {
+    "thumbnail": (320, "WEBP", 70),
+    "mobile": (720, "WEBP", 80),
+}
+
+CONTENT_TYPES = {
+    "PNG": "image/png",
+    "WEBP": "image/webp",
+    "JPEG": "image/jpeg",
+}
+
+EXTENSIONS = {
+    "PNG": "png",
+    "WEBP": "webp",
+    "JPEG": "jpg",
+}
+
+CLOUD_FRONT_DOMAIN = "https://d2xd0f87o85q75.cloudfront.net"
+S3_PREFIX = "https://kira-school-content.s3.amazonaws.com"
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Lazily create the process pool so importing this module stays cheap."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=2)
+    return _pool
+
+
+def build_variants(image_bytes: bytes) -> Dict[str, Tuple[bytes, str, str]]:
+    """
+    Decode an image once and encode the full-size PNG plus every resized variant.
+
+    Runs inside the process pool, so it must stay a plain top-level function.
+
+    Args:
+        image_bytes: Raw image bytes as returned by the image model
+
+    Returns:
+        dict of variant name -> (encoded bytes, content type, file extension).
+        The "full" entry is always present.
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+    image.load()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA")
+
+    results = {}
+
+    buf = io.BytesIO()
+    image.save(buf, format="PNG", optimize=True)
+    results["full"] = (buf.getvalue(), CONTENT_TYPES["PNG"], EXTENSIONS["PNG"])
+
+    for name, (max_width, fmt, quality) in VARIANTS.items():
+        resized = image.copy()
+        # thumbnail() keeps the aspect ratio and never upscales
+        resized.thumbnail((max_width, max_width * 4), Image.LANCZOS)
+        if fmt == "JPEG" and resized.mode == "RGBA":
+            resized = resized.convert("RGB")
+
+        buf = io.BytesIO()
+        if fmt == "WEBP":
+            resized.save(buf, format=fmt, quality=quality, method=4)
+        else:
+            resized.save(buf, format=fmt, quality=quality, optimize=True)
+        results[name] = (buf.getvalue(), CONTENT_TYPES[fmt], EXTENSIONS[fmt])
+
+    return results
+
+
+async def build_variants_async(image_bytes: bytes) -> Dict[str, Tuple[bytes, str, str]]:
+    """Run build_variants in the process pool so PIL encoding doesn't block the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_pool(), build_variants, image_bytes)
+
+
+def variant_filename(base: str, name: str, extension: str) -> str:
+    """
+    Build the S3 filename for a variant, e.g. t12/q34.png -> t12/q34_mobile.webp
+
+    Args:
+        base: Filename without extension, e.g. "t12/q34"
+        name: Variant name ("full" keeps the base name)
+        extension: File extension without the dot
+    """
+    if name == "full":
+        return f"{base}.{extension}"
+    return f"{base}_{name}.{extension}"
+
+
+def to_cloud_front_url(s3_url: Optional[str]) -> Optional[str]:
+    """Map an S3 object URL to the CloudFront URL serving the same key."""
+    if not s3_url:
+        return None
+    return s3_url.replace(S3_PREFIX, CLOUD_FRONT_DOMAIN)
@@ -0,0 +1,211 @@
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import redis
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.log import get_logger
+from app.model.points import Points
+from app.model.users import User
+from app.router.cache import get_redis
+
+log = get_logger(__name__)
+
+# Leaderboards are Redis sorted sets of user_id -> points, one per school and
+# one per (school, grade), kept up to date with ZINCRBY whenever points change.
+# Postgres stays the source of truth: a failed Redis write is only logged, and
+# rebuild_leaderboards (script/rebuild_leaderboards.py, nightly beat task)
+# reloads the sets and repairs any drift.
+
+KEY_PREFIX = "lb"
+REBUILD_BATCH_SIZE = 5000
+# temporary rebuild keys expire on their own if a rebuild dies before cleaning up
+REBUILD_TEMP_TTL_SECONDS = 3600
+
+
+def school_key(school_id: str) -> str:
+    return f"{KEY_PREFIX}:school:{school_id}"
+
+
+def grade_key(school_id: str, grade: str) -> str:
+    return f"{KEY_PREFIX}:grade:{school_id}:{grade}"
+
+
+def board_keys(school_id: Optional[str], grade: Optional[str]) -> List[str]:
+    """Keys of every leaderboard a student of school_id / grade appears on."""
+    if school_id is None:
+        return []
+    keys = [school_key(school_id)]
+    if grade:
+        keys.append(grade_key(school_id, grade))
+    return keys
+
+
+def add_points(user_id: str, school_id: Optional[str], grade: Optional[str], delta: int) -> None:
+    """
+    Add a points change to the user's leaderboards; call after the change is committed.
+
+    Args:
+        user_id: The student
+        school_id: The student's school
+        grade: The student's grade, may be None
+        delta: Points gained
+    """
+    keys = board_keys(school_id, grade)
+    if not keys or not delta:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for key in keys:
+            pipe.zincrby(key, delta, user_id)
+        pipe.execute()
+    except redis.RedisError as e:
+        log.warning(f"Leaderboard update failed for {user_id}: {e}")
+
+
+def set_member(user_id: str, school_id: Optional[str], grade: Optional[str], points: int) -> None:
+    """Put the user on their leaderboards with the given total (new or reactivated students)."""
+    set_members([(user_id, school_id, grade, points)])
+
+
+def set_members(members: Iterable[Tuple[str, Optional[str], Optional[str], int]]) -> None:
+    """set_member for many (user_id, school_id, grade, points) at once, in one round trip."""
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for user_id, school_id, grade, points in members:
+            for key in board_keys(school_id, grade):
+                pipe.zadd(key, {user_id: points})
+        pipe.execute()
+    except redis.RedisError as e:
+        log.warning(f"Leaderboard update failed: {e}")
+
+
+def remove_member(user_id: str, school_id: Optional[str], grade: Optional[str]) -> None:
+    """Take the user off their leaderboards (deactivated students)."""
+    keys = board_keys(school_id, grade)
+    if not keys:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for key in keys:
+            pipe.zrem(key, user_id)
+        pipe.execute()
+    except redis.RedisError as e:
+        log.warning(f"Leaderboard update failed for {user_id}: {e}")
+
+
+def move_grade(user_id: str, school_id: Optional[str], old_grade: Optional[str], new_grade: Optional[str], points: int) -> None:
+    """Move the user from one grade leaderboard to another; the school leaderboard is unchanged."""
+    if school_id is None or old_grade == new_grade:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        if old_grade:
+            pipe.zrem(grade_key(school_id, old_grade), user_id)
+        if new_grade:
+            pipe.zadd(grade_key(school_id, new_grade), {user_id: points})
+        pipe.execute()
+    except redis.RedisError as e:
+        log.warning(f"Leaderboard update failed for {user_id}: {e}")
+
+
+def top(key: str, limit: int) -> List[Tuple[str, int, int]]:
+    """
+    The first `limit` entries of a leaderboard.
+
+    Returns:
+        (user_id, points, rank) tuples, rank starting at 1
+    """
+    entries = get_redis().zrevrange(key, 0, limit - 1, withscores=True)
+    return [(user_id, int(score), i + 1) for i, (user_id, score) in enumerate(entries)]
+
+
+def rank(key: str, user_id: str) -> Optional[int]:
+    """The user's rank on a leaderboard (1 is first), None if they aren't on it."""
+    position = get_redis().zrevrank(key, user_id)
+    return None if position is None else position + 1
+
+
+def around(key: str, user_id: str, radius: int) -> Tuple[Optional[int], List[Tuple[str, int, int]]]:
+    """
+    The user's rank and the `radius` entries above and below them.
+
+    Returns:
+        (rank, entries); rank is None and entries empty if the user isn't on the leaderboard
+    """
+    client = get_redis()
+    position = client.zrevrank(key, user_id)
+    if position is None:
+        return None, []
+    start = max(position - radius, 0)
+    entries = client.zrevrange(key, start, position + radius, withscores=True)
+    return position + 1, [(uid, int(score), start + i + 1) for i, (uid, score) in enumerate(entries)]
+
+
+def rebuild_leaderboards(db: Session, school_id: Optional[str] = None) -> int:
+    """
+    Reload the leaderboards from points and users.
+
+    Each set is built under a temporary key and swapped in with RENAME, so
+    readers never see a half-built leaderboard. Points gained while the
+    rebuild runs may be missed until the next rebuild.
+
+    Args:
+        db: Database session
+        school_id: Only rebuild this school, all schools if None
+
+    Returns:
+        Number of students loaded
+    """
+    stmt = (
+        select(User.user_id, User.school_id, User.grade, Points.points)
+        .join(Points, Points.user_id == User.user_id)
+        .where(User.is_admin == False, User.deactivated.isnot(True), User.school_id.isnot(None))
+    )
+    if school_id is not None:
+        stmt = stmt.where(User.school_id == school_id)
+
+    client = get_redis()
+    token = uuid.uuid4().hex[:8]
+    temp_keys: Dict[str, str] = {}
+    swapped = False
+    loaded = 0
+    try:
+        result = db.execute(stmt.execution_options(yield_per=REBUILD_BATCH_SIZE))
+        for partition in result.partitions():
+            pipe = client.pipeline(transaction=False)
+            for row in partition:
+                for key in board_keys(row.school_id, row.grade):
+                    created = key not in temp_keys
+                    temp = temp_keys.setdefault(key, f"{key}:rebuild:{token}")
+                    pipe.zadd(temp, {row.user_id: row.points})
+                    if created:
+                        pipe.expire(temp, REBUILD_TEMP_TTL_SECONDS)
+            pipe.execute()
+            loaded += len(partition)
+
+        if school_id is not None:
+            patterns = [school_key(school_id), f"{KEY_PREFIX}:grade:{school_id}:*"]
+        else:
+            patterns = [f"{KEY_PREFIX}:school:*", f"{KEY_PREFIX}:grade:*"]
+        stale = {key for pattern in patterns for key in client.scan_iter(match=pattern)}
+
+        pipe = client.pipeline(transaction=True)
+        for key, temp in temp_keys.items():
+            pipe.rename(temp, key)
+            # RENAME keeps the temporary key's TTL
+            pipe.persist(key)
+        # leaderboards that no longer have any students
+        for key in stale - set(temp_keys):
+            if ":rebuild:" not in key:
+                pipe.delete(key)
+        pipe.execute()
+        swapped = True
+    finally:
+        if not swapped and temp_keys:
+            try:
+                client.delete(*temp_keys.values())
+            except redis.RedisError as e:
+                log.warning(f"Could not delete the temporary leaderboards of rebuild {token}: {e}")
+    return loaded
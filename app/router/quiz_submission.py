@@ -0,0 +1,136 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import select, update, func, literal, true, Integer, String, DateTime
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.model.attempts import Attempt
+from app.model.points import Points
+from app.router.rollups import record_attempt
+from app.router.streaks import record_activity
+from app.schema.user_schema import QuizSubmission
+
+# Quiz submission is serialized per user by locking the user's points row, so
+# a double tap can't slip past the attempt limit or lose a points update.
+# The limit check, the attempt INSERT and the points UPDATE then run as one
+# statement. It must be a separate statement from the lock: under READ
+# COMMITTED a statement that waited on a lock still reads the snapshot taken
+# before it waited, and would miss the attempt the other request just committed.
+
+MAX_ATTEMPTS_PER_QUIZ = 2
+
+
+@dataclass
+class SubmissionResult:
+    attempt_id: Optional[int]
+    attempt_number: Optional[int]
+    points: int
+    points_gained: int
+    replayed: bool = False
+    # new streak length if this was the first submission of the day
+    streak: Optional[int] = None
+
+
+def _lock_points(db: Session, user_id: str) -> None:
+    lock = select(Points.user_id).where(Points.user_id == user_id).with_for_update()
+    if db.execute(lock).first() is None:
+        # a user without a points row yet; create it and take the lock
+        db.execute(insert(Points).values(user_id=user_id, points=0).on_conflict_do_nothing())
+        db.execute(lock)
+
+
+def submit_attempt(
+    db: Session,
+    user_id: str,
+    submission: QuizSubmission,
+    idempotency_key: Optional[str] = None,
+) -> SubmissionResult:
+    """
+    Store a quiz attempt, award the points it earns and count the day for the user's streak.
+
+    Points are the improvement of pass_count over the user's best previous
+    attempt at the quiz. A submission repeated with the same idempotency_key
+    returns the attempt that was stored the first time.
+
+    Args:
+        db: Database session; the caller commits
+        user_id: The submitting user
+        submission: The quiz result
+        idempotency_key: Client-chosen key identifying this submission, optional
+
+    Returns:
+        SubmissionResult; attempt_id is None when the quiz's attempt limit was already reached
+    """
+    _lock_points(db, user_id)
+
+    if idempotency_key is not None:
+        previous = db.execute(
+            select(Attempt.attempt_id, Attempt.attempt_number, Points.points)
+            .join(Points, Points.user_id == Attempt.user_id)
+            .where(Attempt.user_id == user_id, Attempt.idempotency_key == idempotency_key)
+        ).first()
+        if previous is not None:
+            return SubmissionResult(previous.attempt_id, previous.attempt_number, previous.points, 0, replayed=True)
+
+    prev = (
+        select(
+            func.count().label("attempts"),
+            func.coalesce(func.max(Attempt.pass_count), 0).label("best_pass"),
+        )
+        .where(Attempt.user_id == user_id, Attempt.quiz_id == submission.quiz_id)
+        .cte("prev")
+    )
+    new_attempt = (
+        insert(Attempt)
+        .from_select(
+            ["user_id", "quiz_id", "attempt_number", "pass_count", "fail_count", "start_at", "end_at", "idempotency_key"],
+            select(
+                literal(user_id, String),
+                literal(submission.quiz_id, Integer),
+                prev.c.attempts + 1,
+                literal(submission.pass_count, Integer),
+                literal(submission.fail_count, Integer),
+                literal(submission.start_at, DateTime),
+                literal(submission.end_at, DateTime),
+                literal(idempotency_key, String),
+            ).where(prev.c.attempts < MAX_ATTEMPTS_PER_QUIZ),
+        )
+        .returning(Attempt.attempt_id, Attempt.attempt_number)
+        .cte("new_attempt")
+    )
+    gained = func.greatest(literal(submission.pass_count, Integer) - prev.c.best_pass, 0)
+    new_points = (
+        update(Points)
+        .where(Points.user_id == user_id, select(new_attempt.c.attempt_id).exists())
+        .values(points=Points.points + select(gained).scalar_subquery())
+        .returning(Points.points)
+        .cte("new_points")
+    )
+    row = db.execute(
+        select(
+            new_attempt.c.attempt_id,
+            new_attempt.c.attempt_number,
+            new_points.c.points,
+            gained.label("points_gained"),
+        )
+        .select_from(prev)
+        .outerjoin(new_attempt, true())
+        .outerjoin(new_points, true())
+    ).one()
+
+    if row.attempt_id is None:
+        return SubmissionResult(None, None, 0, 0)
+
+    # the rollups only need the attempt's values, not a persistent object
+    record_attempt(db, Attempt(
+        user_id=user_id,
+        quiz_id=submission.quiz_id,
+        attempt_number=row.attempt_number,
+        pass_count=submission.pass_count,
+        fail_count=submission.fail_count,
+        start_at=submission.start_at,
+        end_at=submission.end_at,
+    ))
+    streak = record_activity(db, user_id)
+    return SubmissionResult(row.attempt_id, row.attempt_number, row.points, row.points_gained, streak=streak)
@@ -0,0 +1,184 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select, delete, func, cast, literal, union_all, Date, Float, Integer, String, DateTime
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.model.attempts import Attempt
+from app.model.chats import ChatSession
+from app.model.quizzes import Quiz
+from app.model.users import User
+from app.model.quiz_user_scores import QuizUserScore
+from app.model.school_daily_activity import SchoolDailyActivity
+
+# Rollups behind the admin dashboards (/admin/quizzes, /admin/mean-scores, /admin/quiz-stats).
+# They are written in the same transaction as the attempt / chat session they summarize,
+# so callers must commit afterwards. script/rebuild_rollups.py recomputes them from scratch.
+
+
+def _duration_seconds(start_at: Optional[datetime], end_at: Optional[datetime]) -> Optional[float]:
+    if start_at is None or end_at is None:
+        return None
+    return (end_at - start_at).total_seconds()
+
+
+def record_attempt(db: Session, attempt: Attempt) -> None:
+    """
+    Fold a new attempt into the rollups.
+
+    The quiz's school is looked up inside the INSERT ... SELECT so this costs two
+    statements and no extra round trip.
+
+    Args:
+        db: Session the attempt was added to (not committed yet)
+        attempt: The new Attempt
+    """
+    # keep only the latest attempt per (quiz, user)
+    score_stmt = insert(QuizUserScore).from_select(
+        ["quiz_id", "user_id", "school_id", "attempt_number", "pass_count", "fail_count", "updated_at"],
+        select(
+            literal(attempt.quiz_id, Integer),
+            literal(attempt.user_id, String),
+            Quiz.school_id,
+            literal(attempt.attempt_number, Integer),
+            literal(attempt.pass_count, Integer),
+            literal(attempt.fail_count, Integer),
+            literal(datetime.now(), DateTime),
+        ).where(Quiz.quiz_id == attempt.quiz_id)
+    )
+    score_stmt = score_stmt.on_conflict_do_update(
+        index_elements=["quiz_id", "user_id"],
+        set_={
+            "attempt_number": score_stmt.excluded.attempt_number,
+            "pass_count": score_stmt.excluded.pass_count,
+            "fail_count": score_stmt.excluded.fail_count,
+            "updated_at": score_stmt.excluded.updated_at,
+        },
+        where=QuizUserScore.attempt_number <= score_stmt.excluded.attempt_number,
+    )
+    db.execute(score_stmt)
+
+    seconds = _duration_seconds(attempt.start_at, attempt.end_at)
+    if seconds is None:
+        return
+
+    activity_stmt = insert(SchoolDailyActivity).from_select(
+        ["school_id", "day", "quiz_seconds", "chat_seconds"],
+        select(
+            Quiz.school_id,
+            literal(attempt.start_at.date(), Date),
+            literal(seconds, Float),
+            literal(0.0, Float),
+        ).where(Quiz.quiz_id == attempt.quiz_id)
+    )
+    activity_stmt = activity_stmt.on_conflict_do_update(
+        index_elements=["school_id", "day"],
+        set_={"quiz_seconds": SchoolDailyActivity.quiz_seconds + activity_stmt.excluded.quiz_seconds},
+    )
+    db.execute(activity_stmt)
+
+
+def record_chat_session(db: Session, session: ChatSession, school_id: str) -> None:
+    """
+    Add an ended chat session's duration to its school's daily activity.
+
+    Args:
+        db: Session the chat session was updated in (not committed yet)
+        session: The ChatSession, with ended_at set
+        school_id: School of the session's user
+    """
+    seconds = _duration_seconds(session.created_at, session.ended_at)
+    if seconds is None or school_id is None:
+        return
+
+    stmt = insert(SchoolDailyActivity).values(
+        school_id=school_id,
+        day=session.created_at.date(),
+        quiz_seconds=0.0,
+        chat_seconds=seconds,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["school_id", "day"],
+        set_={"chat_seconds": SchoolDailyActivity.chat_seconds + stmt.excluded.chat_seconds},
+    )
+    db.execute(stmt)
+
+
+def rebuild_rollups(db: Session, school_id: Optional[str] = None) -> None:
+    """
+    Recompute the rollups from attempts and chat_sessions.
+
+    Used to backfill after deploying the rollup tables, or to repair drift.
+
+    Args:
+        db: Database session; the caller commits
+        school_id: Only rebuild this school, all schools if None
+    """
+    score_delete = delete(QuizUserScore)
+    activity_delete = delete(SchoolDailyActivity)
+    if school_id is not None:
+        score_delete = score_delete.where(QuizUserScore.school_id == school_id)
+        activity_delete = activity_delete.where(SchoolDailyActivity.school_id == school_id)
+    db.execute(score_delete)
+    db.execute(activity_delete)
+
+    latest = (
+        select(
+            Attempt.quiz_id,
+            Attempt.user_id,
+            Quiz.school_id,
+            Attempt.attempt_number,
+            Attempt.pass_count,
+            Attempt.fail_count,
+            func.now(),
+        )
+        .join(Quiz, Quiz.quiz_id == Attempt.quiz_id)
+        .distinct(Attempt.quiz_id, Attempt.user_id)
+        .order_by(Attempt.quiz_id, Attempt.user_id, Attempt.attempt_number.desc())
+    )
+    if school_id is not None:
+        latest = latest.where(Quiz.school_id == school_id)
+    db.execute(
+        insert(QuizUserScore).from_select(
+            ["quiz_id", "user_id", "school_id", "attempt_number", "pass_count", "fail_count", "updated_at"],
+            latest,
+        )
+    )
+
+    attempts_q = (
+        select(
+            Quiz.school_id.label("school_id"),
+            cast(Attempt.start_at, Date).label("day"),
+            func.extract("epoch", Attempt.end_at - Attempt.start_at).label("quiz_seconds"),
+            literal(0.0, Float).label("chat_seconds"),
+        )
+        .join(Quiz, Quiz.quiz_id == Attempt.quiz_id)
+        .where(Attempt.start_at.isnot(None), Attempt.end_at.isnot(None))
+    )
+    chats_q = (
+        select(
+            User.school_id.label("school_id"),
+            cast(ChatSession.created_at, Date).label("day"),
+            literal(0.0, Float).label("quiz_seconds"),
+            func.extract("epoch", ChatSession.ended_at - ChatSession.created_at).label("chat_seconds"),
+        )
+        .join(User, User.user_id == ChatSession.user_id)
+        .where(ChatSession.created_at.isnot(None), ChatSession.ended_at.isnot(None), User.school_id.isnot(None))
+    )
+    if school_id is not None:
+        attempts_q = attempts_q.where(Quiz.school_id == school_id)
+        chats_q = chats_q.where(User.school_id == school_id)
+
+    combined = union_all(attempts_q, chats_q).subquery()
+    db.execute(
+        insert(SchoolDailyActivity).from_select(
+            ["school_id", "day", "quiz_seconds", "chat_seconds"],
+            select(
+                combined.c.school_id,
+                combined.c.day,
+                func.sum(combined.c.quiz_seconds),
+                func.sum(combined.c.chat_seconds),
+            ).group_by(combined.c.school_id, combined.c.day),
+        )
+    )
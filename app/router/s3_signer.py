@@ -1,17 +1,13 @@
 # app/utils/s3_signer.py
 import os
 from urllib.parse import urlparse
-import boto3
 from app.config import settings
+from app.router.aws_s3 import get_s3_service
 AWS_REGION = os.getenv("AWS_DEFAULT_REGION", "us-east-2")
 BUCKET = os.getenv("AWS_S3_BUCKET_NAME", "kira-school-content")
 
-_s3 = boto3.client(
-            's3',
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_DEFAULT_REGION 
-)
+# presigning is local, but reuse the shared pooled client instead of building another one
+_s3 = get_s3_service().s3_client
 
 def _url_to_key(url_or_key: str) -> str | None:
     if not url_or_key:
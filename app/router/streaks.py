@@ -0,0 +1,81 @@
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import case, func, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.model.streaks import Streak
+
+# A streak counts consecutive local days (settings.STREAK_TIMEZONE) with at
+# least one quiz submission. record_activity runs inside the submission's
+# transaction; reset_broken_streaks zeroes the streaks that missed a day.
+
+
+def local_today() -> date:
+    return datetime.now(ZoneInfo(settings.STREAK_TIMEZONE)).date()
+
+
+def record_activity(db: Session, user_id: str, today: Optional[date] = None) -> Optional[int]:
+    """
+    Count today for the user's streak in one INSERT ... ON CONFLICT DO UPDATE.
+
+    The update only fires on the first activity of the day; yesterday's
+    streak is extended, anything older starts over at 1.
+
+    Args:
+        db: Session of the submission (not committed yet)
+        user_id: The active user
+        today: Local date of the activity, local_today() by default
+
+    Returns:
+        The new current streak, or None if today was already counted
+    """
+    today = today or local_today()
+    yesterday = today - timedelta(days=1)
+    now = datetime.now()
+
+    stmt = insert(Streak).values(
+        user_id=user_id,
+        current_streak=1,
+        longest_streak=1,
+        last_activity=now,
+        last_active_date=today,
+        updated_at=now,
+    )
+    new_streak = case((Streak.last_active_date == yesterday, Streak.current_streak + 1), else_=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={
+            "current_streak": new_streak,
+            "longest_streak": func.greatest(Streak.longest_streak, new_streak),
+            "last_activity": stmt.excluded.last_activity,
+            "last_active_date": stmt.excluded.last_active_date,
+            "updated_at": stmt.excluded.updated_at,
+        },
+        where=Streak.last_active_date.is_distinct_from(today),
+    ).returning(Streak.current_streak)
+    return db.execute(stmt).scalar()
+
+
+def reset_broken_streaks(db: Session, today: Optional[date] = None) -> List[str]:
+    """
+    Zero every streak whose last active day is before yesterday, in one UPDATE.
+
+    Args:
+        db: Database session; the caller commits
+        today: Local date to reconcile for, local_today() by default
+
+    Returns:
+        The user_ids whose streak was reset
+    """
+    yesterday = (today or local_today()) - timedelta(days=1)
+    result = db.execute(
+        update(Streak)
+        .where(Streak.current_streak > 0, Streak.last_active_date < yesterday)
+        .values(current_streak=0, updated_at=datetime.now())
+        .returning(Streak.user_id)
+    )
+    return list(result.scalars())
@@ -0,0 +1,174 @@
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+import redis
+
+from app.log import get_logger
+from app.metrics import PIPELINE_STAGE_DURATION
+from app.router.cache import get_redis
+from app.router.events import publish_school_event
+from app.tracing import begin_span, end_span
+
+log = get_logger(__name__)
+
+# Progress of topics through the content worker
+# (READY_FOR_GENERATION -> PROMPTS_GENERATED -> VISUALS_GENERATED -> READY_FOR_REVIEW).
+#
+# Each stage reports started / progress / done / error. Reports are published as
+# "topic_progress" events on the school's event channel (/admin/contents/events)
+# and the latest one per topic is kept in progress:school:{school_id}, so a
+# client that connects mid-stage gets the current picture right away.
+#
+# ETA: every finished stage records its seconds per question; the estimate for
+# the rest of a stage, and of the pipeline, is the mean of the last
+# DURATION_SAMPLES runs times the questions left. Before there is any history
+# the current run's own rate is used.
+#
+# Between start and finish / fail the stage is also a tracing span, continuing
+# the trace of the upload request (Topic.trace_context).
+
+STAGES = ["prompts", "visuals", "review"]
+# stages whose cost grows with the number of questions
+PER_QUESTION_STAGES = ["prompts", "visuals"]
+DURATION_SAMPLES = 20
+SNAPSHOT_TTL_SECONDS = 24 * 3600
+KEY_PREFIX = "progress"
+
+
+def _snapshot_key(school_id: str) -> str:
+    return f"{KEY_PREFIX}:school:{school_id}"
+
+
+def _durations_key(stage: str) -> str:
+    return f"{KEY_PREFIX}:stage:{stage}:seconds_per_question"
+
+
+def _mean_seconds_per_question(client: redis.Redis, stage: str) -> Optional[float]:
+    samples = [float(v) for v in client.lrange(_durations_key(stage), 0, -1)]
+    return sum(samples) / len(samples) if samples else None
+
+
+class TopicProgress:
+    """
+    Progress reporter for one topic in one stage.
+
+    Usage:
+        progress = TopicProgress(school_id, topic_id, "visuals", total=len(questions))
+        progress.start()
+        ... progress.advance() after each question ...
+        progress.finish("VISUALS_GENERATED")   # or progress.fail(error)
+
+    Reporting never raises: a Redis problem must not fail the pipeline.
+    """
+
+    def __init__(self, school_id: str, topic_id: int, stage: str, total: Optional[int] = None, trace_context: Optional[str] = None):
+        self.school_id = school_id
+        self.topic_id = topic_id
+        self.stage = stage
+        self.total = total
+        self.done = 0
+        self.errors = 0
+        self.started_at = time.monotonic()
+        self.trace_context = trace_context
+        self._span = None
+
+    def _eta_seconds(self, client: redis.Redis) -> Optional[float]:
+        if not self.total:
+            return None
+        remaining = max(self.total - self.done, 0)
+        rate = _mean_seconds_per_question(client, self.stage)
+        if rate is None and self.done:
+            rate = (time.monotonic() - self.started_at) / self.done
+        if rate is None:
+            return None
+        eta = remaining * rate
+        # stages still to come, at their historical rate
+        if self.stage in PER_QUESTION_STAGES:
+            for stage in PER_QUESTION_STAGES[PER_QUESTION_STAGES.index(self.stage) + 1:]:
+                later = _mean_seconds_per_question(client, stage)
+                if later is not None:
+                    eta += later * self.total
+        return round(eta, 1)
+
+    def _report(self, status: str, **extra: Any) -> None:
+        try:
+            client = get_redis()
+            data = {
+                "topic_id": self.topic_id,
+                "stage": self.stage,
+                "status": status,
+                "done": self.done,
+                "total": self.total,
+                "errors": self.errors,
+                "elapsed_seconds": round(time.monotonic() - self.started_at, 1),
+                "eta_seconds": self._eta_seconds(client) if status in ("started", "progress") else None,
+                "at": time.time(),
+                **extra,
+            }
+            pipe = client.pipeline(transaction=False)
+            if status == "done" and self.stage == STAGES[-1]:
+                pipe.hdel(_snapshot_key(self.school_id), self.topic_id)
+            else:
+                pipe.hset(_snapshot_key(self.school_id), self.topic_id, json.dumps(data))
+                pipe.expire(_snapshot_key(self.school_id), SNAPSHOT_TTL_SECONDS)
+            pipe.execute()
+        except redis.RedisError as e:
+            log.warning(f"Could not record progress of topic {self.topic_id}: {e}")
+            return
+        publish_school_event(self.school_id, "topic_progress", data)
+
+    def start(self) -> None:
+        self.started_at = time.monotonic()
+        self._span = begin_span(
+            f"pipeline {self.stage}", traceparent=self.trace_context,
+            topic_id=self.topic_id, school_id=self.school_id, questions=self.total or 0,
+        )
+        self._report("started")
+
+    def advance(self, count: int = 1, failed: bool = False) -> None:
+        """Report `count` more questions handled; failed ones count towards done and errors."""
+        self.done += count
+        if failed:
+            self.errors += count
+        self._report("progress")
+
+    def finish(self, state: str, record_duration: bool = True) -> None:
+        """
+        Report the stage done, with the topic's new state.
+
+        Args:
+            state: The topic's state after this stage
+            record_duration: Record this run's processing time (metrics and future ETAs);
+                False when the stage had nothing to do
+        """
+        elapsed = time.monotonic() - self.started_at
+        if record_duration:
+            PIPELINE_STAGE_DURATION.labels(self.stage).observe(elapsed)
+        if record_duration and self.total and self.stage in PER_QUESTION_STAGES:
+            try:
+                pipe = get_redis().pipeline(transaction=False)
+                pipe.lpush(_durations_key(self.stage), elapsed / self.total)
+                pipe.ltrim(_durations_key(self.stage), 0, DURATION_SAMPLES - 1)
+                pipe.execute()
+            except redis.RedisError as e:
+                log.warning(f"Could not record duration of stage {self.stage}: {e}")
+        self.done = self.total or self.done
+        self._report("done", state=state)
+        end_span(self._span)
+        self._span = None
+
+    def fail(self, error: Any) -> None:
+        self._report("error", error=str(error))
+        end_span(self._span, error=error)
+        self._span = None
+
+
+def current_progress(school_id: str) -> List[Dict[str, Any]]:
+    """Latest progress report of every topic of the school still in the pipeline."""
+    try:
+        raw = get_redis().hvals(_snapshot_key(school_id))
+    except redis.RedisError as e:
+        log.warning(f"Progress snapshot unavailable for school {school_id}: {e}")
+        return []
+    return sorted((json.loads(v) for v in raw), key=lambda p: p["topic_id"])
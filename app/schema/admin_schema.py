@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime
 from pydantic import BaseModel, EmailStr
 
@@ -9,6 +9,9 @@ class StudentCreate(BaseModel):
     username: str
     grade: str
 
+class StudentBulkCreate(BaseModel):
+    students: List[StudentCreate]
+
 class StudentUpdate(BaseModel):
     username: str
     new_username: Optional[str] = None 
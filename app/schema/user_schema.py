@@ -26,6 +26,9 @@ class UserBadgeOut(BaseModel):
 class UserBadgesOut(BaseModel):
     badges: List[UserBadgeOut]
 
+class MarkBadgesSeen(BaseModel):
+    badge_ids: Optional[List[str]] = None  # None marks every badge
+
 class PointsOut(BaseModel): 
     points: int
 
@@ -50,6 +53,7 @@ class Quiz(BaseModel):
 
 class QuizzesOut(BaseModel): 
     quizzes: List[Quiz]
+    next_cursor: Optional[str] = None
 
 ################
 ### Question ###
@@ -90,6 +94,7 @@ class BestAttemptOut(BaseModel):
 
 class BestAttemptsOut(BaseModel):
     attempts: List[BestAttemptOut]
+    next_cursor: Optional[str] = None
 
 
 ###################
@@ -120,6 +125,29 @@ class SingleUserAchievement(BaseModel):
 class UserAchievementsOut(BaseModel): 
     user_achievements: List[SingleUserAchievement]
 
+class MarkAchievementsSeen(BaseModel):
+    achievement_ids: Optional[List[str]] = None  # None marks every achievement
+
+class UserSummaryOut(BaseModel):
+    user: UserOut
+    points: int
+    streak: Optional[StreakOut] = None
+    new_badges: List[UserBadgeOut]
+    new_achievements: List[SingleUserAchievement]
+
+class LeaderboardEntryOut(BaseModel):
+    rank: int
+    user_id: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    username: Optional[str] = None
+    points: int
+
+class LeaderboardOut(BaseModel):
+    scope: str
+    my_rank: Optional[int] = None
+    entries: List[LeaderboardEntryOut]
+
 class ApproveQuestions(BaseModel):
     quiz_name: str
     quiz_description: str
@@ -2,14 +2,22 @@
 from app.celery_app import celery_app
 # import asyncio
 # import time
+from app.router.cache import invalidate, get_redis, user_tag, GLOBAL_TAG
 # from app.repeated_tasks.question_and_prompt import prompt_generation
 # from app.repeated_tasks.visuals import visual_generation
 # from app.repeated_tasks.ready import ready_for_review
 from google.cloud import bigquery
-from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import select, func
 from app.model.analytics import Analytics
 from app.database.db import SessionLocal
 from datetime import datetime
+import time
+import asyncio
+import tempfile
+from app.tracing import setup_tracing
+
+# the web app never imports this module, so the first setup_tracing here is the worker's
+setup_tracing("kira-celery")
 
 
 # @celery_app.task(bind=True)
@@ -35,52 +43,191 @@ from datetime import datetime
 
         
 
+BQ_PAGE_SIZE = 10000
+
 @celery_app.task(bind=True)
 def bigquery_nightly_upsert(self):
+    """
+    Sync GA4 engagement time from BigQuery into analytics.
 
-    client = bigquery.Client(project="analytics-482304")
-    query = """
-    SELECT
-        user_id,
-        user_ltv.engagement_time_millis AS total_engagement_time_ms,
-        last_updated_date
-    FROM `analytics_516824409.users_*`
-    WHERE _TABLE_SUFFIX = (
-    SELECT MAX(_TABLE_SUFFIX)
-    FROM `analytics_516824409.users_*`
-    WHERE _TABLE_SUFFIX < FORMAT_DATE('%Y%m%d', CURRENT_DATE())
-    )"""
-
-    job = client.query(query)
-    rows = job.result()
-
+    Only users whose last_updated_date is newer than what we already have are
+    fetched. Result pages are streamed straight into a temp table with COPY and
+    merged into analytics with one INSERT ... ON CONFLICT, so the table is only
+    locked for the final statement instead of one upsert per user.
+    """
+    started_at = time.monotonic()
     db = SessionLocal()
     try:
-        for row in rows:
-            last_updated = (
-                datetime.strptime(row.last_updated_date, "%Y%m%d")
-                if row.last_updated_date
-                else None
+        since = db.execute(select(func.max(Analytics.last_updated))).scalar()
+
+        client = bigquery.Client(project="analytics-482304")
+        query = """
+        SELECT
+            user_id,
+            user_ltv.engagement_time_millis AS total_engagement_time_ms,
+            last_updated_date
+        FROM `analytics_516824409.users_*`
+        WHERE _TABLE_SUFFIX = (
+        SELECT MAX(_TABLE_SUFFIX)
+        FROM `analytics_516824409.users_*`
+        WHERE _TABLE_SUFFIX < FORMAT_DATE('%Y%m%d', CURRENT_DATE())
+        )
+        AND user_id IS NOT NULL"""
+        params = []
+        if since is not None:
+            # last_updated_date is a YYYYMMDD string, so string comparison is date order
+            query += "\n        AND last_updated_date > @since"
+            params.append(bigquery.ScalarQueryParameter("since", "STRING", since.strftime("%Y%m%d")))
+
+        job = client.query(query, job_config=bigquery.QueryJobConfig(query_parameters=params))
+        rows = job.result(page_size=BQ_PAGE_SIZE)
+        query_done_at = time.monotonic()
+
+        # psycopg connection behind the session, so COPY and the merge share one transaction
+        raw = db.connection().connection.driver_connection
+        fetched = 0
+        with raw.cursor() as cur:
+            cur.execute(
+                """
+                CREATE TEMP TABLE analytics_staging (
+                    user_id VARCHAR(12) NOT NULL,
+                    engagement_time_ms BIGINT,
+                    last_updated TIMESTAMP
+                ) ON COMMIT DROP
+                """
             )
-            stmt = (
-                insert(Analytics)
-                .values(
-                    user_id=row.user_id,
-                    engagement_time_ms=row.total_engagement_time_ms,
-                    last_updated=last_updated,
-                )
-                .on_conflict_do_update(
-                    index_elements=["user_id"],
-                    set_={
-                        "engagement_time_ms": row.total_engagement_time_ms,
-                        "last_updated": last_updated,
-                    },
-                )
+            with cur.copy("COPY analytics_staging (user_id, engagement_time_ms, last_updated) FROM STDIN") as copy:
+                for page in rows.pages:
+                    for row in page:
+                        last_updated = (
+                            datetime.strptime(row.last_updated_date, "%Y%m%d")
+                            if row.last_updated_date
+                            else None
+                        )
+                        copy.write_row((row.user_id, row.total_engagement_time_ms or 0, last_updated))
+                        fetched += 1
+            copy_done_at = time.monotonic()
+
+            # DISTINCT ON guards against duplicate user_ids in the export; the join drops
+            # GA users that no longer exist here, and the WHERE skips rows that didn't change
+            cur.execute(
+                """
+                INSERT INTO analytics (user_id, engagement_time_ms, last_updated)
+                SELECT DISTINCT ON (s.user_id) s.user_id, s.engagement_time_ms, s.last_updated
+                FROM analytics_staging s
+                JOIN users u ON u.user_id = s.user_id
+                ORDER BY s.user_id, s.last_updated DESC NULLS LAST
+                ON CONFLICT (user_id) DO UPDATE
+                SET engagement_time_ms = EXCLUDED.engagement_time_ms,
+                    last_updated = EXCLUDED.last_updated
+                WHERE analytics.engagement_time_ms IS DISTINCT FROM EXCLUDED.engagement_time_ms
+                   OR analytics.last_updated IS DISTINCT FROM EXCLUDED.last_updated
+                """
             )
-            db.execute(stmt)
+            upserted = cur.rowcount
+
+        db.commit()
+        # engagement time changed for every school
+        invalidate(GLOBAL_TAG)
+        finished_at = time.monotonic()
+        print(
+            f"BigQuery sync: fetched={fetched} upserted={upserted} since={since} "
+            f"query={query_done_at - started_at:.2f}s copy={copy_done_at - query_done_at:.2f}s "
+            f"merge={finished_at - copy_done_at:.2f}s total={finished_at - started_at:.2f}s"
+        )
+        return {"fetched": fetched, "upserted": upserted}
+
+    except Exception:
+        db.rollback()
+        raise
+
+    finally:
+        db.close()
+
+
+@celery_app.task(bind=True)
+def dispatch_email_outbox(self):
+    """Send due emails from the outbox; runs every few seconds from beat."""
+    from app.router.aws_ses import dispatch_outbox, OUTBOX_BATCH_SIZE
+
+    db = SessionLocal()
+    try:
+        sent = 0
+        while True:
+            claimed = dispatch_outbox(db, batch_size=OUTBOX_BATCH_SIZE)
+            sent += claimed
+            if claimed < OUTBOX_BATCH_SIZE:
+                break
+        if sent:
+            print(f"Dispatched {sent} outbox emails.")
+        return sent
+
+    except Exception:
+        db.rollback()
+        raise
+
+    finally:
+        db.close()
+
+
+@celery_app.task(bind=True)
+def export_school_data(self, dataset: str, fmt: str, school_id: str):
+    """Build a school export and upload it to S3; the result carries the S3 URL for /admin/export-jobs."""
+    from app.router.aws_s3 import get_s3_service
+    from app.router.exports import write_export, EXPORT_FORMATS
+
+    started_at = time.monotonic()
+    content_type, extension = EXPORT_FORMATS[fmt]
+    now = datetime.now()
+    filename = f"{dataset}_{now.strftime('%Y%m%d%H%M%S')}_{self.request.id[:8]}.{extension}"
+
+    with tempfile.TemporaryFile() as f:
+        write_export(dataset, fmt, school_id, f)
+        size = f.tell()
+        f.seek(0)
+        s3_url = get_s3_service().upload_fileobj_to_s3(
+            fileobj=f,
+            school_id=school_id,
+            filename=filename,
+            week_number=now.isocalendar().week,
+            content_type=content_type,
+            folder_prefix="exports",
+        )
+
+    if s3_url is None:
+        raise RuntimeError(f"Upload of export {filename} failed")
+
+    print(f"Export {filename} for school {school_id}: {size} bytes in {time.monotonic() - started_at:.2f}s")
+    return {"school_id": school_id, "s3_url": s3_url, "filename": filename, "size": size}
+
+
+@celery_app.task(bind=True, acks_late=True, ignore_result=True, max_retries=3, default_retry_delay=30)
+def process_user_rewards(self, user_id: str):
+    """Evaluate achievements and badges for a user; queued by schedule_rewards after quiz submissions."""
+    from app.router.background.rewards import evaluate_rewards, pending_key
+
+    # clear first: submissions committed from here on queue their own run
+    get_redis().delete(pending_key(user_id))
+    try:
+        asyncio.run(evaluate_rewards(user_id))
+    except Exception as e:
+        raise self.retry(exc=e)
+
 
+@celery_app.task(bind=True)
+def reset_broken_streaks(self):
+    """Nightly: zero the streaks of users who missed a day, in one statement."""
+    from app.router.streaks import reset_broken_streaks as reset
+
+    db = SessionLocal()
+    try:
+        user_ids = reset(db)
         db.commit()
-        print("Rows successfully inserted.")
+        print(f"Reset {len(user_ids)} broken streaks.")
+        # streaks only show up in the users' own cached summaries
+        if user_ids:
+            invalidate(*(user_tag(user_id) for user_id in user_ids))
+        return len(user_ids)
 
     except Exception:
         db.rollback()
@@ -88,3 +235,18 @@ def bigquery_nightly_upsert(self):
 
     finally:
         db.close()
+
+
+@celery_app.task(bind=True)
+def rebuild_leaderboards(self):
+    """Nightly: reload the Redis leaderboards from Postgres to repair any drift."""
+    from app.router.leaderboard import rebuild_leaderboards as rebuild
+
+    db = SessionLocal()
+    try:
+        loaded = rebuild(db)
+        print(f"Rebuilt leaderboards with {loaded} students.")
+        return loaded
+
+    finally:
+        db.close()
@@ -0,0 +1,270 @@
+"""Distributed tracing (OpenTelemetry, exported over OTLP/HTTP)"""
+
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+from app.log import get_logger
+
+try:
+    from opentelemetry import context as otel_context, trace
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+    from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+except ImportError:
+    trace = None
+
+log = get_logger(__name__)
+
+# Tracing is optional: without the opentelemetry packages, or without
+# OTEL_EXPORTER_OTLP_ENDPOINT, every helper here is a no-op.
+#
+# A content upload is followed end to end through the W3C traceparent of its
+# request, stored on the topic (Topic.trace_context) so that each worker stage
+# (see TopicProgress) continues the same trace minutes later. Celery tasks get
+# the publisher's traceparent in their message headers. DB statements, S3,
+# OpenAI, Gemini and SES calls become child spans of whatever is current.
+
+TRACEPARENT = "traceparent"
+MAX_STATEMENT_LENGTH = 1000
+
+_tracer = None
+_propagator = TraceContextTextMapPropagator() if trace is not None else None
+
+
+def setup_tracing(service_name: str) -> bool:
+    """
+    Install the OTLP exporter and the DB / Celery hooks; only the first call in a process has an effect.
+
+    Args:
+        service_name: service.name of the spans, e.g. "kira-api"
+
+    Returns:
+        True if tracing is enabled
+    """
+    global _tracer
+    if _tracer is not None:
+        return True
+    if trace is None or not settings.OTEL_EXPORTER_OTLP_ENDPOINT:
+        return False
+
+    provider = TracerProvider(resource=Resource.create({
+        "service.name": service_name,
+        "deployment.environment": settings.ENV,
+    }))
+    endpoint = settings.OTEL_EXPORTER_OTLP_ENDPOINT.rstrip("/") + "/v1/traces"
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=endpoint)))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer("kira")
+
+    event.listen(Engine, "before_cursor_execute", _start_db_span)
+    event.listen(Engine, "after_cursor_execute", _end_db_span)
+    event.listen(Engine, "handle_error", _fail_db_span)
+    _connect_celery_signals()
+    log.info(f"Tracing {service_name} to {endpoint}")
+    return True
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+def _context_from(traceparent: Optional[str]):
+    return _propagator.extract({TRACEPARENT: traceparent}) if traceparent else None
+
+
+def current_traceparent() -> Optional[str]:
+    """traceparent header value of the current span, None when not tracing."""
+    if _tracer is None:
+        return None
+    carrier: Dict[str, str] = {}
+    _propagator.inject(carrier)
+    return carrier.get(TRACEPARENT)
+
+
+@contextmanager
+def span(name: str, traceparent: Optional[str] = None, kind: Optional[Any] = None, **attributes: Any) -> Iterator[Any]:
+    """
+    Run the block in a span, child of `traceparent` if given, else of the current span.
+    Exceptions are recorded on the span and re-raised.
+
+    Usage:
+        with span("ready_for_review", traceparent=topic.trace_context, topic_id=topic.topic_id):
+            ...
+    """
+    if _tracer is None:
+        yield None
+        return
+    with _tracer.start_as_current_span(
+        name, context=_context_from(traceparent), kind=kind or SpanKind.INTERNAL, attributes=attributes,
+    ) as current:
+        yield current
+
+
+def begin_span(name: str, traceparent: Optional[str] = None, **attributes: Any) -> Optional[Tuple[Any, Any]]:
+    """
+    Start a span and make it current until end_span, for lifecycles that don't fit a with block.
+
+    Returns:
+        Handle for end_span, None when not tracing
+    """
+    if _tracer is None:
+        return None
+    current = _tracer.start_span(name, context=_context_from(traceparent), attributes=attributes)
+    token = otel_context.attach(trace.set_span_in_context(current))
+    return current, token
+
+
+def end_span(handle: Optional[Tuple[Any, Any]], error: Any = None) -> None:
+    """End a span from begin_span, marking it failed if `error` is given."""
+    if handle is None:
+        return
+    current, token = handle
+    if error is not None:
+        if isinstance(error, BaseException):
+            current.record_exception(error)
+        current.set_status(Status(StatusCode.ERROR, str(error)))
+    current.end()
+    otel_context.detach(token)
+
+
+def record_span(name: str, started_at: float, ok: bool = True, **attributes: Any) -> None:
+    """
+    Record a span for work that has already finished.
+
+    Args:
+        name: Span name
+        started_at: time.perf_counter() when the work started
+        ok: False marks the span failed
+    """
+    if _tracer is None:
+        return
+    end_ns = time.time_ns()
+    start_ns = end_ns - int((time.perf_counter() - started_at) * 1e9)
+    current = _tracer.start_span(name, start_time=start_ns, kind=SpanKind.CLIENT, attributes=attributes)
+    if not ok:
+        current.set_status(Status(StatusCode.ERROR))
+    current.end(end_time=end_ns)
+
+
+##########
+### DB ###
+##########
+
+def _in_trace() -> bool:
+    # statements outside a request / task / pipeline span (worker polling, beat
+    # tasks) would each become a one-span trace; the DB span is never made
+    # current, so start and end see the same answer
+    return trace.get_current_span().get_span_context().is_valid
+
+
+def _start_db_span(conn, cursor, statement, parameters, context, executemany):
+    if not _in_trace():
+        return
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+    current = _tracer.start_span(
+        f"db {operation}", kind=SpanKind.CLIENT,
+        attributes={"db.system": "postgresql", "db.statement": statement[:MAX_STATEMENT_LENGTH]},
+    )
+    conn.info.setdefault("trace_spans", []).append(current)
+
+
+def _end_db_span(conn, cursor, statement, parameters, context, executemany):
+    if not _in_trace():
+        return
+    spans = conn.info.get("trace_spans")
+    if spans:
+        spans.pop().end()
+
+
+def _fail_db_span(exception_context):
+    conn = exception_context.connection
+    if conn is None or not _in_trace():
+        return
+    spans = conn.info.get("trace_spans")
+    if spans:
+        current = spans.pop()
+        current.record_exception(exception_context.original_exception)
+        current.set_status(Status(StatusCode.ERROR))
+        current.end()
+
+
+##############
+### Celery ###
+##############
+
+_task_spans: Dict[str, Tuple[Any, Any]] = {}
+
+
+def _inject_task_headers(headers=None, **kwargs):
+    traceparent = current_traceparent()
+    if headers is not None and traceparent:
+        headers[TRACEPARENT] = traceparent
+
+
+def _start_task_span(task_id=None, task=None, **kwargs):
+    handle = begin_span(f"celery {task.name}", traceparent=task.request.get(TRACEPARENT), task_id=task_id)
+    if handle is not None:
+        _task_spans[task_id] = handle
+
+
+def _end_task_span(task_id=None, state=None, **kwargs):
+    end_span(_task_spans.pop(task_id, None), error=None if state in (None, "SUCCESS") else state)
+
+
+def _connect_celery_signals() -> None:
+    from celery.signals import before_task_publish, task_postrun, task_prerun
+
+    before_task_publish.connect(_inject_task_headers, weak=False)
+    task_prerun.connect(_start_task_span, weak=False)
+    task_postrun.connect(_end_task_span, weak=False)
+
+
+############
+### HTTP ###
+############
+
+class TracingMiddleware:
+    """ASGI middleware opening a server span per request, continuing the caller's traceparent."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _tracer is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        traceparent = headers.get(b"traceparent")
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        with span(
+            f"{scope['method']} {scope['path']}",
+            traceparent=traceparent.decode("latin-1") if traceparent else None,
+            kind=SpanKind.SERVER,
+            **{"http.method": scope["method"], "http.target": scope["path"]},
+        ) as current:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    current.update_name(f"{scope['method']} {route}")
+                    current.set_attribute("http.route", route)
+                current.set_attribute("http.status_code", status_code)
+                if status_code >= 500:
+                    current.set_status(Status(StatusCode.ERROR))
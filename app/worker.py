@@ -1,10 +1,14 @@
 import asyncio
+import time
+from prometheus_client import start_http_server
 from app.repeated_tasks.question_and_prompt import prompt_generation
 from app.repeated_tasks.visuals import visual_generation
 from app.repeated_tasks.ready import ready_for_review
 from app.config import settings
 from typing import Callable, Dict
 from app.log import get_logger
+from app.metrics import WORKER_TASK_DURATION, refresh_topic_states
+from app.tracing import setup_tracing
 
 logger = get_logger("worker", "INFO")
 # Locks to prevent concurrent processing of same task
@@ -12,6 +16,7 @@ task_locks: Dict[str, asyncio.Lock] = {
     "prompt_generation": asyncio.Lock(),
     "ready_for_review": asyncio.Lock(),
     "visual_generation": asyncio.Lock(),
+    "topic_state_metrics": asyncio.Lock(),
 }
 
 async def run_task(name: str, func: Callable, interval: int = 30):
@@ -30,10 +35,13 @@ async def run_task(name: str, func: Callable, interval: int = 30):
 
         try:
             async with lock:
+                started = time.perf_counter()
                 try:
                     await func()
                     consecutive_errors = 0
+                    WORKER_TASK_DURATION.labels(name, "ok").observe(time.perf_counter() - started)
                 except Exception as e:
+                    WORKER_TASK_DURATION.labels(name, "error").observe(time.perf_counter() - started)
                     consecutive_errors += 1
                     error_msg = str(e)
                     print(f"Error in {name}: {error_msg}")
@@ -58,12 +66,18 @@ async def worker_main():
     logger.info("  - PromptGen (every 10s)")
     logger.info("  - VisualGen (every 10s)")
     logger.info("  - ReadyCheck (every 10s)")
+    logger.info("  - Topic state metrics (every 30s)")
     logger.info("=" * 50)
-    
+
+    start_http_server(settings.WORKER_METRICS_PORT)
+    setup_tracing("kira-content-worker")
+    logger.info(f"Metrics served on :{settings.WORKER_METRICS_PORT}/metrics")
+
     await asyncio.gather(
         run_task("prompt_generation", prompt_generation, 10),
         run_task("ready_for_review", ready_for_review, 10),
         run_task("visual_generation", visual_generation, 10),
+        run_task("topic_state_metrics", refresh_topic_states, 30),
     )
 #test
 # Remove the if __name__ check
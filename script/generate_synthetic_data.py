@@ -0,0 +1,400 @@
+# generate_synthetic_data.py
+# Bulk-generate consistent synthetic data for scale testing: schools, admins and
+# students, points, streaks, analytics, topics, questions, quizzes, attempts,
+# chat sessions / messages and badges, loaded with COPY, then the rollups are
+# rebuilt and the tables analyzed so query plans match real data.
+#
+# Everything belongs to schools whose id starts with --prefix; running again with
+# the same prefix replaces that data. The same --seed gives the same data.
+#   python -m script.generate_synthetic_data --schools 100 --students 1000 --attempts 200 [--seed 42]
+#   python -m script.generate_synthetic_data --prefix SY --drop
+#
+# Every generated user's password is PASSWORD. Leaderboards are not touched, run
+# script/rebuild_leaderboards.py afterwards if Redis should reflect the new points.
+import argparse
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import delete, or_, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.model.analytics import Analytics
+from app.model.attempts import Attempt
+from app.model.badges import Badge
+from app.model.chats import ChatMessage, ChatSession
+from app.model.points import Points
+from app.model.questions import Question
+from app.model.quiz_user_scores import QuizUserScore
+from app.model.quizzes import Quiz
+from app.model.school_daily_activity import SchoolDailyActivity
+from app.model.schools import School
+from app.model.streaks import Streak
+from app.model.topics import Topic
+from app.model.user_badges import UserBadge
+from app.model.users import User
+from app.router.auth_util import get_password_hash
+from app.router.quiz_submission import MAX_ATTEMPTS_PER_QUIZ
+from app.router.rollups import rebuild_rollups
+
+PASSWORD = "synthetic-pass"
+HISTORY_DAYS = 365
+GRADES = ["1", "2", "3", "4", "5", "6"]
+# badges awarded by points, created if missing: (suffix, points_required)
+POINT_BADGES = [("B01", 10), ("B02", 50), ("B03", 100), ("B04", 250), ("B05", 500), ("B06", 1000)]
+CHAT_LINES = [
+    ("user", "Halo Kira!"),
+    ("assistant", "Halo! Apa kabar hari ini?"),
+    ("user", "I am fine. I like cats."),
+    ("assistant", "Cats are great! What does your cat eat?"),
+    ("user", "Fish and rice."),
+    ("assistant", "Yummy! Can you say that in English again?"),
+]
+
+ANALYZED_TABLES = [
+    "schools", "users", "points", "streaks", "analytics", "topics", "questions", "quizzes", "attempts",
+    "chat_sessions", "chat_messages", "badges", "user_badges", "quiz_user_scores", "school_daily_activity",
+]
+
+
+def school_id(prefix: str, school: int) -> str:
+    return f"{prefix}{school:04d}"
+
+
+def admin_id(prefix: str, school: int) -> str:
+    return f"{prefix.lower()}{school:04d}a00000"
+
+
+def student_id(prefix: str, school: int, i: int) -> str:
+    return f"{prefix.lower()}{school:04d}{i:06d}"
+
+
+def student_username(prefix: str, school: int, i: int) -> str:
+    return f"{prefix.lower()}_{school:04d}_{i:06d}"
+
+
+@dataclass
+class GeneratedData:
+    school_ids: List[str] = field(default_factory=list)
+    # school_id -> quiz_ids, oldest first
+    quizzes: Dict[str, List[int]] = field(default_factory=dict)
+    # school_id -> number of students (ids from student_id)
+    students: Dict[str, int] = field(default_factory=dict)
+    rows: Dict[str, int] = field(default_factory=dict)
+
+
+def _copy(conn, table: str, columns: Sequence[str], rows: Iterable[Sequence]) -> int:
+    """COPY rows into table; returns the number of rows written."""
+    written = 0
+    with conn.cursor() as cur:
+        with cur.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+                written += 1
+    return written
+
+
+def _reserve_ids(conn, table: str, column: str, count: int) -> List[int]:
+    """
+    Take `count` values from the column's sequence.
+
+    Every value comes from nextval, so concurrent inserts can never get one of
+    them; they are not necessarily consecutive.
+    """
+    rows = conn.execute(
+        "SELECT nextval(pg_get_serial_sequence(%(t)s, %(c)s)) FROM generate_series(1, %(n)s)",
+        {"t": table, "c": column, "n": count},
+    ).fetchall()
+    return sorted(row[0] for row in rows)
+
+
+def _streak(days: List[date], today: date) -> tuple:
+    """(current, longest) runs of consecutive active days; current is 0 unless the last run reaches yesterday."""
+    longest = current = 0
+    previous = None
+    for day in days:
+        current = current + 1 if previous is not None and day - previous == timedelta(days=1) else 1
+        longest = max(longest, current)
+        previous = day
+    if previous is None or previous < today - timedelta(days=1):
+        current = 0
+    return current, longest
+
+
+def cleanup(engine: Engine, prefix: str) -> None:
+    """Delete every row generated under `prefix`."""
+    pattern = f"{prefix}%"
+    users = select(User.user_id).where(User.school_id.like(pattern))
+    sessions = select(ChatSession.id).where(ChatSession.user_id.in_(users))
+    badge_ids = [f"{prefix}{suffix}" for suffix, _ in POINT_BADGES]
+    with Session(engine) as db:
+        db.execute(delete(ChatMessage).where(ChatMessage.session_id.in_(sessions)))
+        db.execute(delete(ChatSession).where(ChatSession.user_id.in_(users)))
+        # the point badges may also have been awarded to users outside the prefix
+        db.execute(delete(UserBadge).where(or_(UserBadge.user_id.in_(users), UserBadge.badge_id.in_(badge_ids))))
+        db.execute(delete(Analytics).where(Analytics.user_id.in_(users)))
+        db.execute(delete(Streak).where(Streak.user_id.in_(users)))
+        db.execute(delete(Attempt).where(Attempt.user_id.in_(users)))
+        db.execute(delete(Points).where(Points.user_id.in_(users)))
+        db.execute(delete(QuizUserScore).where(QuizUserScore.school_id.like(pattern)))
+        db.execute(delete(SchoolDailyActivity).where(SchoolDailyActivity.school_id.like(pattern)))
+        db.execute(delete(Quiz).where(Quiz.school_id.like(pattern)))
+        db.execute(delete(Question).where(Question.school_id.like(pattern)))
+        db.execute(delete(Topic).where(Topic.school_id.like(pattern)))
+        db.execute(delete(User).where(User.school_id.like(pattern)))
+        db.execute(delete(School).where(School.school_id.like(pattern)))
+        db.execute(delete(Badge).where(Badge.badge_id.in_(badge_ids)))
+        db.commit()
+
+
+def _point_badges(conn, prefix: str, now: datetime) -> List[tuple]:
+    """Make sure the synthetic point badges exist; returns (badge_id, points_required) of every point badge."""
+    with conn.cursor() as cur:
+        for suffix, required in POINT_BADGES:
+            cur.execute(
+                "INSERT INTO badges (badge_id, name, bahasa_indonesia_name, description, bahasa_indonesia_description,"
+                " icon_url, created_at, earned_by_points, points_required)"
+                " VALUES (%s, %s, %s, %s, %s, NULL, %s, true, %s) ON CONFLICT (badge_id) DO NOTHING",
+                (f"{prefix}{suffix}", f"{required} points", f"{required} poin",
+                 f"Earn {required} points", f"Dapatkan {required} poin", now, required),
+            )
+        cur.execute("SELECT badge_id, points_required FROM badges WHERE earned_by_points ORDER BY points_required")
+        return cur.fetchall()
+
+
+def _generate_school(
+    conn,
+    rng: random.Random,
+    prefix: str,
+    school: int,
+    hashed_password: str,
+    badges: List[tuple],
+    now: datetime,
+    students: int,
+    quizzes: int,
+    questions_per_quiz: int,
+    attempts_per_student: int,
+    chats_per_student: int,
+) -> tuple:
+    sid = school_id(prefix, school)
+    admin = admin_id(prefix, school)
+    history_start = now - timedelta(days=HISTORY_DAYS)
+    rows: Dict[str, int] = {}
+
+    rows["schools"] = _copy(conn, "schools", ["school_id", "email", "name", "status", "max_questions"], [
+        (sid, f"school{school:04d}@{prefix.lower()}.example.com", f"Synthetic School {school}", "active", questions_per_quiz),
+    ])
+
+    user_columns = ["user_id", "school_id", "email", "hashed_password", "first_name", "last_name", "created_at",
+                    "is_super_admin", "is_admin", "username", "deactivated", "grade", "last_login_time"]
+    names = [(f"Student{i}", rng.choice(["Putra", "Sari", "Wijaya", "Lestari", "Santoso", "Hidayat"])) for i in range(students)]
+    rows["users"] = _copy(conn, "users", user_columns, [
+        (admin, sid, f"admin{school:04d}@{prefix.lower()}.example.com", hashed_password, "Synthetic", "Admin",
+         history_start, False, True, None, False, None, now),
+    ] + [
+        (student_id(prefix, school, i), sid, None, hashed_password, first, last,
+         history_start + timedelta(days=rng.randint(0, 30)), False, False, student_username(prefix, school, i),
+         False, GRADES[i % len(GRADES)], now - timedelta(hours=rng.randint(0, 24 * 14)))
+        for i, (first, last) in enumerate(names)
+    ])
+
+    # one approved topic per quiz, quizzes spread evenly over the history
+    topic_ids = _reserve_ids(conn, "topics", "topic_id", quizzes)
+    reserved_questions = _reserve_ids(conn, "questions", "question_id", quizzes * questions_per_quiz)
+    quiz_ids = _reserve_ids(conn, "quizzes", "quiz_id", quizzes)
+    quiz_created = [history_start + timedelta(days=HISTORY_DAYS * q / quizzes) for q in range(quizzes)]
+    summaries = [f"Week {q + 1}: animals, colours and numbers in English. " * 5 for q in range(quizzes)]
+
+    rows["topics"] = _copy(conn, "topics", ["topic_id", "topic_name", "s3_bucket_url", "updated_at", "state",
+                                            "hash_value", "week_number", "school_id", "summary"], [
+        (topic_ids[q], f"Topic {q + 1}", f"https://{prefix.lower()}.s3.amazonaws.com/{sid}/content/{q + 1}.pdf",
+         quiz_created[q], "DONE", f"{sid}-{q}", q % 52 + 1, sid, summaries[q])
+        for q in range(quizzes)
+    ])
+    question_ids = [
+        reserved_questions[q * questions_per_quiz:(q + 1) * questions_per_quiz] for q in range(quizzes)
+    ]
+    rows["questions"] = _copy(conn, "questions", ["question_id", "school_id", "topic_id", "content", "options",
+                                                  "question_type", "points", "answer", "image_prompt", "image_url"], [
+        (question_ids[q][n], sid, topic_ids[q], f"Question {n + 1} of topic {q + 1}?", ["cat", "dog", "bird", "fish"],
+         "MCQ", 1, rng.choice(["cat", "dog", "bird", "fish"]), "A friendly animal in a classroom",
+         f"https://{prefix.lower()}.s3.amazonaws.com/{sid}/visuals/{q + 1}/{n + 1}.png")
+        for q in range(quizzes) for n in range(questions_per_quiz)
+    ])
+    rows["quizzes"] = _copy(conn, "quizzes", ["quiz_id", "school_id", "creator_id", "name", "questions",
+                                              "description", "created_at", "expired_at", "is_locked", "topic_id"], [
+        (quiz_ids[q], sid, admin, f"Quiz {q + 1}", [str(i) for i in question_ids[q]], f"Week {q % 52 + 1}",
+         quiz_created[q], quiz_created[q] + timedelta(days=30), False, topic_ids[q])
+        for q in range(quizzes)
+    ])
+
+    attempts, points, streaks, analytics, user_badges, sessions, messages = [], [], [], [], [], [], []
+    session_ids = _reserve_ids(conn, "chat_sessions", "id", students * chats_per_student) if chats_per_student else []
+    attempt_slots = min(attempts_per_student, quizzes * MAX_ATTEMPTS_PER_QUIZ)
+    for i, (first, last) in enumerate(names):
+        uid = student_id(prefix, school, i)
+        total_points = 0
+        engagement_ms = 0
+        active_days = set()
+        last_active = None
+
+        # distinct quizzes in random order, 1..MAX_ATTEMPTS_PER_QUIZ attempts each,
+        # as many as needed for the remaining quizzes to fit the rest
+        remaining = attempt_slots
+        for index, q in enumerate(rng.sample(range(quizzes), quizzes)):
+            if remaining <= 0:
+                break
+            needed = remaining - (quizzes - index - 1) * MAX_ATTEMPTS_PER_QUIZ
+            count = min(remaining, max(needed, rng.randint(1, MAX_ATTEMPTS_PER_QUIZ)))
+            start = quiz_created[q] + timedelta(minutes=rng.randint(10, max(11, int((now - quiz_created[q]).total_seconds() // 60) - 60)))
+            best = 0
+            for number in range(1, count + 1):
+                passed = rng.randint(0, questions_per_quiz)
+                end = start + timedelta(seconds=rng.randint(60, 900))
+                attempts.append((uid, quiz_ids[q], number, passed, questions_per_quiz - passed, start, end))
+                best = max(best, passed)
+                engagement_ms += int((end - start).total_seconds() * 1000)
+                active_days.add(start.date())
+                last_active = max(last_active or end, end)
+                start = end + timedelta(minutes=rng.randint(1, 60 * 24))
+                start = min(start, now - timedelta(minutes=30))
+            total_points += best
+            remaining -= count
+
+        for c in range(chats_per_student):
+            session_id = session_ids[i * chats_per_student + c]
+            created = history_start + timedelta(minutes=rng.randint(0, HISTORY_DAYS * 24 * 60 - 60))
+            turns = rng.randint(1, len(CHAT_LINES) // 2)
+            for m, (role, content) in enumerate(CHAT_LINES[:turns * 2]):
+                messages.append((session_id, role, content, created + timedelta(seconds=30 * m)))
+            ended = created + timedelta(seconds=30 * turns * 2 + 60)
+            sessions.append((session_id, uid, turns, created, summaries[rng.randrange(quizzes)], ended, f"{first} {last}"))
+            engagement_ms += int((ended - created).total_seconds() * 1000)
+            active_days.add(created.date())
+            last_active = max(last_active or ended, ended)
+
+        points.append((uid, total_points))
+        current, longest = _streak(sorted(active_days), now.date())
+        if last_active is not None:
+            streaks.append((uid, current, longest, last_active, last_active.date(), last_active))
+        analytics.append((uid, engagement_ms, last_active or now))
+        for badge_id, required in badges:
+            if total_points >= required:
+                user_badges.append((uid, badge_id, last_active or now, rng.randint(0, 1)))
+
+    rows["attempts"] = _copy(conn, "attempts", ["user_id", "quiz_id", "attempt_number", "pass_count", "fail_count",
+                                                "start_at", "end_at"], attempts)
+    rows["points"] = _copy(conn, "points", ["user_id", "points"], points)
+    rows["streaks"] = _copy(conn, "streaks", ["user_id", "current_streak", "longest_streak", "last_activity",
+                                              "last_active_date", "updated_at"], streaks)
+    rows["analytics"] = _copy(conn, "analytics", ["user_id", "engagement_time_ms", "last_updated"], analytics)
+    rows["user_badges"] = _copy(conn, "user_badges", ["user_id", "badge_id", "earned_at", "view_count"], user_badges)
+    rows["chat_sessions"] = _copy(conn, "chat_sessions", ["id", "user_id", "turn_count", "created_at", "context_text",
+                                                          "ended_at", "user_name"], sessions)
+    rows["chat_messages"] = _copy(conn, "chat_messages", ["session_id", "role", "content", "created_at"], messages)
+    return sid, quiz_ids, rows
+
+
+def generate(
+    engine: Engine,
+    schools: int = 100,
+    students_per_school: int = 1000,
+    quizzes_per_school: int = 100,
+    questions_per_quiz: int = 5,
+    attempts_per_student: int = 200,
+    chats_per_student: int = 5,
+    seed: int = 42,
+    prefix: str = "SY",
+    progress: Optional[Callable[[str], None]] = print,
+) -> GeneratedData:
+    """
+    Replace the data under `prefix` with a freshly generated set.
+
+    Args:
+        engine: Postgres engine (psycopg driver)
+        schools: Number of schools
+        students_per_school: Students per school, plus one admin
+        quizzes_per_school: Quizzes per school, each with its own topic
+        questions_per_quiz: Questions per quiz
+        attempts_per_student: Attempts per student, at most MAX_ATTEMPTS_PER_QUIZ per quiz
+        chats_per_student: Chat sessions per student
+        seed: Random seed
+        prefix: Two uppercase letters starting every generated school id
+        progress: Called with a line after each school, None for silence
+
+    Returns:
+        Ids of the generated schools and quizzes, and row counts per table
+    """
+    if len(prefix) != 2 or not prefix.isalpha() or not prefix.isupper():
+        raise ValueError("prefix must be two uppercase letters")
+    if schools > 10000 or students_per_school > 1000000:
+        raise ValueError("at most 10000 schools and 1000000 students per school fit in the ids")
+    if quizzes_per_school < 1 or questions_per_quiz < 1:
+        raise ValueError("every school needs at least one quiz with at least one question")
+
+    cleanup(engine, prefix)
+    rng = random.Random(seed)
+    hashed_password = get_password_hash(PASSWORD)
+    now = datetime.combine(date.today(), datetime.min.time())
+    data = GeneratedData()
+
+    with engine.connect() as sa_conn:
+        conn = sa_conn.connection.driver_connection
+        badges = _point_badges(conn, prefix, now)
+        conn.commit()
+        for school in range(schools):
+            started = time.perf_counter()
+            sid, quiz_ids, rows = _generate_school(
+                conn, rng, prefix, school, hashed_password, badges, now, students_per_school,
+                quizzes_per_school, questions_per_quiz, attempts_per_student, chats_per_student,
+            )
+            conn.commit()
+            data.school_ids.append(sid)
+            data.quizzes[sid] = quiz_ids
+            data.students[sid] = students_per_school
+            for table, count in rows.items():
+                data.rows[table] = data.rows.get(table, 0) + count
+            if progress:
+                progress(f"{sid}: {sum(rows.values())} rows in {time.perf_counter() - started:.1f}s")
+
+    with Session(engine) as db:
+        for sid in data.school_ids:
+            rebuild_rollups(db, sid)
+        db.commit()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as sa_conn:
+        for table in ANALYZED_TABLES:
+            sa_conn.exec_driver_sql(f"ANALYZE {table}")
+    return data
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-generate synthetic data for scale testing")
+    parser.add_argument("--schools", type=int, default=100)
+    parser.add_argument("--students", type=int, default=1000, help="students per school")
+    parser.add_argument("--quizzes", type=int, default=100, help="quizzes per school")
+    parser.add_argument("--questions", type=int, default=5, help="questions per quiz")
+    parser.add_argument("--attempts", type=int, default=200, help="attempts per student")
+    parser.add_argument("--chats", type=int, default=5, help="chat sessions per student")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--prefix", default="SY", help="two uppercase letters starting every generated school id")
+    parser.add_argument("--drop", action="store_true", help="only delete the data generated under --prefix")
+    args = parser.parse_args()
+
+    from app.database.db import ENGINE
+
+    if args.drop:
+        cleanup(ENGINE, args.prefix)
+        print(f"✅ Synthetic data under {args.prefix} removed.")
+    else:
+        started = time.perf_counter()
+        result = generate(
+            ENGINE, args.schools, args.students, args.quizzes, args.questions, args.attempts, args.chats,
+            args.seed, args.prefix,
+        )
+        total = sum(result.rows.values())
+        print(f"✅ {total} rows in {time.perf_counter() - started:.0f}s: "
+              + ", ".join(f"{table} {count}" for table, count in result.rows.items()))
+        print(f"   Log in as {student_username(args.prefix, 0, 0)} / {PASSWORD} at school {result.school_ids[0]}.")
@@ -0,0 +1,16 @@
+# rebuild_leaderboards.py
+# Reload the Redis leaderboards from points and users.
+# Run after deploying leaderboards, after a Redis flush, or to repair drift:
+#   python -m script.rebuild_leaderboards [school_id]
+import sys
+from app.database.db import SessionLocal
+from app.router.leaderboard import rebuild_leaderboards
+
+school_id = sys.argv[1] if len(sys.argv) > 1 else None
+
+db = SessionLocal()
+try:
+    loaded = rebuild_leaderboards(db, school_id)
+    print(f"✅ Leaderboards rebuilt for {school_id or 'all schools'}: {loaded} students.")
+finally:
+    db.close()
@@ -0,0 +1,25 @@
+# rebuild_rollups.py
+# Recompute quiz_user_scores and school_daily_activity from attempts and chat_sessions.
+# Run once after creating the rollup tables, or to repair them:
+#   python -m script.rebuild_rollups [school_id]
+import sys
+from app.database.db import SessionLocal
+from app.router.rollups import rebuild_rollups
+from app.router.cache import invalidate, invalidate_school, GLOBAL_TAG
+
+school_id = sys.argv[1] if len(sys.argv) > 1 else None
+
+db = SessionLocal()
+try:
+    rebuild_rollups(db, school_id)
+    db.commit()
+    if school_id:
+        invalidate_school(school_id)
+    else:
+        invalidate(GLOBAL_TAG)
+    print(f"✅ Rollups rebuilt for {school_id or 'all schools'}.")
+except Exception:
+    db.rollback()
+    raise
+finally:
+    db.close()
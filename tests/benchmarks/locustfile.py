@@ -0,0 +1,65 @@
+"""
+Load test of a student session: login -> quizzes -> questions -> submit-quiz -> chat.
+
+    python -m script.generate_synthetic_data --prefix BM --schools 3 --students 200 --quizzes 10 --attempts 4
+    python -m tests.benchmarks.serve --workers 4
+    locust -f tests/benchmarks/locustfile.py --host http://127.0.0.1:8000 \
+        --headless -u 100 -r 10 -t 2m --csv bench
+
+Locust reports requests/s and the 50/95/99th percentile latency per endpoint
+(bench_stats.csv with --csv). BENCH_SCHOOLS / BENCH_STUDENTS must not exceed
+what was seeded.
+"""
+
+import itertools
+import os
+import random
+from datetime import datetime, timedelta
+
+from locust import HttpUser, between, task
+
+from tests.benchmarks.seed import PASSWORD, school_id, student_username
+
+SCHOOLS = int(os.getenv("BENCH_SCHOOLS", "3"))
+STUDENTS = int(os.getenv("BENCH_STUDENTS", "200"))
+
+# each simulated user logs in as a different student
+_students = itertools.cycle([(s, i) for i in range(STUDENTS) for s in range(SCHOOLS)])
+
+
+class Student(HttpUser):
+    wait_time = between(1, 3)
+
+    def on_start(self):
+        school, i = next(_students)
+        response = self.client.post("/auth/login-stu", json={
+            "username": student_username(school, i), "school_id": school_id(school), "password": PASSWORD,
+        })
+        response.raise_for_status()
+        self.client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+        self.quiz_ids = [q["quiz_id"] for q in self.client.get("/users/quizzes").json()["quizzes"]]
+
+    @task(5)
+    def quizzes(self):
+        self.client.get("/users/quizzes")
+
+    @task(5)
+    def take_quiz(self):
+        quiz_id = random.choice(self.quiz_ids)
+        self.client.get(f"/users/questions/{quiz_id}", name="/users/questions/[quiz_id]")
+        start = datetime.now() - timedelta(minutes=3)
+        passed = random.randint(0, 5)
+        with self.client.post("/users/submit-quiz", json={
+            "quiz_id": quiz_id, "pass_count": passed, "fail_count": 5 - passed,
+            "start_at": start.isoformat(), "end_at": datetime.now().isoformat(),
+        }, catch_response=True) as response:
+            # the attempt limit is part of the scenario, not a failure
+            if response.status_code == 400:
+                response.success()
+
+    @task(1)
+    def chat(self):
+        session = self.client.post("/users/chat/start", json={"quiz_id": random.choice(self.quiz_ids)}).json()
+        for message in ("Halo Kira!", "I like cats", "What do cats eat?"):
+            self.client.post("/users/chat/send", json={"session_id": session["session_id"], "message": message})
+        self.client.post("/users/chat/end", json={"session_id": session["session_id"]})
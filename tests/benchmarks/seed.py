@@ -0,0 +1,67 @@
+"""
+Seed data for the benchmarks: a small run of script/generate_synthetic_data.py
+under its own school prefix, so it can be removed without touching other data.
+
+Seed a local database for the Locust scenario (POSTGRES_* settings):
+    python -m script.generate_synthetic_data --prefix BM --schools 3 --students 200 --quizzes 10 --attempts 4
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from sqlalchemy.engine import Engine
+
+from script import generate_synthetic_data as generator
+
+SCHOOL_PREFIX = "BM"
+PASSWORD = generator.PASSWORD
+
+
+def school_id(school: int) -> str:
+    return generator.school_id(SCHOOL_PREFIX, school)
+
+
+def student_username(school: int, i: int) -> str:
+    return generator.student_username(SCHOOL_PREFIX, school, i)
+
+
+@dataclass
+class BenchmarkData:
+    school_ids: List[str] = field(default_factory=list)
+    # school_id -> student user_ids
+    students: Dict[str, List[str]] = field(default_factory=dict)
+    # school_id -> quiz_ids
+    quizzes: Dict[str, List[int]] = field(default_factory=dict)
+
+
+def cleanup(engine: Engine) -> None:
+    """Delete every row created by seed()."""
+    generator.cleanup(engine, SCHOOL_PREFIX)
+
+
+def seed(
+    engine: Engine,
+    schools: int = 3,
+    students_per_school: int = 200,
+    quizzes_per_school: int = 10,
+    attempts_per_student: int = 4,
+    seed: int = 42,
+) -> BenchmarkData:
+    """
+    Replace the benchmark data with a fresh set.
+
+    Returns:
+        The ids that were created
+    """
+    generated = generator.generate(
+        engine, schools=schools, students_per_school=students_per_school, quizzes_per_school=quizzes_per_school,
+        attempts_per_student=attempts_per_student, chats_per_student=2, seed=seed, prefix=SCHOOL_PREFIX, progress=None,
+    )
+    return BenchmarkData(
+        school_ids=generated.school_ids,
+        students={
+            sid: [generator.student_id(SCHOOL_PREFIX, s, i) for i in range(generated.students[sid])]
+            for s, sid in enumerate(generated.school_ids)
+        },
+        quizzes=generated.quizzes,
+    )
@@ -0,0 +1,27 @@
+"""
+Run the API with the benchmark stubs (tests/benchmarks/stubs.py) installed, for the Locust scenario.
+Uses the database from the POSTGRES_* settings, seeded as described in locustfile.py.
+
+    python -m tests.benchmarks.serve [--port 8000] [--workers 1]
+"""
+
+import argparse
+
+import uvicorn
+
+
+def create_app():
+    from tests.benchmarks import stubs
+
+    stubs.install()
+    from app.main import app
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the API with external services stubbed")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    uvicorn.run("tests.benchmarks.serve:create_app", factory=True, host=args.host, port=args.port, workers=args.workers)
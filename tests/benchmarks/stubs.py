@@ -0,0 +1,59 @@
+"""
+Stand-ins for the external services on the student paths, so benchmarks time
+our own code and don't spend money or depend on the network:
+
+- OpenAI chat completions (chat/send) answer with a fixed reply
+- S3 presigned URLs (questions) are built from the key without signing
+- reward evaluation after submit-quiz (Celery / background task) is skipped
+
+STUB_OPENAI_LATENCY_SECONDS adds a fixed delay to every completion to mimic the
+real API when looking at concurrency rather than raw overhead.
+"""
+
+import os
+import time
+from types import SimpleNamespace
+from typing import Callable, List, Tuple
+
+STUB_REPLY = "Halo! Hewan apa yang paling kamu suka?"
+
+
+class _Completions:
+    def create(self, model: str, messages: list, **kwargs):
+        delay = float(os.getenv("STUB_OPENAI_LATENCY_SECONDS", "0"))
+        if delay:
+            time.sleep(delay)
+        message = SimpleNamespace(content=STUB_REPLY, role="assistant")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, index=0, finish_reason="stop")])
+
+
+class FakeOpenAI:
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=_Completions())
+
+
+def fake_presign_get(url_or_key: str, expires_in: int = 300):
+    return f"https://bench.cdn.example.com/{url_or_key.rsplit('/', 1)[-1]}?expires={expires_in}" if url_or_key else None
+
+
+def install(setattr_: Callable = setattr) -> List[Tuple[object, str, object]]:
+    """
+    Patch the external calls of app.router.api.users.
+
+    Args:
+        setattr_: setattr, or monkeypatch.setattr in tests so that the patches are undone
+
+    Returns:
+        (module, name, original) of every patch
+    """
+    from app.router.api import users
+
+    patches = [
+        (users, "client", FakeOpenAI()),
+        (users, "presign_get", fake_presign_get),
+        (users, "schedule_rewards", lambda user_id, background_tasks: None),
+    ]
+    originals = [(module, name, getattr(module, name)) for module, name, _ in patches]
+    for module, name, value in patches:
+        setattr_(module, name, value)
+    return originals
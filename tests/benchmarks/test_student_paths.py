@@ -0,0 +1,116 @@
+import itertools
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+# One benchmark per step of a student session: login -> quizzes -> questions ->
+# submit-quiz -> chat. Besides pytest-benchmark's own stats, p95 / p99 latency
+# and throughput are stored in extra_info (shown in --benchmark-json output).
+
+ROUNDS = 200
+
+
+def _report(benchmark) -> None:
+    times = sorted(benchmark.stats.stats.data)
+    if not times:
+        return
+
+    def percentile(p):
+        return times[min(len(times) - 1, int(round(p / 100 * (len(times) - 1))))]
+
+    benchmark.extra_info["p95_ms"] = round(percentile(95) * 1000, 2)
+    benchmark.extra_info["p99_ms"] = round(percentile(99) * 1000, 2)
+    benchmark.extra_info["throughput_rps"] = round(len(times) / sum(times), 1)
+
+
+def _check(response, expected=200):
+    assert response.status_code == expected, response.text
+    return response
+
+
+def test_login(benchmark, client, bench_data):
+    from tests.benchmarks.seed import PASSWORD, student_username
+
+    school_id = bench_data.school_ids[0]
+    body = {"username": student_username(0, 0), "school_id": school_id, "password": PASSWORD}
+    # bcrypt dominates and is slow on purpose, fewer rounds are enough
+    benchmark.pedantic(lambda: _check(client.post("/auth/login-stu", json=body)), rounds=20, warmup_rounds=1)
+    _report(benchmark)
+
+
+def test_quizzes(benchmark, client, bench_data, student_headers):
+    headers = itertools.cycle(student_headers[bench_data.school_ids[0]])
+    benchmark.pedantic(lambda: _check(client.get("/users/quizzes", headers=next(headers))), rounds=ROUNDS, warmup_rounds=5)
+    _report(benchmark)
+
+
+def test_questions(benchmark, client, bench_data, student_headers):
+    school_id = bench_data.school_ids[0]
+    pairs = itertools.cycle(zip(student_headers[school_id], itertools.cycle(bench_data.quizzes[school_id])))
+
+    def run():
+        headers, quiz_id = next(pairs)
+        _check(client.get(f"/users/questions/{quiz_id}", headers=headers))
+
+    benchmark.pedantic(run, rounds=ROUNDS, warmup_rounds=5)
+    _report(benchmark)
+
+
+def _full_pairs(engine, school_id):
+    """(user_id, quiz_id) pairs of the school that already reached the attempt limit."""
+    from sqlalchemy import func, select
+
+    from app.model.attempts import Attempt
+    from app.model.quizzes import Quiz
+    from app.router.quiz_submission import MAX_ATTEMPTS_PER_QUIZ
+
+    with engine.connect() as conn:
+        full = set(conn.execute(
+            select(Attempt.user_id, Attempt.quiz_id)
+            .join(Quiz, Quiz.quiz_id == Attempt.quiz_id)
+            .where(Quiz.school_id == school_id)
+            .group_by(Attempt.user_id, Attempt.quiz_id)
+            .having(func.count() >= MAX_ATTEMPTS_PER_QUIZ)
+        ).all())
+    return full
+
+
+def test_submit_quiz(benchmark, client, db_engine, bench_data, student_headers):
+    # every round submits for a different (student, quiz) still below the attempt limit
+    school_id = bench_data.school_ids[-1]
+    full = _full_pairs(db_engine, school_id)
+    pairs = iter([
+        (headers, quiz_id)
+        for quiz_id in bench_data.quizzes[school_id]
+        for user_id, headers in zip(bench_data.students[school_id], student_headers[school_id])
+        if (user_id, quiz_id) not in full
+    ])
+    start = datetime(2025, 1, 6, 8, 0)
+
+    def setup():
+        headers, quiz_id = next(pairs)
+        body = {
+            "quiz_id": quiz_id, "pass_count": 4, "fail_count": 1,
+            "start_at": start.isoformat(), "end_at": (start + timedelta(minutes=3)).isoformat(),
+        }
+        return (headers, body), {}
+
+    def run(headers, body):
+        _check(client.post("/users/submit-quiz", json=body, headers=headers), 201)
+
+    benchmark.pedantic(run, setup=setup, rounds=ROUNDS)
+    _report(benchmark)
+
+
+def test_chat_send(benchmark, client, bench_data, student_headers):
+    school_id = bench_data.school_ids[0]
+    headers = student_headers[school_id][-1]
+    session = _check(client.post("/users/chat/start", json={"quiz_id": bench_data.quizzes[school_id][0]}, headers=headers))
+    body = {"session_id": session.json()["session_id"], "message": "I like cats"}
+
+    # the history grows by two messages per round, like a real conversation
+    benchmark.pedantic(lambda: _check(client.post("/users/chat/send", json=body, headers=headers)), rounds=50, warmup_rounds=1)
+    _report(benchmark)
+    _check(client.post("/users/chat/end", json={"session_id": body["session_id"]}, headers=headers))
@@ -0,0 +1,105 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("fastapi")
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+
+def _seed_topic(db, school_id, n_questions):
+    from app.model.schools import School
+    from app.model.users import User
+    from app.model.topics import Topic
+    from app.model.questions import Question
+
+    if db.get(School, school_id) is None:
+        db.add(School(school_id=school_id, email=f"{school_id}@example.com", name=f"School {school_id}"))
+    admin = db.get(User, f"adm{school_id}")
+    if admin is None:
+        admin = User(
+            user_id=f"adm{school_id}", school_id=school_id, email=f"admin{school_id}@example.com",
+            hashed_password="x", first_name="Ada", last_name="Admin", is_admin=True,
+        )
+        db.add(admin)
+    topic = Topic(
+        topic_name="Animals", s3_bucket_url="https://example.com/a.pdf", state="READY_FOR_REVIEW",
+        hash_value=f"hash-{school_id}-{n_questions}", week_number=1, school_id=school_id, summary="",
+    )
+    db.add(topic)
+    db.flush()
+    questions = [
+        Question(
+            school_id=school_id, topic_id=topic.topic_id, content=f"Question {i}", options=["a", "b", "c", "d"],
+            question_type="MCQ", points=1, answer="a",
+        )
+        for i in range(n_questions)
+    ]
+    db.add_all(questions)
+    db.commit()
+    return admin, topic, questions
+
+
+def _approve(db, admin, topic, questions):
+    from app.router.api.admin import approve_topic
+    from app.schema.user_schema import ApproveQuestions, Question as QuestionSchema
+
+    body = ApproveQuestions(
+        quiz_name="Animals",
+        quiz_description="Week 1",
+        questions=[
+            QuestionSchema(
+                question_id=q.question_id, content=q.content, options=q.options,
+                question_type=q.question_type, points=q.points, answer=q.answer,
+            )
+            for q in questions
+        ],
+    )
+    return asyncio.run(approve_topic(topic.topic_id, body, user=admin, db=db))
+
+
+def _count_statements(engine, fn):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(("SAVEPOINT", "RELEASE", "ROLLBACK")):
+            statements.append(statement)
+
+    sqlalchemy.event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        result = fn()
+    finally:
+        sqlalchemy.event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return result, statements
+
+
+def test_approve_topic_is_one_transaction_with_fixed_statement_count(db_engine, db_session):
+    from app.model.quizzes import Quiz
+    from app.model.email_outbox import EmailOutbox
+
+    admin, topic, questions = _seed_topic(db_session, "T035A", 3)
+    result, small = _count_statements(db_engine, lambda: _approve(db_session, admin, topic, questions))
+
+    # topic lock, question lock, quiz INSERT ... RETURNING, topic UPDATE, outbox INSERT
+    assert len(small) <= 5, small
+    assert len(result["quiz_ids"]) == 3
+    assert db_session.get(type(topic), topic.topic_id).state == "DONE"
+    quizzes = db_session.query(Quiz).filter(Quiz.topic_id == topic.topic_id).all()
+    assert len(quizzes) == 3
+    assert all(sorted(int(q) for q in quiz.questions) == sorted(q.question_id for q in questions) for quiz in quizzes)
+    assert db_session.query(EmailOutbox).filter(EmailOutbox.recipient == admin.email).count() == 1
+
+    # cost must not grow with the number of questions
+    admin, topic, questions = _seed_topic(db_session, "T035B", 12)
+    _, large = _count_statements(db_engine, lambda: _approve(db_session, admin, topic, questions))
+    assert len(large) == len(small)
+
+
+def test_approve_topic_rejects_second_approval(db_engine, db_session):
+    from fastapi import HTTPException
+
+    admin, topic, questions = _seed_topic(db_session, "T035C", 2)
+    _approve(db_session, admin, topic, questions)
+    with pytest.raises(HTTPException) as exc:
+        _approve(db_session, admin, topic, questions)
+    assert exc.value.status_code == 409
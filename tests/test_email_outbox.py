@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+sqlalchemy = pytest.importorskip("sqlalchemy")
+pytest.importorskip("boto3")
+
+
+class _FlakySes:
+    """SES client whose second send fails on the transport, like a dropped connection."""
+
+    def __init__(self):
+        self.sent = []
+
+    def send_email(self, Destination, **kwargs):
+        from botocore.exceptions import EndpointConnectionError
+
+        recipient = Destination["ToAddresses"][0]
+        if recipient == "b@example.com":
+            raise EndpointConnectionError(endpoint_url="https://email.us-east-2.amazonaws.com")
+        self.sent.append(recipient)
+
+
+def test_transport_error_mid_batch_keeps_the_other_sends(monkeypatch):
+    from sqlalchemy.orm import Session
+
+    from app.model.email_outbox import EmailOutbox
+    from app.router import aws_ses
+
+    engine = sqlalchemy.create_engine("sqlite://")
+    EmailOutbox.__table__.create(engine)
+    client = _FlakySes()
+    monkeypatch.setattr(aws_ses, "_get_ses_client", lambda: client)
+
+    due = datetime.now() - timedelta(minutes=1)
+    with Session(engine, expire_on_commit=False) as db:
+        db.add_all([
+            EmailOutbox(email_id=i, recipient=f"{name}@example.com", subject="Hi", body_html="<p>Hi</p>", next_attempt_at=due + timedelta(seconds=i))
+            for i, name in enumerate("abc", start=1)
+        ])
+        db.commit()
+
+        assert aws_ses.dispatch_outbox(db) == 3
+        db.rollback()  # what the Celery task does on an error must not undo committed sends
+        rows = {row.recipient: row for row in db.query(EmailOutbox)}
+
+    assert client.sent == ["a@example.com", "c@example.com"]
+    assert rows["a@example.com"].status == rows["c@example.com"].status == "SENT"
+    failed = rows["b@example.com"]
+    assert failed.status == "PENDING"
+    assert failed.attempts == 1
+    assert "Could not connect" in failed.last_error
+    assert failed.next_attempt_at >= datetime.now() + timedelta(seconds=aws_ses.OUTBOX_BASE_BACKOFF_SECONDS - 5)
+    engine.dispose()
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+
+@pytest.fixture
+def sqlite_engine():
+    engine = sqlalchemy.create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.exec_driver_sql("INSERT INTO items (id, name) VALUES (1, 'a'), (2, 'b'), (3, 'c')")
+    yield engine
+    engine.dispose()
+
+
+def test_normalize_statement_ignores_values():
+    from app.database.profiler import normalize_statement
+
+    assert normalize_statement("SELECT * FROM items\n  WHERE id = 7 AND name = 'x'") == \
+        normalize_statement("SELECT * FROM items WHERE id = %(id_1)s AND name = %(name_1)s")
+    assert normalize_statement("SELECT 1 FROM t WHERE id IN (%(a_1)s, %(a_2)s, %(a_3)s)") == \
+        "SELECT ? FROM t WHERE id IN (...)"
+
+
+def test_query_budget_reports_repeated_shapes(sqlite_engine):
+    from app.database.profiler import QueryBudgetExceeded, query_budget
+
+    with query_budget(1):
+        with sqlite_engine.connect() as conn:
+            conn.execute(sqlalchemy.text("SELECT id FROM items")).all()
+
+    with pytest.raises(QueryBudgetExceeded) as excinfo:
+        with query_budget(2):
+            with sqlite_engine.connect() as conn:
+                for item_id in (1, 2, 3):
+                    conn.execute(sqlalchemy.text("SELECT name FROM items WHERE id = :id"), {"id": item_id}).all()
+    assert "3 x SELECT name FROM items WHERE id = ?" in str(excinfo.value)
+
+
+def test_user_badges_query_count_does_not_grow_with_badges(db_session):
+    from app.model.badges import Badge
+    from app.model.schools import School
+    from app.model.user_badges import UserBadge
+    from app.model.users import User
+    from app.database.profiler import query_budget
+    from app.router.api.users import get_a_user_badges
+
+    db_session.add(School(school_id="T047", email="t047@example.com", name="School T047"))
+    user = User(user_id="stu047", school_id="T047", hashed_password="x", first_name="Sam", last_name="Student")
+    db_session.add(user)
+    badges = [
+        Badge(
+            badge_id=f"T047B{i}", name=f"Badge {i}", bahasa_indonesia_name=f"Lencana {i}",
+            bahasa_indonesia_description="", earned_by_points=False,
+        )
+        for i in range(5)
+    ]
+    db_session.add_all(badges)
+    db_session.flush()
+    db_session.add_all([UserBadge(user_id="stu047", badge_id=b.badge_id) for b in badges])
+    db_session.commit()
+
+    with query_budget(1):
+        result = asyncio.run(get_a_user_badges(db=db_session, user=user))
+    assert len(result.badges) == 5
@@ -0,0 +1,63 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import pytest
+
+sqlalchemy = pytest.importorskip("sqlalchemy")
+pytest.importorskip("fastapi")
+
+
+def test_concurrent_reads_share_the_request_session(tmp_path, monkeypatch):
+    """Without replicas, get_read_db must not take a second connection from the primary pool."""
+    from fastapi import Depends, FastAPI
+    from fastapi.testclient import TestClient
+    from sqlalchemy import text
+    from sqlalchemy.orm import Session, sessionmaker
+    from sqlalchemy.pool import QueuePool
+
+    from app.database import get_db, replicas
+    from app.router.auth_util import create_access_token
+    from app.router.dependencies import get_read_db
+
+    # a pool as tight as the primary's: one connection per concurrent request, no overflow
+    engine = sqlalchemy.create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=QueuePool, pool_size=2, max_overflow=0,
+        pool_timeout=3, connect_args={"check_same_thread": False},
+    )
+    session_factory = sessionmaker(bind=engine)
+    # falling back to a fresh primary session would now draw from the same small pool
+    monkeypatch.setattr(replicas, "SessionLocal", session_factory)
+    monkeypatch.setattr(replicas, "_replicas", [])
+
+    def override_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def current_user(db: Session = Depends(get_db)):
+        # like get_current_user: the request session holds its connection from here on
+        db.execute(text("SELECT 1"))
+        return db
+
+    app = FastAPI()
+
+    @app.get("/read")
+    def read(request_db: Session = Depends(current_user), read_db: Session = Depends(get_read_db)):
+        read_db.execute(text("SELECT 1"))
+        return {"same_session": read_db is request_db}
+
+    app.dependency_overrides[get_db] = override_db
+    token = create_access_token(
+        subject="stu039", email=None, first_name="Sam", role="student",
+        school_id="T039", expires_delta=timedelta(minutes=5),
+    )
+    headers = {"Authorization": f"Bearer {token}"}
+
+    with TestClient(app) as client, ThreadPoolExecutor(max_workers=6) as pool:
+        responses = list(pool.map(lambda _: client.get("/read", headers=headers), range(12)))
+
+    assert [r.status_code for r in responses] == [200] * 12
+    assert all(r.json()["same_session"] for r in responses)
+    engine.dispose()
@@ -0,0 +1,69 @@
+from datetime import date, timedelta
+
+import pytest
+
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+SCHOOL_ID = "T042"
+USER_ID = "stu042"
+MONDAY = date(2025, 1, 6)
+
+
+@pytest.fixture
+def student(db_session):
+    from app.model.schools import School
+    from app.model.users import User
+
+    db_session.add(School(school_id=SCHOOL_ID, email="t042@example.com", name="School T042"))
+    db_session.add(User(user_id=USER_ID, school_id=SCHOOL_ID, hashed_password="x", first_name="Sam", last_name="Student"))
+    db_session.flush()
+    return db_session
+
+
+def _streak(db):
+    from app.model.streaks import Streak
+
+    row = db.get(Streak, USER_ID)
+    db.refresh(row)
+    return row.current_streak, row.longest_streak, row.last_active_date
+
+
+def test_first_activity_starts_a_streak(student):
+    from app.router.streaks import record_activity
+
+    assert record_activity(student, USER_ID, MONDAY) == 1
+    assert _streak(student) == (1, 1, MONDAY)
+
+
+def test_same_day_is_counted_once(student):
+    from app.router.streaks import record_activity
+
+    record_activity(student, USER_ID, MONDAY)
+    assert record_activity(student, USER_ID, MONDAY) is None
+    assert _streak(student) == (1, 1, MONDAY)
+
+
+def test_consecutive_day_extends_the_streak(student):
+    from app.router.streaks import record_activity
+
+    record_activity(student, USER_ID, MONDAY)
+    assert record_activity(student, USER_ID, MONDAY + timedelta(days=1)) == 2
+    assert _streak(student) == (2, 2, MONDAY + timedelta(days=1))
+
+
+def test_gap_restarts_at_one_and_keeps_the_longest(student):
+    from app.router.streaks import record_activity
+
+    for day in range(3):
+        record_activity(student, USER_ID, MONDAY + timedelta(days=day))
+    assert record_activity(student, USER_ID, MONDAY + timedelta(days=5)) == 1
+    assert _streak(student) == (1, 3, MONDAY + timedelta(days=5))
+
+
+def test_reset_returns_the_broken_streaks(student):
+    from app.router.streaks import record_activity, reset_broken_streaks
+
+    record_activity(student, USER_ID, MONDAY)
+    assert USER_ID not in reset_broken_streaks(student, MONDAY + timedelta(days=1))
+    assert USER_ID in reset_broken_streaks(student, MONDAY + timedelta(days=2))
+    assert _streak(student)[0] == 0
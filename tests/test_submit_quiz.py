@@ -0,0 +1,156 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+SCHOOL_ID = "T040"
+
+
+@pytest.fixture
+def seeded(db_engine):
+    """A student with a points row and one quiz, committed so that parallel connections see them."""
+    from sqlalchemy.orm import Session
+    from app.model.attempts import Attempt
+    from app.model.points import Points
+    from app.model.quiz_user_scores import QuizUserScore
+    from app.model.quizzes import Quiz
+    from app.model.school_daily_activity import SchoolDailyActivity
+    from app.model.schools import School
+    from app.model.streaks import Streak
+    from app.model.user_achievements import UserAchievement
+    from app.model.users import User
+
+    def cleanup(db):
+        db.query(UserAchievement).filter(UserAchievement.user_id == "stu040").delete()
+        db.query(SchoolDailyActivity).filter(SchoolDailyActivity.school_id == SCHOOL_ID).delete()
+        db.query(QuizUserScore).filter(QuizUserScore.school_id == SCHOOL_ID).delete()
+        db.query(Attempt).filter(Attempt.user_id == "stu040").delete()
+        db.query(Points).filter(Points.user_id == "stu040").delete()
+        db.query(Streak).filter(Streak.user_id == "stu040").delete()
+        db.query(Quiz).filter(Quiz.school_id == SCHOOL_ID).delete()
+        db.query(User).filter(User.school_id == SCHOOL_ID).delete()
+        db.query(School).filter(School.school_id == SCHOOL_ID).delete()
+        db.commit()
+
+    with Session(db_engine) as db:
+        cleanup(db)
+        db.add(School(school_id=SCHOOL_ID, email="t040@example.com", name="School T040"))
+        db.add_all([
+            User(user_id="adm040", school_id=SCHOOL_ID, hashed_password="x", first_name="Ada", last_name="Admin", is_admin=True),
+            User(user_id="stu040", school_id=SCHOOL_ID, hashed_password="x", first_name="Sam", last_name="Student"),
+        ])
+        db.flush()
+        db.add(Points(user_id="stu040", points=0))
+        quiz = Quiz(school_id=SCHOOL_ID, creator_id="adm040", name="Animals", questions=["1", "2"])
+        db.add(quiz)
+        db.commit()
+        quiz_id = quiz.quiz_id
+
+    yield quiz_id
+
+    with Session(db_engine) as db:
+        cleanup(db)
+
+
+def _submit_in_parallel(engine, quiz_id, pass_counts, keys):
+    from sqlalchemy.orm import Session
+    from app.router.quiz_submission import submit_attempt
+    from app.schema.user_schema import QuizSubmission
+
+    results, errors = [], []
+    barrier = threading.Barrier(len(pass_counts))
+    start = datetime(2025, 1, 6, 8, 0)
+
+    def worker(pass_count, key):
+        submission = QuizSubmission(
+            quiz_id=quiz_id, pass_count=pass_count, fail_count=5 - pass_count,
+            start_at=start, end_at=start + timedelta(minutes=3),
+        )
+        with Session(engine) as db:
+            barrier.wait()
+            try:
+                results.append(submit_attempt(db, "stu040", submission, key))
+                db.commit()
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=args) for args in zip(pass_counts, keys)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors, errors
+    return results
+
+
+def _state(engine):
+    from sqlalchemy.orm import Session
+    from app.model.attempts import Attempt
+    from app.model.points import Points
+
+    with Session(engine) as db:
+        attempts = db.query(Attempt).filter(Attempt.user_id == "stu040").order_by(Attempt.attempt_number).all()
+        points = db.get(Points, "stu040").points
+    return attempts, points
+
+
+def test_parallel_submissions_respect_attempt_limit_and_points(db_engine, seeded):
+    results = _submit_in_parallel(db_engine, seeded, [3, 3, 3, 3, 3, 3, 3, 3], [None] * 8)
+
+    attempts, points = _state(db_engine)
+    assert [a.attempt_number for a in attempts] == [1, 2]
+    assert sum(r.attempt_id is not None for r in results) == 2
+    # only the first attempt improves on a best of 0
+    assert points == 3
+    assert sorted(r.points_gained for r in results if r.attempt_id is not None) == [0, 3]
+
+
+def test_parallel_retries_with_same_key_store_one_attempt(db_engine, seeded):
+    results = _submit_in_parallel(db_engine, seeded, [4] * 6, ["retry-key"] * 6)
+
+    attempts, points = _state(db_engine)
+    assert len(attempts) == 1
+    assert points == 4
+    assert sum(not r.replayed for r in results) == 1
+    assert {r.attempt_id for r in results} == {attempts[0].attempt_id}
+
+
+def test_reward_evaluation_in_parallel_with_submissions_keeps_every_point(db_engine, seeded, monkeypatch):
+    """Achievement points and submission points are both added, whatever order the transactions commit in."""
+    import asyncio
+
+    from sqlalchemy.orm import Session
+    from app.database import db as database
+    from app.model.achievements import Achievement
+    from app.router.background.achievement_task import check_achievement_and_award
+
+    pytest.importorskip("asyncpg")
+    # the reward task opens its own async sessions; point them at the test database
+    monkeypatch.setattr(database, "SQLALCHEMY_DATABASE_URL", db_engine.url.render_as_string(hide_password=False))
+    with Session(db_engine) as db:
+        for achievement_id, points in [("ACH001", 10), ("ACH002", 50), ("ACH003", 15), ("ACH004", 50),
+                                       ("ACH005", 50), ("ACH006", 20), ("ACH007", 5)]:
+            if db.get(Achievement, achievement_id) is None:
+                db.add(Achievement(id=achievement_id, name_en=achievement_id, points=points))
+        db.commit()
+
+    # a first attempt for the rewards to find, then a better second one racing the evaluation
+    _submit_in_parallel(db_engine, seeded, [2], [None])
+    awarded = []
+    barrier = threading.Barrier(2)
+
+    def evaluate():
+        barrier.wait()
+        awarded.append(asyncio.run(check_achievement_and_award("stu040")))
+
+    evaluator = threading.Thread(target=evaluate)
+    evaluator.start()
+    barrier.wait()
+    _submit_in_parallel(db_engine, seeded, [5], [None])
+    evaluator.join()
+
+    _, points = _state(db_engine)
+    assert awarded[0] >= 10  # at least ACH001, for the first attempt
+    assert points == 5 + awarded[0]